@@ -3,7 +3,7 @@ from login import login_page, clear_session, is_logged_in
 from PIL import Image
 import os
 import sys
-from db import init_db
+from db import initialiser_base, executer_taches_quotidiennes
 from datetime import datetime
 import time
 
@@ -15,9 +15,12 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialisation de la base de données au démarrage
+# Initialisation de la base de données (une seule fois par processus),
+# puis traitements quotidiens (factures échues passées en retard) s'ils
+# n'ont pas encore tourné aujourd'hui
 try:
-    init_db()
+    initialiser_base()
+    executer_taches_quotidiennes()
 except Exception as e:
     st.error(f"Erreur d'initialisation de la base de données: {e}")
 
@@ -61,11 +64,67 @@ page_dir = os.path.join(current_dir, 'page')
 if page_dir not in sys.path:
     sys.path.insert(0, page_dir)
 
+# Pages de l'application : (libellé du menu, nom de la page = module dans page/)
+PAGES = [
+    (" Accueil", "Accueil"),
+    (" Clients", "Clients"),
+    (" Contrats", "Contrats"),
+    (" Facturation", "Facturation"),
+    (" Reporting", "Reporting")
+]
+
+# Mode développement : les pages modifiées sur disque sont rechargées
+MODE_DEV = os.environ.get("DOMICILIATION_DEV") == "1"
+
+@st.cache_resource
+def registre_pages():
+    """Modules de page déjà chargés par ce processus : nom -> (module, mtime du fichier)"""
+    return {}
+
+def charger_page(module_name):
+    """
+    Retourne le module de page, importé une seule fois par processus.
+    Hors mode développement, aucun accès disque après le premier chargement ;
+    en mode développement, le module est rechargé si son fichier a changé.
+    """
+    registre = registre_pages()
+    entree = registre.get(module_name)
+    
+    if entree and not MODE_DEV:
+        return entree[0]
+    
+    module_path = os.path.join(page_dir, f"{module_name}.py")
+    if entree:
+        try:
+            mtime = os.path.getmtime(module_path)
+        except OSError:
+            return entree[0]
+        if mtime == entree[1]:
+            return entree[0]
+        if sys.modules.get(module_name) is entree[0]:
+            import importlib
+            module = importlib.reload(entree[0])
+        else:
+            # Module chargé par spec_from_file_location (absent de sys.modules) :
+            # importlib.reload échouerait, on ré-exécute le chargement depuis le fichier
+            module = import_page_module(module_name)
+            if module is None:
+                return entree[0]
+        registre[module_name] = (module, mtime)
+        return module
+    
+    module = import_page_module(module_name)
+    if module is not None:
+        mtime = os.path.getmtime(module_path) if MODE_DEV and os.path.exists(module_path) else None
+        registre[module_name] = (module, mtime)
+    return module
+
 # Fonction pour importer les modules de page
 def import_page_module(module_name):
     """Importe un module de page avec gestion d'erreurs détaillée"""
     try:
-        module = __import__(module_name)
+        import importlib
+        module = importlib.import_module(module_name)
         return module
     except ImportError as e1:
         try:
@@ -269,17 +328,8 @@ with st.sidebar:
     # Menu de navigation
     st.markdown('<div class="company-title"><i>Navigation</i></div>', unsafe_allow_html=True)
 
-    # Options de menu
-    menu_options = [
-        (" Accueil", "Accueil"),
-        (" Clients", "Clients"),
-        (" Contrats", "Contrats"),
-        (" Facturation", "Facturation"),
-        (" Reporting", "Reporting")
-    ]
-    
     # Création des boutons de navigation
-    for display_name, page_name in menu_options:
+    for display_name, page_name in PAGES:
         col1, col2 = st.columns([1, 20])
         with col2:
             if st.button(display_name, key=f"nav_{page_name}", use_container_width=True):
@@ -312,46 +362,14 @@ with main_container:
     try:
         page_name = st.session_state.current_page
         
-        # Routage vers les différentes pages
-        if page_name == "Accueil":
-            module = import_page_module("Accueil")
-            if module and hasattr(module, 'show'):
-                module.show()
-            else:
-                st.error("✗ Module Accueil non trouvé ou fonction show() manquante")
-                st.info("💡 Créez le fichier `page/Accueil.py` avec une fonction `show()`")
-                
-        elif page_name == "Clients":
-            module = import_page_module("Clients")
-            if module and hasattr(module, 'show'):
-                module.show()
-            else:
-                st.error("✗ Module Clients non trouvé ou fonction show() manquante")
-                st.info("💡 Créez le fichier `page/Clients.py` avec une fonction `show()`")
-                
-        elif page_name == "Contrats":
-            module = import_page_module("Contrats")
-            if module and hasattr(module, 'show'):
-                module.show()
-            else:
-                st.error("✗ Module Contrats non trouvé ou fonction show() manquante")
-                st.info("💡 Créez le fichier `page/Contrats.py` avec une fonction `show()`")
-                
-        elif page_name == "Facturation":
-            module = import_page_module("Facturation")
-            if module and hasattr(module, 'show'):
-                module.show()
-            else:
-                st.error("✗ Module Facturation non trouvé ou fonction show() manquante")
-                st.info("💡 Créez le fichier `page/Facturation.py` avec une fonction `show()`")
-                
-        elif page_name == "Reporting":
-            module = import_page_module("Reporting")
-            if module and hasattr(module, 'show'):
-                module.show()
-            else:
-                st.error("✗ Module Reporting non trouvé ou fonction show() manquante")
-                st.info("💡 Créez le fichier `page/Reporting.py` avec une fonction `show()`")
+        # Routage vers les différentes pages (table de dispatch)
+        pages_connues = {nom for _, nom in PAGES}
+        module = charger_page(page_name) if page_name in pages_connues else None
+        if module and hasattr(module, 'show'):
+            module.show()
+        else:
+            st.error(f"✗ Module {page_name} non trouvé ou fonction show() manquante")
+            st.info(f"💡 Créez le fichier `page/{page_name}.py` avec une fonction `show()`")
         
     except Exception as e:
         st.error(f"✗ Erreur lors du chargement de la page {page_name}: {e}")
@@ -0,0 +1,131 @@
+"""
+Test de concurrence de l'allocation des identifiants clients.
+
+Sur une copie de la base, plusieurs threads créent des clients physiques et
+moraux en même temps (ajouter_client) pendant que d'autres réservent des
+blocs d'ids comme le ferait un import en masse. On vérifie ensuite qu'aucun
+id n'a été attribué deux fois, que toutes les créations ont abouti et que la
+séquence est au niveau du plus grand id.
+
+Usage : python bench_ids_clients.py [threads] [clients_par_thread]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import db
+
+NB_THREADS = 16
+CLIENTS_PAR_THREAD = 25
+TAILLE_BLOC = 10
+
+
+def preparer_base() -> str:
+    """Copie la base courante dans un fichier temporaire et la met au schéma courant"""
+    chemin = os.path.join(tempfile.mkdtemp(), "ids.db")
+    shutil.copy(db.DB_PATH, chemin)
+    db.DB_PATH = chemin
+    db.init_db()
+    return chemin
+
+
+def creer_clients(numero: int, nombre: int, echecs: list, depart: threading.Barrier):
+    """Crée nombre clients, alternativement physiques et moraux"""
+    depart.wait()
+    for i in range(nombre):
+        suffixe = f"{numero:03d}{i:04d}"
+        if i % 2 == 0:
+            ok = db.ajouter_client({
+                'nom': f"Concurrence{suffixe}", 'prenom': "Test", 'sexe': 'M',
+                'cin': f"CC{suffixe}", 'telephone': "0600000000"
+            }, "physique")
+        else:
+            ok = db.ajouter_client({
+                'raison_sociale': f"Concurrence {suffixe} SARL", 'ice': f"ICE{suffixe}",
+                'telephone': "0500000000"
+            }, "moral")
+        if not ok:
+            echecs.append(suffixe)
+
+
+def reserver_blocs(nombre: int, blocs: list, depart: threading.Barrier):
+    """Réserve nombre blocs d'ids, chacun dans sa propre transaction"""
+    depart.wait()
+    for _ in range(nombre):
+        with db.db_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            blocs.append(db.reserver_ids_clients(conn, TAILLE_BLOC))
+            conn.commit()
+
+
+if __name__ == "__main__":
+    nb_threads = int(sys.argv[1]) if len(sys.argv) > 1 else NB_THREADS
+    par_thread = int(sys.argv[2]) if len(sys.argv) > 2 else CLIENTS_PAR_THREAD
+    chemin = preparer_base()
+    print(f"Base de test : {chemin}")
+
+    conn = db.get_db_connection()
+    try:
+        avant = {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in db.TABLES_CLIENTS}
+    finally:
+        conn.close()
+
+    # Un thread de réservation de blocs pour quatre threads de création
+    nb_reservations = max(1, nb_threads // 4)
+    echecs, blocs = [], []
+    depart = threading.Barrier(nb_threads + nb_reservations)
+    threads = [threading.Thread(target=creer_clients, args=(n, par_thread, echecs, depart))
+               for n in range(nb_threads)]
+    threads += [threading.Thread(target=reserver_blocs, args=(par_thread // 5 or 1, blocs, depart))
+                for _ in range(nb_reservations)]
+
+    debut = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duree = time.perf_counter() - debut
+
+    conn = db.get_db_connection()
+    try:
+        ids = [ligne[0] for ligne in conn.execute(
+            "SELECT id FROM clients_physiques UNION ALL SELECT id FROM clients_moraux"
+        )]
+        apres = {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in db.TABLES_CLIENTS}
+        ligne = conn.execute(
+            "SELECT valeur FROM sequences WHERE nom = ?", (db.SEQUENCE_CLIENTS,)
+        ).fetchone()
+        sequence = ligne[0] if ligne else None
+    finally:
+        conn.close()
+
+    attendus = nb_threads * par_thread
+    crees = sum(apres.values()) - sum(avant.values())
+    ids_reserves = [i for bloc in blocs for i in bloc]
+    print(f"{crees}/{attendus} clients créés par {nb_threads} threads en {duree * 1000:.0f} ms "
+          f"({len(blocs)} blocs de {TAILLE_BLOC} ids réservés en parallèle)")
+
+    erreurs = []
+    if echecs:
+        erreurs.append(f"{len(echecs)} créations en échec")
+    if crees != attendus:
+        erreurs.append(f"{crees} clients créés au lieu de {attendus}")
+    if len(ids) != len(set(ids)):
+        erreurs.append(f"{len(ids) - len(set(ids))} ids partagés entre clients")
+    if set(ids) & set(ids_reserves) or len(ids_reserves) != len(set(ids_reserves)):
+        erreurs.append("des ids réservés ont été attribués deux fois")
+    if sequence is None:
+        erreurs.append(f"séquence '{db.SEQUENCE_CLIENTS}' absente")
+    elif sequence != max(ids + ids_reserves):
+        erreurs.append(f"séquence à {sequence}, plus grand id {max(ids + ids_reserves)}")
+
+    shutil.rmtree(os.path.dirname(chemin), ignore_errors=True)
+    if erreurs:
+        # Code de sortie non nul : le script sert de test de non-régression
+        print("ECHEC : " + " ; ".join(erreurs))
+        sys.exit(1)
+    print("Aucun id en double, séquence cohérente")
+    sys.exit(0)
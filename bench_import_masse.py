@@ -0,0 +1,85 @@
+"""
+Banc d'essai des imports en masse (clients puis contrats).
+
+Génère un fichier CSV de clients physiques fictifs (avec une ligne invalide
+sur cent et quelques doublons) et un fichier de contrats qui les désignent
+par leur CIN (avec quelques clients inconnus et dates incohérentes), puis
+les importe avec importer_clients et importer_contrats dans une copie de la
+base. Affiche le débit et le début du rapport de rejets.
+
+Usage : python bench_import_masse.py [nombre_de_clients] [taille_lot]
+"""
+import csv
+import os
+import shutil
+import sys
+import tempfile
+
+import db
+
+NB_CLIENTS = 100_000
+
+
+def preparer_base(dossier: str) -> str:
+    """Copie la base courante dans dossier et la met au schéma courant"""
+    chemin = os.path.join(dossier, "import.db")
+    shutil.copy(db.DB_PATH, chemin)
+    db.DB_PATH = chemin
+    db.init_db()
+    return chemin
+
+
+def generer_csv_clients(chemin: str, nb_clients: int):
+    """Écrit nb_clients lignes au format du modèle d'import (séparateur ;)"""
+    with open(chemin, 'w', newline='', encoding='utf-8') as fichier:
+        ecriture = csv.writer(fichier, delimiter=';')
+        ecriture.writerow(['Nom', 'Prénom', 'CIN', 'Téléphone', 'Sexe', 'E-mail', 'Date de naissance', 'Adresse'])
+        for i in range(nb_clients):
+            email = f"client{i}@exemple.ma" if i % 100 != 1 else "adresse-invalide"
+            cin = f"BK{i:06d}" if i % 500 != 3 else f"BK{i - 1:06d}"
+            ecriture.writerow([
+                f"nom{i}", f"prénom{i}", cin, f"06{i:08d}",
+                'Femme' if i % 2 else 'H', email,
+                f"{1 + i % 28:02d}/{1 + i % 12:02d}/{1960 + i % 40}", f"{i} rue de Fès, Casablanca"
+            ])
+
+
+def generer_csv_contrats(chemin: str, nb_clients: int):
+    """Écrit un contrat par client, désigné par sa CIN (séparateur ,)"""
+    services = ['Domiciliation commerciale', 'Domiciliation fiscale', 'Bureau virtuel']
+    with open(chemin, 'w', newline='', encoding='utf-8') as fichier:
+        ecriture = csv.writer(fichier)
+        ecriture.writerow(['N° contrat', 'CIN ou ICE', 'Service', 'Date début', 'Durée', 'Montant', 'Statut'])
+        for i in range(nb_clients):
+            cin = f"BK{i:06d}" if i % 1000 != 7 else f"XX{i:06d}"
+            debut = f"{1 + i % 28:02d}/{1 + i % 12:02d}/2024" if i % 1000 != 9 else "30/02/2024"
+            ecriture.writerow([f"REPRISE-{i:07d}", cin, services[i % len(services)], debut,
+                               12 * (1 + i % 3), f"{500 + i % 20 * 50},00", 'actif' if i % 10 else 'Résilié'])
+
+
+def afficher_rapport(libelle: str, rapport: dict, taille_lot: int):
+    """Résumé d'un rapport d'import et ses premiers rejets"""
+    if rapport['erreur']:
+        print(f"Import interrompu : {rapport['erreur']}")
+    print(f"{libelle} : {rapport['total']} lignes lues, {rapport['importes']} importées, "
+          f"{len(rapport['rejets'])} rejets en {rapport['duree_s']:.2f} s "
+          f"({rapport['lignes_par_s']:,.0f} lignes/s, lots de {taille_lot})")
+    for rejet in rapport['rejets'][:3]:
+        print(f"  ligne {rejet['ligne']} ({rejet['identifiant']}) : {rejet['erreurs']}")
+
+
+if __name__ == "__main__":
+    nb_clients = int(sys.argv[1]) if len(sys.argv) > 1 else NB_CLIENTS
+    taille_lot = int(sys.argv[2]) if len(sys.argv) > 2 else db.TAILLE_LOT_IMPORT
+    dossier = tempfile.mkdtemp()
+    preparer_base(dossier)
+    chemin_csv = os.path.join(dossier, "clients.csv")
+    generer_csv_clients(chemin_csv, nb_clients)
+
+    afficher_rapport("Clients", db.importer_clients(chemin_csv, "physique", taille_lot=taille_lot), taille_lot)
+
+    chemin_contrats = os.path.join(dossier, "contrats.csv")
+    generer_csv_contrats(chemin_contrats, nb_clients)
+    afficher_rapport("Contrats", db.importer_contrats(chemin_contrats, taille_lot=taille_lot), taille_lot)
+
+    shutil.rmtree(dossier, ignore_errors=True)
@@ -0,0 +1,65 @@
+"""
+Banc d'essai du temps d'import des modules de l'application.
+
+Chaque module est importé dans un interpréteur neuf lancé avec
+python -X importtime, après streamlit (déjà chargé par le serveur) : le temps
+mesuré est donc celui que paie un nouveau processus au premier affichage de
+la page. Les bibliothèques lourdes chargées au passage sont listées.
+
+Usage : python bench_imports.py [module ...]
+"""
+import os
+import re
+import subprocess
+import sys
+
+MODULES = ['db', 'utils', 'login', 'page.Accueil', 'page.Clients',
+           'page.Contrats', 'page.Facturation', 'page.Reporting']
+BIBLIOTHEQUES_LOURDES = ('pandas', 'numpy', 'plotly', 'reportlab', 'pyarrow', 'PIL')
+REPETITIONS = 3
+
+LIGNE_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def mesurer(module: str) -> tuple:
+    """
+    Importe module après streamlit dans un processus neuf.
+    Retourne (durée en ms, bibliothèques lourdes chargées par le module).
+    """
+    resultat = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import streamlit; import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True
+    )
+    if resultat.returncode != 0:
+        raise RuntimeError(resultat.stderr.strip().splitlines()[-1])
+
+    # Les entrées qui suivent celle de streamlit sont dues au module ;
+    # seules celles de premier niveau comptent dans le total
+    total_us, lourdes, apres_streamlit = 0, [], False
+    for ligne in resultat.stderr.splitlines():
+        correspondance = LIGNE_IMPORTTIME.match(ligne)
+        if not correspondance:
+            continue
+        cumul, indentation, nom = int(correspondance.group(2)), correspondance.group(3), correspondance.group(4)
+        if nom == 'streamlit' and not indentation:
+            apres_streamlit = True
+            continue
+        if not apres_streamlit:
+            continue
+        if not indentation:
+            total_us += cumul
+        racine = nom.split('.')[0]
+        if racine in BIBLIOTHEQUES_LOURDES and racine not in lourdes:
+            lourdes.append(racine)
+    return total_us / 1000, lourdes
+
+
+if __name__ == "__main__":
+    modules = sys.argv[1:] or MODULES
+    print(f"{'Module':<20} {'Import (ms)':>12}   Bibliothèques lourdes chargées")
+    for module in modules:
+        mesures = [mesurer(module) for _ in range(REPETITIONS)]
+        duree = min(m[0] for m in mesures)
+        lourdes = mesures[-1][1]
+        print(f"{module:<20} {duree:>12.1f}   {', '.join(lourdes) or '-'}")
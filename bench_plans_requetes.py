@@ -0,0 +1,59 @@
+"""
+Test de non-régression des plans d'exécution des requêtes critiques.
+
+Sur une copie de la base mise au schéma courant, EXPLAIN QUERY PLAN est
+exécuté sur chaque requête de db.REQUETES_CRITIQUES (les constantes SQL
+utilisées par l'application). Le script échoue (code de sortie 1) si une
+requête n'utilise pas son index ou parcourt une table en entier. La base
+réelle n'est jamais modifiée.
+
+Usage : python bench_plans_requetes.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import db
+
+
+def preparer_base() -> str:
+    """Copie la base courante dans un fichier temporaire et la met au schéma courant"""
+    chemin = os.path.join(tempfile.mkdtemp(), "plans.db")
+    shutil.copy(db.DB_PATH, chemin)
+    db.DB_PATH = chemin
+    db.init_db()
+    return chemin
+
+
+if __name__ == "__main__":
+    chemin = preparer_base()
+    print(f"Base de test : {chemin}")
+
+    conn = db.get_db_connection()
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+    resultats = db.verifier_plans_requetes()
+    for resultat in resultats:
+        etat = "OK " if resultat['ok'] else "KO "
+        print(f"{etat} {resultat['requete']}: {resultat['plan']}")
+
+    erreurs = []
+    if version < db.VERSION_SCHEMA:
+        erreurs.append(f"schéma en version {version} au lieu de {db.VERSION_SCHEMA}")
+    if len(resultats) < len(db.REQUETES_CRITIQUES):
+        erreurs.append(f"{len(resultats)} plans contrôlés sur {len(db.REQUETES_CRITIQUES)}")
+    echecs = [resultat['requete'] for resultat in resultats if not resultat['ok']]
+    if echecs:
+        erreurs.append(f"plans sans index ou avec parcours complet : {', '.join(map(str, echecs))}")
+
+    shutil.rmtree(os.path.dirname(chemin), ignore_errors=True)
+    if erreurs:
+        # Code de sortie non nul : le script sert de test de non-régression
+        print("ECHEC : " + " ; ".join(erreurs))
+        sys.exit(1)
+    print(f"{len(resultats)} plans d'exécution conformes")
+    sys.exit(0)
@@ -0,0 +1,133 @@
+"""
+Banc d'essai des calculs ligne à ligne du Reporting.
+
+Compare, sur une copie de la base enrichie de factures fictives, l'ancienne
+approche (listes de dicts + datetime.strptime par ligne) au pipeline pandas
+vectorisé (get_factures_df + opérations sur colonnes).
+
+Usage : python bench_reporting.py [nombre_de_factures]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import db
+
+NB_FACTURES = 100_000
+REPETITIONS = 3
+
+
+def preparer_base(nb_factures: int) -> str:
+    """Copie la base courante dans un fichier temporaire et y ajoute nb_factures factures"""
+    chemin = os.path.join(tempfile.mkdtemp(), "bench.db")
+    shutil.copy(db.DB_PATH, chemin)
+    db.DB_PATH = chemin
+    db.init_db()
+
+    conn = db.get_db_connection()
+    try:
+        client = conn.execute("SELECT id FROM clients_physiques LIMIT 1").fetchone()
+        client_id = client['id'] if client else 1
+        statuts = ['Payée', 'En attente', 'En retard', 'Annulée']
+        debut = date.today() - timedelta(days=730)
+        lignes = []
+        for i in range(nb_factures):
+            date_facture = debut + timedelta(days=i % 730)
+            montant_ht = 500 + (i % 50) * 10
+            lignes.append((
+                f"BENCH-{i:07d}", client_id, 'physique',
+                date_facture.isoformat(), (date_facture + timedelta(days=30)).isoformat(),
+                montant_ht, montant_ht * 0.2, montant_ht * 1.2,
+                statuts[i % len(statuts)], 'Virement'
+            ))
+        conn.execute("BEGIN")
+        conn.executemany("""
+        INSERT INTO factures (numero_facture, client_id, client_type, date_facture, date_echeance,
+                              montant_ht, montant_tva, montant_ttc, statut, mode_reglement)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, lignes)
+        conn.commit()
+    finally:
+        conn.close()
+    return chemin
+
+
+def par_boucles(date_debut: date, date_fin: date) -> tuple:
+    """Ancienne approche : filtres, retards et top-N en Python pur"""
+    factures = db.get_all_factures.__wrapped__()
+
+    factures_periode = []
+    for facture in factures:
+        try:
+            date_facture = datetime.strptime(facture.get('date_facture', '1900-01-01'), '%Y-%m-%d').date()
+            if date_debut <= date_facture <= date_fin:
+                factures_periode.append(facture)
+        except:
+            continue
+
+    factures_retard = []
+    for facture in factures_periode:
+        if facture.get('statut') in ['En attente', 'En retard']:
+            try:
+                date_echeance = datetime.strptime(facture.get('date_echeance', facture.get('date_facture', '1900-01-01')), '%Y-%m-%d').date()
+                jours_retard = (datetime.now().date() - date_echeance).days
+                if jours_retard > 0:
+                    facture_data = dict(facture)
+                    facture_data['jours_retard'] = jours_retard
+                    factures_retard.append(facture_data)
+            except:
+                continue
+
+    top_retards = sorted(factures_retard, key=lambda x: x['jours_retard'], reverse=True)[:10]
+    total_impayes = sum(f['montant_ttc'] for f in factures_retard)
+    return len(factures_periode), len(factures_retard), total_impayes, [f['id'] for f in top_retards]
+
+
+def par_pandas(date_debut: date, date_fin: date) -> tuple:
+    """Nouvelle approche : un chargement read_sql puis des opérations vectorisées"""
+    import pandas as pd
+
+    factures_periode = db.get_factures_df.__wrapped__(date_debut, date_fin)
+    jours_retard = (pd.Timestamp(date.today()) - factures_periode['date_echeance']).dt.days
+    factures_retard = factures_periode.assign(jours_retard=jours_retard)[
+        factures_periode['statut'].isin(['En attente', 'En retard']) & (jours_retard > 0)
+    ]
+    top_retards = factures_retard.sort_values(['jours_retard', 'id'], ascending=[False, True]).head(10)
+    total_impayes = factures_retard['montant_ttc'].sum()
+    return len(factures_periode), len(factures_retard), total_impayes, top_retards['id'].tolist()
+
+
+def chronometrer(fonction, *args) -> tuple:
+    """Meilleur temps sur REPETITIONS exécutions, avec le dernier résultat"""
+    meilleur, resultat = None, None
+    for _ in range(REPETITIONS):
+        debut = time.perf_counter()
+        resultat = fonction(*args)
+        duree = time.perf_counter() - debut
+        meilleur = duree if meilleur is None else min(meilleur, duree)
+    return meilleur, resultat
+
+
+if __name__ == "__main__":
+    nb_factures = int(sys.argv[1]) if len(sys.argv) > 1 else NB_FACTURES
+    chemin = preparer_base(nb_factures)
+    print(f"Base de test : {chemin} (+{nb_factures} factures)")
+
+    date_fin = date.today()
+    date_debut = date_fin - timedelta(days=365)
+
+    duree_boucles, res_boucles = chronometrer(par_boucles, date_debut, date_fin)
+    duree_pandas, res_pandas = chronometrer(par_pandas, date_debut, date_fin)
+
+    print(f"Boucles Python : {duree_boucles * 1000:8.1f} ms  ({res_boucles[0]} factures, {res_boucles[1]} en retard)")
+    print(f"Pandas         : {duree_pandas * 1000:8.1f} ms  ({res_pandas[0]} factures, {res_pandas[1]} en retard)")
+    print(f"Accélération   : x{duree_boucles / duree_pandas:.1f}")
+
+    identiques = (res_boucles[:2] == res_pandas[:2]
+                  and abs(res_boucles[2] - res_pandas[2]) < 0.01)
+    print("Résultats identiques" if identiques else "ATTENTION : résultats différents")
+
+    shutil.rmtree(os.path.dirname(chemin), ignore_errors=True)
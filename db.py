@@ -1,17 +1,1138 @@
 import sqlite3
 import os
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from datetime import datetime, date, timedelta
 from typing import Optional, List, Dict
 
 # Configuration de la base de données
 DB_PATH = os.path.join(os.path.dirname(__file__), "data", "domiciliation.db")
 
+# Nombre maximum de connexions inactives conservées par le pool (tous threads confondus)
+DB_POOL_SIZE = 8
+
+# Profil PRAGMA appliqué à chaque ouverture de connexion.
+# WAL permet aux lecteurs (tableaux de bord) de continuer pendant qu'une
+# facture ou un contrat est en cours d'écriture ; busy_timeout est appliqué
+# en premier pour que le passage en WAL attende un verrou éventuel.
+DB_PRAGMAS = {
+    'busy_timeout': 5000,          # ms d'attente sur un verrou avant "database is locked"
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',       # sûr en WAL, évite un fsync par transaction
+    'cache_size': -16000,          # valeur négative = taille en Kio (~16 Mo)
+    'mmap_size': 64 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Valeurs numériques renvoyées par SQLite pour les PRAGMA énumérés
+_PRAGMA_ENUMS = {
+    'synchronous': {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3},
+    'temp_store': {'DEFAULT': 0, 'FILE': 1, 'MEMORY': 2},
+}
+
+
+def appliquer_pragmas(conn: sqlite3.Connection, pragmas: Optional[Dict] = None):
+    """Applique le profil PRAGMA (DB_PRAGMAS par défaut) à une connexion"""
+    for nom, valeur in (pragmas if pragmas is not None else DB_PRAGMAS).items():
+        try:
+            conn.execute(f"PRAGMA {nom} = {valeur}").fetchall()
+        except sqlite3.Error as e:
+            print(f"PRAGMA {nom} = {valeur} ignoré: {e}")
+
+
+def verifier_pragmas() -> Dict:
+    """
+    Vérifie les réglages effectifs de la base par rapport à DB_PRAGMAS.
+    Retourne {pragma: {'attendu': ..., 'effectif': ..., 'ok': bool}}
+    """
+    rapport = {}
+    conn = get_db_connection()
+    try:
+        for nom, attendu in DB_PRAGMAS.items():
+            ligne = conn.execute(f"PRAGMA {nom}").fetchone()
+            effectif = ligne[0] if ligne else None
+            
+            attendu_norm = attendu
+            if nom in _PRAGMA_ENUMS and isinstance(attendu, str):
+                attendu_norm = _PRAGMA_ENUMS[nom].get(attendu.upper(), attendu)
+            elif isinstance(attendu, str):
+                attendu_norm = attendu.lower()
+                effectif = str(effectif).lower()
+            
+            rapport[nom] = {
+                'attendu': attendu,
+                'effectif': effectif,
+                'ok': effectif == attendu_norm
+            }
+        
+        ecarts = [nom for nom, info in rapport.items() if not info['ok']]
+        if ecarts:
+            for nom in ecarts:
+                print(f"ATTENTION: PRAGMA {nom} = {rapport[nom]['effectif']} (attendu: {rapport[nom]['attendu']})")
+        else:
+            print("Profil PRAGMA appliqué: " + ", ".join(
+                f"{nom}={info['effectif']}" for nom, info in rapport.items()
+            ))
+    except Exception as e:
+        print(f"Erreur vérification PRAGMA: {e}")
+    finally:
+        conn.close()
+    return rapport
+
+
+class ConnexionPool:
+    """
+    Pool de connexions SQLite partagé par le processus Streamlit.
+    
+    Les connexions inactives sont rangées par thread : un thread récupère en
+    priorité les connexions qu'il a lui-même ouvertes, ce qui garde le cache
+    de requêtes préparées et le cache de schéma de SQLite chauds d'un rendu
+    à l'autre. Les connexions des threads terminés sont fermées au fil de l'eau.
+    """
+    
+    def __init__(self, db_path: str, taille_max: int = DB_POOL_SIZE):
+        self.db_path = db_path
+        self.taille_max = taille_max
+        self._inactives: Dict[int, List[sqlite3.Connection]] = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    
+    def _ouvrir(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        appliquer_pragmas(conn)
+        return conn
+    
+    @staticmethod
+    def _est_valide(conn: sqlite3.Connection) -> bool:
+        """Vérifie qu'une connexion du pool est toujours utilisable"""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def _nombre_inactives(self) -> int:
+        return sum(len(conns) for conns in self._inactives.values())
+    
+    def _nettoyer_threads_termines(self) -> List[sqlite3.Connection]:
+        """Retire du pool les connexions des threads qui n'existent plus"""
+        threads_actifs = {t.ident for t in threading.enumerate()}
+        a_fermer = []
+        for ident in list(self._inactives):
+            if ident not in threads_actifs:
+                a_fermer.extend(self._inactives.pop(ident))
+        return a_fermer
+    
+    def acquerir(self) -> sqlite3.Connection:
+        """Récupère une connexion saine, en réutilisant celles du thread courant"""
+        ident = threading.get_ident()
+        while True:
+            with self._lock:
+                conns = self._inactives.get(ident)
+                conn = conns.pop() if conns else None
+            if conn is None:
+                return self._ouvrir()
+            if self._est_valide(conn):
+                return conn
+            self._fermer(conn)
+    
+    def liberer(self, conn: sqlite3.Connection):
+        """Rend une connexion au pool (ou la ferme si le pool est plein)"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._fermer(conn)
+            return
+        
+        ident = threading.get_ident()
+        with self._lock:
+            a_fermer = self._nettoyer_threads_termines()
+            if self._nombre_inactives() < self.taille_max:
+                self._inactives.setdefault(ident, []).append(conn)
+            else:
+                a_fermer.append(conn)
+        for conn_a_fermer in a_fermer:
+            self._fermer(conn_a_fermer)
+    
+    @staticmethod
+    def _fermer(conn: sqlite3.Connection):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    
+    @contextmanager
+    def connexion(self):
+        """Context manager : fournit une connexion et la rend au pool en sortie"""
+        conn = self.acquerir()
+        try:
+            yield conn
+        except Exception:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+            raise
+        finally:
+            self.liberer(conn)
+    
+    def fermer_tout(self):
+        """Ferme toutes les connexions inactives du pool"""
+        with self._lock:
+            conns = [c for liste in self._inactives.values() for c in liste]
+            self._inactives.clear()
+        for conn in conns:
+            self._fermer(conn)
+    
+    def statistiques(self) -> Dict:
+        """Retourne l'état du pool (pour le diagnostic)"""
+        with self._lock:
+            return {
+                'db_path': self.db_path,
+                'taille_max': self.taille_max,
+                'connexions_inactives': self._nombre_inactives(),
+                'threads': len(self._inactives)
+            }
+
+
+class ConnexionPoolee:
+    """
+    Connexion empruntée au pool.
+    
+    Se comporte comme une sqlite3.Connection ; close() rend la connexion au
+    pool au lieu de la fermer, ce qui permet aux fonctions existantes
+    (conn = get_db_connection() ... conn.close()) d'en profiter sans changement.
+    """
+    
+    def __init__(self, pool: ConnexionPool):
+        self._pool = pool
+        self._conn = pool.acquerir()
+    
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return getattr(self._conn, name)
+    
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.liberer(conn)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None and self._conn is not None:
+            try:
+                self._conn.rollback()
+            except sqlite3.Error:
+                pass
+        self.close()
+        return False
+    
+    def __del__(self):
+        # Filet de sécurité pour les chemins d'erreur qui oublient close()
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+_pool: Optional[ConnexionPool] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnexionPool:
+    """Retourne le pool du processus (recréé si DB_PATH ou DB_POOL_SIZE changent)"""
+    global _pool
+    pool = _pool
+    if pool is None or pool.db_path != DB_PATH or pool.taille_max != DB_POOL_SIZE:
+        with _pool_lock:
+            if _pool is None or _pool.db_path != DB_PATH or _pool.taille_max != DB_POOL_SIZE:
+                if _pool is not None:
+                    _pool.fermer_tout()
+                _pool = ConnexionPool(DB_PATH, DB_POOL_SIZE)
+            pool = _pool
+    return pool
+
 def get_db_connection():
-    """Établit une connexion à la base de données"""
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Établit une connexion à la base de données (empruntée au pool)"""
+    return ConnexionPoolee(get_pool())
+
+def db_connection():
+    """
+    Context manager recommandé pour accéder à la base :
+    
+        with db_connection() as conn:
+            conn.execute(...)
+    
+    La connexion est annulée (rollback) en cas d'exception puis rendue au pool.
+    """
+    return get_pool().connexion()
+
+
+# Cache des lectures : chaque entrée est indexée par les arguments de l'appel
+# et par la version des tables lues. Les fonctions d'écriture incrémentent la
+# version des tables qu'elles modifient, ce qui rend les entrées concernées
+# inaccessibles sans avoir à les rechercher.
+CACHE_TTL = 300            # secondes
+CACHE_TAILLE_MAX = 128     # entrées conservées par fonction (LRU)
+
+TABLES_DONNEES = ('clients_physiques', 'clients_moraux', 'contrats', 'factures', 'paiements')
+TABLES_CLIENTS = ('clients_physiques', 'clients_moraux')
+
+_versions_tables: Dict[str, int] = {}
+_versions_lock = threading.Lock()
+_caches: Dict[str, OrderedDict] = {}
+
+def _invalider(*tables: str):
+    """Incrémente la version des tables modifiées (toutes si aucune n'est précisée)"""
+    with _versions_lock:
+        for table in tables or TABLES_DONNEES:
+            _versions_tables[table] = _versions_tables.get(table, 0) + 1
+
+class SurveillantModifications:
+    """
+    Détecte les écritures faites par n'importe quelle connexion (autres
+    processus Streamlit, scripts d'administration...).
+    
+    PRAGMA data_version, lu sur une connexion dédiée, ne change que lorsqu'une
+    autre connexion a validé une transaction : le journal_modifications n'est
+    relu que dans ce cas, sinon la vérification ne coûte qu'un PRAGMA.
+    """
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._data_version = None
+        self._generation = 0
+        self.sequences: Dict[str, int] = {}
+    
+    def verifier(self) -> Dict[str, int]:
+        """Retourne le numéro de séquence de chaque table, relu si la base a changé"""
+        with self._lock:
+            try:
+                if self._conn is None:
+                    self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                    self._conn.execute(f"PRAGMA busy_timeout = {DB_PRAGMAS.get('busy_timeout', 5000)}")
+                
+                data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                if data_version != self._data_version:
+                    self._data_version = data_version
+                    try:
+                        self.sequences = dict(self._conn.execute(
+                            "SELECT table_nom, seq FROM journal_modifications"
+                        ).fetchall())
+                    except sqlite3.OperationalError:
+                        # Base sans journal (migration 3 non appliquée) : tout invalider
+                        self._generation += 1
+                        self.sequences = {table: self._generation for table in TABLES_DONNEES}
+            except sqlite3.Error as e:
+                print(f"Erreur surveillance des modifications: {e}")
+                self.fermer()
+            return self.sequences
+    
+    def fermer(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
+            self._data_version = None
+
+
+_surveillant: Optional[SurveillantModifications] = None
+
+def get_surveillant() -> SurveillantModifications:
+    """Retourne le surveillant de la base courante (recréé si DB_PATH change)"""
+    global _surveillant
+    surveillant = _surveillant
+    if surveillant is None or surveillant.db_path != DB_PATH:
+        with _versions_lock:
+            if _surveillant is None or _surveillant.db_path != DB_PATH:
+                if _surveillant is not None:
+                    _surveillant.fermer()
+                _surveillant = SurveillantModifications(DB_PATH)
+            surveillant = _surveillant
+    return surveillant
+
+def versions_tables(tables) -> tuple:
+    """
+    Version courante des tables lues par une fonction en cache : compteur local
+    (écritures de ce processus, visibles immédiatement) et séquence du journal
+    (écritures de tous les processus).
+    """
+    sequences = get_surveillant().verifier()
+    return tuple((_versions_tables.get(table, 0), sequences.get(table, 0)) for table in tables)
+
+def _hashable(valeur):
+    """Forme hashable des arguments (dicts de filtres, listes) pour la clé de cache"""
+    if isinstance(valeur, dict):
+        return tuple(sorted((k, _hashable(v)) for k, v in valeur.items()))
+    if isinstance(valeur, (list, tuple)):
+        return tuple(_hashable(v) for v in valeur)
+    return valeur
+
+def _copier(valeur):
+    """Copie des listes / dicts retournés, pour que l'appelant puisse les modifier sans altérer le cache"""
+    if isinstance(valeur, list):
+        return [_copier(v) for v in valeur]
+    if isinstance(valeur, dict):
+        return {k: _copier(v) for k, v in valeur.items()}
+    if type(valeur).__name__ == 'DataFrame':
+        return valeur.copy()
+    return valeur
+
+def cache_lecture(*tables: str, ttl: int = None, taille_max: int = None):
+    """
+    Décorateur des fonctions de lecture : le résultat est réutilisé tant que
+    les tables lues n'ont pas changé, dans la limite de ttl secondes.
+    """
+    def decorateur(fonction):
+        cache = _caches.setdefault(fonction.__name__, OrderedDict())
+        lock = threading.Lock()
+        
+        @wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            duree = CACHE_TTL if ttl is None else ttl
+            limite = CACHE_TAILLE_MAX if taille_max is None else taille_max
+            # La date du jour fait partie de la clé : plusieurs lectures dépendent d'aujourd'hui
+            cle = (DB_PATH, date.today(), _hashable(args), _hashable(kwargs),
+                   versions_tables(tables))
+            try:
+                hash(cle)
+            except TypeError:
+                return fonction(*args, **kwargs)
+            
+            maintenant = time.monotonic()
+            with lock:
+                entree = cache.get(cle)
+                if entree is not None and maintenant - entree[0] < duree:
+                    cache.move_to_end(cle)
+                    return _copier(entree[1])
+            
+            resultat = fonction(*args, **kwargs)
+            
+            with lock:
+                cache[cle] = (maintenant, resultat)
+                cache.move_to_end(cle)
+                while len(cache) > limite:
+                    cache.popitem(last=False)
+            return _copier(resultat)
+        
+        enveloppe.cache = cache
+        return enveloppe
+    return decorateur
+
+def invalide_cache(*tables: str):
+    """Décorateur des fonctions d'écriture : invalide les tables modifiées après l'appel"""
+    def decorateur(fonction):
+        @wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            try:
+                return fonction(*args, **kwargs)
+            finally:
+                _invalider(*tables)
+        return enveloppe
+    return decorateur
+
+def vider_cache():
+    """Vide tous les caches de lecture"""
+    for cache in _caches.values():
+        cache.clear()
+
+def statistiques_cache() -> Dict:
+    """Nombre d'entrées en cache par fonction (pour le diagnostic)"""
+    return {nom: len(cache) for nom, cache in _caches.items()}
+
+# Index plein texte (FTS5, tokenizer trigram) des clients et des contrats.
+# rowid de clients_fts = id * 2 (+1 pour un client moral) : les deux tables
+# clients pouvant partager un id, la clé reste unique et les triggers
+# suppriment/remplacent une entrée par rowid sans parcourir l'index.
+SQL_RECHERCHE_FTS = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5(
+        client_type UNINDEXED, client_id UNINDEXED, nom, identifiant, telephone,
+        tokenize = 'trigram'
+    )""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS contrats_fts USING fts5(
+        numero_contrat, type_service,
+        tokenize = 'trigram'
+    )""",
+    
+    """CREATE TRIGGER IF NOT EXISTS trg_fts_clients_physiques_ai AFTER INSERT ON clients_physiques BEGIN
+        INSERT INTO clients_fts(rowid, client_type, client_id, nom, identifiant, telephone)
+        VALUES (new.id * 2, 'physique', new.id, new.nom || ' ' || new.prenom, new.cin, new.telephone);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_fts_clients_physiques_au AFTER UPDATE ON clients_physiques BEGIN
+        DELETE FROM clients_fts WHERE rowid = old.id * 2;
+        INSERT INTO clients_fts(rowid, client_type, client_id, nom, identifiant, telephone)
+        VALUES (new.id * 2, 'physique', new.id, new.nom || ' ' || new.prenom, new.cin, new.telephone);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_fts_clients_physiques_ad AFTER DELETE ON clients_physiques BEGIN
+        DELETE FROM clients_fts WHERE rowid = old.id * 2;
+    END""",
+    
+    """CREATE TRIGGER IF NOT EXISTS trg_fts_clients_moraux_ai AFTER INSERT ON clients_moraux BEGIN
+        INSERT INTO clients_fts(rowid, client_type, client_id, nom, identifiant, telephone)
+        VALUES (new.id * 2 + 1, 'moral', new.id, new.raison_sociale, new.ice, new.telephone);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_fts_clients_moraux_au AFTER UPDATE ON clients_moraux BEGIN
+        DELETE FROM clients_fts WHERE rowid = old.id * 2 + 1;
+        INSERT INTO clients_fts(rowid, client_type, client_id, nom, identifiant, telephone)
+        VALUES (new.id * 2 + 1, 'moral', new.id, new.raison_sociale, new.ice, new.telephone);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_fts_clients_moraux_ad AFTER DELETE ON clients_moraux BEGIN
+        DELETE FROM clients_fts WHERE rowid = old.id * 2 + 1;
+    END""",
+    
+    """CREATE TRIGGER IF NOT EXISTS trg_fts_contrats_ai AFTER INSERT ON contrats BEGIN
+        INSERT INTO contrats_fts(rowid, numero_contrat, type_service)
+        VALUES (new.id, new.numero_contrat, new.type_service);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_fts_contrats_au AFTER UPDATE OF id, numero_contrat, type_service ON contrats BEGIN
+        DELETE FROM contrats_fts WHERE rowid = old.id;
+        INSERT INTO contrats_fts(rowid, numero_contrat, type_service)
+        VALUES (new.id, new.numero_contrat, new.type_service);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_fts_contrats_ad AFTER DELETE ON contrats BEGIN
+        DELETE FROM contrats_fts WHERE rowid = old.id;
+    END""",
+]
+
+def creer_recherche_fts(conn):
+    """Crée (ou reconstruit) l'index plein texte et ses triggers, puis le remplit"""
+    for sql in SQL_RECHERCHE_FTS:
+        conn.execute(sql)
+    
+    conn.execute("DELETE FROM clients_fts")
+    conn.execute("DELETE FROM contrats_fts")
+    conn.execute("""
+        INSERT INTO clients_fts(rowid, client_type, client_id, nom, identifiant, telephone)
+        SELECT id * 2, 'physique', id, nom || ' ' || prenom, cin, telephone FROM clients_physiques
+    """)
+    conn.execute("""
+        INSERT INTO clients_fts(rowid, client_type, client_id, nom, identifiant, telephone)
+        SELECT id * 2 + 1, 'moral', id, raison_sociale, ice, telephone FROM clients_moraux
+    """)
+    conn.execute("""
+        INSERT INTO contrats_fts(rowid, numero_contrat, type_service)
+        SELECT id, numero_contrat, type_service FROM contrats
+    """)
+
+def _migration_recherche_fts(conn):
+    """Migration 2 : ignorée (recherche LIKE conservée) si SQLite n'a pas FTS5/trigram"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts_test USING fts5(x, tokenize = 'trigram')")
+        conn.execute("DROP TABLE temp.fts_test")
+    except sqlite3.OperationalError as e:
+        print(f"FTS5 trigram indisponible, recherche par LIKE conservée: {e}")
+        return
+    creer_recherche_fts(conn)
+
+# Journal des modifications : un numéro de séquence par table, incrémenté par
+# trigger à chaque écriture, quel que soit le processus qui écrit. Les caches
+# de chaque processus le relisent quand PRAGMA data_version signale un commit.
+def _sql_journal_modifications() -> List[str]:
+    instructions = [
+        """CREATE TABLE IF NOT EXISTS journal_modifications (
+            table_nom TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL DEFAULT 0
+        )""",
+    ]
+    for table in TABLES_DONNEES:
+        instructions.append(
+            f"INSERT OR IGNORE INTO journal_modifications (table_nom, seq) VALUES ('{table}', 0)"
+        )
+        for evenement, suffixe in (("INSERT", "ai"), ("UPDATE", "au"), ("DELETE", "ad")):
+            instructions.append(f"""CREATE TRIGGER IF NOT EXISTS trg_journal_{table}_{suffixe}
+                AFTER {evenement} ON {table} BEGIN
+                UPDATE journal_modifications SET seq = seq + 1 WHERE table_nom = '{table}';
+            END""")
+    return instructions
+
+def creer_journal_modifications(conn):
+    """Crée la table journal_modifications et ses triggers (idempotent)"""
+    for sql in _sql_journal_modifications():
+        conn.execute(sql)
+
+# Indicateurs du tableau de bord tenus à jour par triggers (ligne unique id = 1).
+# Seuls les indicateurs indépendants de la date du jour y figurent ; les
+# échéances (contrats expirés / expirants) restent des COUNT sur l'index (statut, date_fin).
+SQL_KPI_CALCUL = """
+SELECT
+    (SELECT COUNT(*) FROM clients_physiques) as nb_clients_physiques,
+    (SELECT COUNT(*) FROM clients_moraux) as nb_clients_moraux,
+    COUNT(*) as nb_contrats,
+    COUNT(CASE WHEN statut = 'Actif' THEN 1 END) as nb_contrats_actifs,
+    COUNT(CASE WHEN statut = 'En attente' THEN 1 END) as nb_contrats_attente,
+    COUNT(CASE WHEN statut = 'Suspendu' THEN 1 END) as nb_contrats_suspendus,
+    COUNT(CASE WHEN statut = 'Résilié' THEN 1 END) as nb_contrats_resilies,
+    COALESCE(SUM(CASE WHEN statut = 'Actif' THEN montant_mensuel END), 0) as ca_mensuel_actif,
+    COALESCE(SUM(CASE WHEN statut = 'Actif' THEN montant_mensuel * duree_mois END), 0) as ca_total_actif,
+    COALESCE(SUM(montant_mensuel + COALESCE(frais_ouverture, 0)), 0) as ca_total_potentiel,
+    (SELECT COALESCE(SUM(montant), 0) FROM paiements) as montant_encaisse
+FROM contrats
+"""
+
+COLONNES_KPI = ('nb_clients_physiques', 'nb_clients_moraux', 'nb_contrats', 'nb_contrats_actifs',
+                'nb_contrats_attente', 'nb_contrats_suspendus', 'nb_contrats_resilies',
+                'ca_mensuel_actif', 'ca_total_actif', 'ca_total_potentiel', 'montant_encaisse')
+
+def _delta_contrat(ligne: str, signe: str) -> str:
+    """Expressions SET ajoutant (signe '+') ou retirant (signe '-') la contribution d'un contrat"""
+    return f"""
+        nb_contrats = nb_contrats {signe} 1,
+        nb_contrats_actifs = nb_contrats_actifs {signe} ({ligne}.statut = 'Actif'),
+        nb_contrats_attente = nb_contrats_attente {signe} ({ligne}.statut = 'En attente'),
+        nb_contrats_suspendus = nb_contrats_suspendus {signe} ({ligne}.statut = 'Suspendu'),
+        nb_contrats_resilies = nb_contrats_resilies {signe} ({ligne}.statut = 'Résilié'),
+        ca_mensuel_actif = ca_mensuel_actif {signe}
+            CASE WHEN {ligne}.statut = 'Actif' THEN COALESCE({ligne}.montant_mensuel, 0) ELSE 0 END,
+        ca_total_actif = ca_total_actif {signe}
+            CASE WHEN {ligne}.statut = 'Actif' THEN COALESCE({ligne}.montant_mensuel * {ligne}.duree_mois, 0) ELSE 0 END,
+        ca_total_potentiel = ca_total_potentiel {signe}
+            COALESCE({ligne}.montant_mensuel + COALESCE({ligne}.frais_ouverture, 0), 0)"""
+
+def _sql_kpi_snapshot() -> List[str]:
+    colonnes = ",\n".join(f"    {col} {'REAL' if col.startswith(('ca_', 'montant_')) else 'INTEGER'} NOT NULL DEFAULT 0"
+                           for col in COLONNES_KPI)
+    return [
+        f"""CREATE TABLE IF NOT EXISTS kpi_snapshot (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+{colonnes}
+)""",
+        "INSERT OR IGNORE INTO kpi_snapshot (id) VALUES (1)",
+        
+        """CREATE TRIGGER IF NOT EXISTS trg_kpi_clients_physiques_ai AFTER INSERT ON clients_physiques BEGIN
+            UPDATE kpi_snapshot SET nb_clients_physiques = nb_clients_physiques + 1 WHERE id = 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_kpi_clients_physiques_ad AFTER DELETE ON clients_physiques BEGIN
+            UPDATE kpi_snapshot SET nb_clients_physiques = nb_clients_physiques - 1 WHERE id = 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_kpi_clients_moraux_ai AFTER INSERT ON clients_moraux BEGIN
+            UPDATE kpi_snapshot SET nb_clients_moraux = nb_clients_moraux + 1 WHERE id = 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_kpi_clients_moraux_ad AFTER DELETE ON clients_moraux BEGIN
+            UPDATE kpi_snapshot SET nb_clients_moraux = nb_clients_moraux - 1 WHERE id = 1;
+        END""",
+        
+        f"""CREATE TRIGGER IF NOT EXISTS trg_kpi_contrats_ai AFTER INSERT ON contrats BEGIN
+            UPDATE kpi_snapshot SET {_delta_contrat('new', '+')} WHERE id = 1;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_kpi_contrats_ad AFTER DELETE ON contrats BEGIN
+            UPDATE kpi_snapshot SET {_delta_contrat('old', '-')} WHERE id = 1;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_kpi_contrats_au
+            AFTER UPDATE OF statut, montant_mensuel, duree_mois, frais_ouverture ON contrats BEGIN
+            UPDATE kpi_snapshot SET {_delta_contrat('old', '-')} WHERE id = 1;
+            UPDATE kpi_snapshot SET {_delta_contrat('new', '+')} WHERE id = 1;
+        END""",
+        
+        """CREATE TRIGGER IF NOT EXISTS trg_kpi_paiements_ai AFTER INSERT ON paiements BEGIN
+            UPDATE kpi_snapshot SET montant_encaisse = montant_encaisse + COALESCE(new.montant, 0) WHERE id = 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_kpi_paiements_ad AFTER DELETE ON paiements BEGIN
+            UPDATE kpi_snapshot SET montant_encaisse = montant_encaisse - COALESCE(old.montant, 0) WHERE id = 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_kpi_paiements_au AFTER UPDATE OF montant ON paiements BEGIN
+            UPDATE kpi_snapshot SET montant_encaisse = montant_encaisse
+                - COALESCE(old.montant, 0) + COALESCE(new.montant, 0) WHERE id = 1;
+        END""",
+    ]
+
+def recalculer_kpi(conn):
+    """Recalcule entièrement la ligne kpi_snapshot à partir des tables (création, correction de dérive)"""
+    for sql in _sql_kpi_snapshot():
+        conn.execute(sql)
+    valeurs = conn.execute(SQL_KPI_CALCUL).fetchone()
+    conn.execute(
+        f"UPDATE kpi_snapshot SET {', '.join(f'{col} = ?' for col in COLONNES_KPI)} WHERE id = 1",
+        [valeurs[col] for col in COLONNES_KPI]
+    )
+
+def lire_kpi(conn) -> Dict:
+    """Lit la ligne des indicateurs (calcul direct si la table n'existe pas encore)"""
+    try:
+        ligne = conn.execute("SELECT * FROM kpi_snapshot WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        ligne = None
+    if ligne is None:
+        ligne = conn.execute(SQL_KPI_CALCUL).fetchone()
+    return {col: ligne[col] for col in COLONNES_KPI}
+
+# Chiffre d'affaires mensuel agrégé (mois, statut, type de client, type de facture),
+# tenu à jour par triggers sur factures : les graphiques de CA lisent quelques
+# lignes par mois au lieu de parcourir tout l'historique des factures.
+DIMENSIONS_REVENU = ('mois', 'statut', 'client_type', 'type_facture')
+
+def _cle_revenu(ligne: str) -> str:
+    return (f"substr({ligne}.date_facture, 1, 7), COALESCE({ligne}.statut, ''), "
+            f"COALESCE({ligne}.client_type, ''), COALESCE({ligne}.type_facture, '')")
+
+def _ajout_revenu(ligne: str) -> str:
+    return f"""INSERT INTO monthly_revenue (mois, statut, client_type, type_facture,
+                                             nb, montant_ht, montant_tva, montant_ttc)
+            VALUES ({_cle_revenu(ligne)}, 1, COALESCE({ligne}.montant_ht, 0),
+                    COALESCE({ligne}.montant_tva, 0), COALESCE({ligne}.montant_ttc, 0))
+            ON CONFLICT (mois, statut, client_type, type_facture) DO UPDATE SET
+                nb = nb + 1,
+                montant_ht = montant_ht + excluded.montant_ht,
+                montant_tva = montant_tva + excluded.montant_tva,
+                montant_ttc = montant_ttc + excluded.montant_ttc;"""
+
+def _retrait_revenu(ligne: str) -> str:
+    return f"""UPDATE monthly_revenue SET
+                nb = nb - 1,
+                montant_ht = montant_ht - COALESCE({ligne}.montant_ht, 0),
+                montant_tva = montant_tva - COALESCE({ligne}.montant_tva, 0),
+                montant_ttc = montant_ttc - COALESCE({ligne}.montant_ttc, 0)
+            WHERE (mois, statut, client_type, type_facture) = ({_cle_revenu(ligne)});
+            DELETE FROM monthly_revenue
+            WHERE (mois, statut, client_type, type_facture) = ({_cle_revenu(ligne)}) AND nb <= 0;"""
+
+def _sql_revenu_mensuel() -> List[str]:
+    return [
+        """CREATE TABLE IF NOT EXISTS monthly_revenue (
+            mois TEXT NOT NULL,
+            statut TEXT NOT NULL,
+            client_type TEXT NOT NULL,
+            type_facture TEXT NOT NULL,
+            nb INTEGER NOT NULL DEFAULT 0,
+            montant_ht REAL NOT NULL DEFAULT 0,
+            montant_tva REAL NOT NULL DEFAULT 0,
+            montant_ttc REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (mois, statut, client_type, type_facture)
+        ) WITHOUT ROWID""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_revenu_factures_ai AFTER INSERT ON factures BEGIN
+            {_ajout_revenu('new')}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_revenu_factures_ad AFTER DELETE ON factures BEGIN
+            {_retrait_revenu('old')}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_revenu_factures_au
+            AFTER UPDATE OF date_facture, statut, client_type, type_facture,
+                            montant_ht, montant_tva, montant_ttc ON factures BEGIN
+            {_retrait_revenu('old')}
+            {_ajout_revenu('new')}
+        END""",
+    ]
+
+def recalculer_revenu_mensuel(conn):
+    """Reconstruit monthly_revenue à partir des factures (création, correction de dérive)"""
+    for sql in _sql_revenu_mensuel():
+        conn.execute(sql)
+    conn.execute("DELETE FROM monthly_revenue")
+    conn.execute(f"""
+        INSERT INTO monthly_revenue (mois, statut, client_type, type_facture,
+                                     nb, montant_ht, montant_tva, montant_ttc)
+        SELECT {_cle_revenu('f')}, COUNT(*),
+               COALESCE(SUM(f.montant_ht), 0), COALESCE(SUM(f.montant_tva), 0), COALESCE(SUM(f.montant_ttc), 0)
+        FROM factures f
+        GROUP BY 1, 2, 3, 4
+    """)
+
+# Taille minimale d'un terme pour l'index trigram (en dessous : LIKE)
+FTS_TAILLE_MIN = 3
+
+_fts_disponible_cache: Dict[str, bool] = {}
+
+def fts_disponible(conn=None) -> bool:
+    """Indique si l'index plein texte existe dans la base courante (résultat mis en cache)"""
+    if DB_PATH not in _fts_disponible_cache:
+        proprietaire = conn is None
+        conn = conn or get_db_connection()
+        try:
+            existe = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('clients_fts', 'contrats_fts')"
+            ).fetchone()[0] == 2
+            _fts_disponible_cache[DB_PATH] = existe
+        finally:
+            if proprietaire:
+                conn.close()
+    return _fts_disponible_cache[DB_PATH]
+
+def requete_fts(terme: Optional[str]) -> Optional[str]:
+    """
+    Expression MATCH pour un terme saisi (sous-chaîne exacte, insensible à la casse),
+    ou None si la recherche doit passer par LIKE (terme trop court ou FTS absent).
+    """
+    terme = (terme or "").strip()
+    if len(terme) < FTS_TAILLE_MIN or not fts_disponible():
+        return None
+    return '"' + terme.replace('"', '""') + '"'
+
+# ----- Étapes de migration du schéma -----
+
+def _colonnes(conn, table: str) -> set:
+    """Noms des colonnes d'une table"""
+    return {ligne[1] for ligne in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+
+def _ajouter_colonne(conn, table: str, colonne: str, definition: str):
+    """ALTER TABLE ... ADD COLUMN, seulement si la colonne n'existe pas encore"""
+    if colonne not in _colonnes(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {colonne} {definition}")
+
+def _reconstruire_table(conn, table: str, sql_creation: str, selection: Dict[str, str]):
+    """
+    Recrée une table (nouvelles contraintes) en une seule instruction
+    INSERT ... SELECT, dans la transaction de l'appelant.
+    
+    sql_creation : CREATE TABLE {table} (...) avec le nom {table}
+    selection : colonne de la nouvelle table -> expression SQL sur l'ancienne
+    
+    Les index de la table et tous les triggers sont recréés à l'identique,
+    et le compteur AUTOINCREMENT est conservé.
+    """
+    index = [ligne[0] for ligne in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,)
+    ).fetchall()]
+    triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").fetchall()
+    sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+    
+    # Les triggers d'autres tables peuvent citer celle-ci : on les retire pendant l'échange
+    for nom, _ in triggers:
+        conn.execute(f"DROP TRIGGER IF EXISTS {nom}")
+    
+    temporaire = f"{table}_nouveau"
+    conn.execute(sql_creation.format(table=temporaire))
+    conn.execute(f"""
+        INSERT INTO {temporaire} ({', '.join(selection)})
+        SELECT {', '.join(selection.values())} FROM {table}
+    """)
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {temporaire} RENAME TO {table}")
+    
+    if sequence:
+        conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (sequence[0], table))
+    for sql in index:
+        conn.execute(sql)
+    for _, sql in triggers:
+        conn.execute(sql)
+
+def _migration_revenu_mensuel(conn):
+    """Migration 5 : client_type des factures requis par les agrégats (anciennes bases)"""
+    _ajouter_colonne(conn, 'factures', 'client_type', "TEXT CHECK(client_type IN ('physique', 'moral'))")
+    recalculer_revenu_mensuel(conn)
+
+def _migration_colonnes_clients(conn):
+    """Migration 7 : colonnes ajoutées aux tables clients après leur création"""
+    _ajouter_colonne(conn, 'clients_physiques', 'sexe', "TEXT CHECK(sexe IN ('M', 'F', 'Autre'))")
+    for colonne in ('rc', 'forme_juridique', 'rep_nom', 'rep_prenom', 'rep_cin', 'rep_qualite'):
+        _ajouter_colonne(conn, 'clients_moraux', colonne, "TEXT")
+
+def _migration_client_type(conn):
+    """Migration 8 : client_type renseigné sur les contrats et factures existants"""
+    _ajouter_colonne(conn, 'factures', 'client_type', "TEXT CHECK(client_type IN ('physique', 'moral'))")
+    for table in ('contrats', 'factures'):
+        conn.execute(f"""
+            UPDATE {table} SET client_type = 'physique'
+            WHERE client_type IS NULL AND client_id IN (SELECT id FROM clients_physiques)
+        """)
+        conn.execute(f"""
+            UPDATE {table} SET client_type = 'moral'
+            WHERE client_type IS NULL AND client_id IN (SELECT id FROM clients_moraux)
+        """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_factures_client_composite ON factures(client_id, client_type)")
+
+STATUTS_FACTURE = ('En attente', 'Payée', 'Annulée', 'En retard', 'Partiellement payée', 'Suspendue', 'Résiliée')
+
+def _anomalies_contraintes(conn) -> Dict[str, int]:
+    """Lignes qui violeraient les contraintes définitives (sexe M/F, statuts de facture)"""
+    statuts = ", ".join(f"'{statut}'" for statut in STATUTS_FACTURE)
+    return {
+        'sexe': conn.execute(
+            "SELECT COUNT(*) FROM clients_physiques WHERE sexe IS NOT NULL AND sexe NOT IN ('M', 'F')"
+        ).fetchone()[0],
+        'statut': conn.execute(
+            f"SELECT COUNT(*) FROM factures WHERE statut IS NOT NULL AND statut NOT IN ({statuts})"
+        ).fetchone()[0],
+    }
+
+def _migration_contraintes_definitives(conn, corriger: bool = False):
+    """
+    Migration 9 : contraintes CHECK définitives (sexe M/F, statuts de facture).
+    
+    Les données ne sont jamais modifiées sans demande : si des lignes violent
+    les nouvelles contraintes, l'étape échoue (ValueError avec le décompte),
+    sa transaction est annulée et elle reste en attente. Avec corriger=True
+    (migrer_contraintes_definitives, à la main), les sexes hors M/F
+    deviennent 'M' et les statuts inconnus 'En attente'. Les sexes non
+    renseignés restent NULL.
+    """
+    anomalies = _anomalies_contraintes(conn)
+    if any(anomalies.values()) and not corriger:
+        raise ValueError(
+            f"{anomalies['sexe']} sexe(s) hors M/F, {anomalies['statut']} statut(s) de facture inconnu(s) : "
+            "corriger les données ou lancer migrer_contraintes_definitives(corriger=True)"
+        )
+    
+    _reconstruire_table(conn, 'clients_physiques', """
+    CREATE TABLE {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nom TEXT NOT NULL,
+        prenom TEXT NOT NULL,
+        sexe TEXT CHECK(sexe IN ('M', 'F')),
+        cin TEXT UNIQUE NOT NULL,
+        telephone TEXT NOT NULL,
+        email TEXT,
+        adresse TEXT,
+        date_naissance TEXT,
+        date_creation TEXT DEFAULT CURRENT_TIMESTAMP
+    )""", {
+        'id': 'id', 'nom': 'nom', 'prenom': 'prenom',
+        'sexe': "CASE WHEN sexe IS NULL OR sexe IN ('M', 'F') THEN sexe ELSE 'M' END",
+        'cin': 'cin', 'telephone': 'telephone', 'email': 'email', 'adresse': 'adresse',
+        'date_naissance': 'date_naissance', 'date_creation': 'date_creation',
+    })
+    
+    statuts = ", ".join(f"'{statut}'" for statut in STATUTS_FACTURE)
+    _reconstruire_table(conn, 'factures', f"""
+    CREATE TABLE {{table}} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        numero_facture TEXT UNIQUE NOT NULL,
+        contrat_id INTEGER,
+        client_id INTEGER NOT NULL,
+        client_type TEXT CHECK(client_type IN ('physique', 'moral')),
+        type_facture TEXT DEFAULT 'Domiciliation',
+        date_facture TEXT NOT NULL,
+        date_echeance TEXT,
+        periode_debut TEXT,
+        periode_fin TEXT,
+        montant_ht REAL NOT NULL,
+        taux_tva REAL DEFAULT 20.0,
+        montant_tva REAL,
+        montant_ttc REAL NOT NULL,
+        description TEXT,
+        mode_reglement TEXT DEFAULT 'Virement',
+        statut TEXT DEFAULT 'En attente' CHECK(statut IN ({statuts})),
+        date_creation TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (contrat_id) REFERENCES contrats(id) ON DELETE SET NULL
+    )""", {
+        **{colonne: colonne for colonne in (
+            'id', 'numero_facture', 'contrat_id', 'client_id', 'client_type', 'type_facture',
+            'date_facture', 'date_echeance', 'periode_debut', 'periode_fin',
+            'montant_ht', 'taux_tva', 'montant_tva', 'montant_ttc',
+            'description', 'mode_reglement', 'date_creation')},
+        'statut': f"CASE WHEN statut IS NULL OR statut IN ({statuts}) THEN statut ELSE 'En attente' END",
+    })
+    
+    # Les triggers étaient retirés pendant la copie et des valeurs ont pu changer :
+    # agrégats recalculés, caches des autres processus invalidés
+    recalculer_kpi(conn)
+    recalculer_revenu_mensuel(conn)
+    conn.execute("""
+        UPDATE journal_modifications SET seq = seq + 1
+        WHERE table_nom IN ('clients_physiques', 'factures')
+    """)
+
+# Séquence partagée des identifiants clients : physiques et moraux partagent
+# le même espace d'ids (les contrats et factures ne portent que client_id).
+# La valeur est le dernier id attribué ; elle est incrémentée dans la
+# transaction d'écriture de l'insertion (voir reserver_ids_clients). Les
+# triggers la maintiennent au-dessus des ids insérés par un autre chemin.
+SEQUENCE_CLIENTS = 'clients'
+
+def _migration_sequence_clients(conn):
+    """Migration 10 : table sequences, initialisée avec le plus grand id client"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sequences (
+            nom TEXT PRIMARY KEY,
+            valeur INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        INSERT INTO sequences (nom, valeur)
+        SELECT ?, MAX(
+            COALESCE((SELECT MAX(id) FROM clients_physiques), 0),
+            COALESCE((SELECT MAX(id) FROM clients_moraux), 0)
+        )
+        WHERE true
+        ON CONFLICT(nom) DO UPDATE SET valeur = MAX(valeur, excluded.valeur)
+    """, (SEQUENCE_CLIENTS,))
+    for table in TABLES_CLIENTS:
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_sequence_{table}_ai
+            AFTER INSERT ON {table} BEGIN
+            UPDATE sequences SET valeur = NEW.id
+            WHERE nom = '{SEQUENCE_CLIENTS}' AND valeur < NEW.id;
+        END""")
+
+# Dernière exécution des traitements périodiques (passage des factures en
+# retard...) : un traitement quotidien n'est relancé que si sa dernière
+# exécution date d'avant aujourd'hui, quel que soit le processus qui l'a faite.
+SQL_TACHES = """
+CREATE TABLE IF NOT EXISTS taches (
+    nom TEXT PRIMARY KEY,
+    derniere_execution TEXT NOT NULL,
+    duree_ms REAL,
+    lignes_modifiees INTEGER
+)
+"""
+
+# Migrations versionnées : (version, description, instructions SQL ou fonction(conn)).
+# La version atteinte est stockée dans PRAGMA user_version ; chaque migration
+# n'est appliquée qu'une fois, dans sa propre transaction. Une nouvelle
+# évolution du schéma s'ajoute toujours en fin de liste, avec le numéro suivant.
+MIGRATIONS = [
+    (1, "Index des requêtes contrats / factures / paiements", [
+        "CREATE INDEX IF NOT EXISTS idx_contrats_statut_date_fin ON contrats(statut, date_fin)",
+        "CREATE INDEX IF NOT EXISTS idx_contrats_client_composite ON contrats(client_id, client_type)",
+        "CREATE INDEX IF NOT EXISTS idx_contrats_date_creation ON contrats(date_creation)",
+        "CREATE INDEX IF NOT EXISTS idx_factures_date_facture ON factures(date_facture)",
+        "CREATE INDEX IF NOT EXISTS idx_factures_statut_echeance ON factures(statut, date_echeance)",
+        "CREATE INDEX IF NOT EXISTS idx_factures_contrat ON factures(contrat_id)",
+        "CREATE INDEX IF NOT EXISTS idx_paiements_contrat ON paiements(contrat_id)",
+    ]),
+    (2, "Index plein texte FTS5 (trigram) des clients et contrats", _migration_recherche_fts),
+    (3, "Journal des modifications par table (invalidation des caches inter-processus)",
+     creer_journal_modifications),
+    (4, "Table kpi_snapshot des indicateurs du tableau de bord", recalculer_kpi),
+    (5, "Table monthly_revenue du chiffre d'affaires mensuel", _migration_revenu_mensuel),
+    (6, "Index des dates de création des clients (rapports par période)", [
+        "CREATE INDEX IF NOT EXISTS idx_clients_physiques_date_creation ON clients_physiques(date_creation)",
+        "CREATE INDEX IF NOT EXISTS idx_clients_moraux_date_creation ON clients_moraux(date_creation)",
+    ]),
+    (7, "Colonnes complémentaires des clients (sexe, rc, forme juridique, représentant)",
+     _migration_colonnes_clients),
+    (8, "client_type des contrats et factures existants", _migration_client_type),
+    (9, "Contraintes CHECK définitives (sexe M/F, statuts de facture)", _migration_contraintes_definitives),
+    (10, "Séquence partagée des identifiants clients", _migration_sequence_clients),
+    (11, "Table taches des traitements périodiques", [SQL_TACHES]),
+    (12, "Index de tri des listes paginées (dates NULL comprises)", [
+        "CREATE INDEX IF NOT EXISTS idx_contrats_tri_creation ON contrats(COALESCE(date_creation, ''))",
+        "CREATE INDEX IF NOT EXISTS idx_factures_tri_date ON factures(COALESCE(date_facture, ''))",
+    ]),
+]
+
+# Version du schéma attendue par le code (dernière migration connue)
+VERSION_SCHEMA = MIGRATIONS[-1][0]
+
+SQL_SCHEMA_VERSION = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    date_application TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+def _executer_etape(conn, instructions):
+    if callable(instructions):
+        instructions(conn)
+    else:
+        for sql in instructions:
+            conn.execute(sql)
+
+def _enregistrer_migration(conn, numero: int, description: str):
+    """Historise une étape appliquée (schema_version) et avance PRAGMA user_version"""
+    conn.execute(
+        "INSERT OR REPLACE INTO schema_version (version, description) VALUES (?, ?)",
+        (numero, description)
+    )
+    conn.execute(f"PRAGMA user_version = {int(numero)}")
+
+def executer_migrations(conn, simulation: bool = False) -> List[Dict]:
+    """
+    Exécute les migrations en attente et retourne une ligne par étape :
+    {'version', 'description', 'duree_ms', 'ok', 'erreur'}.
+    
+    Normalement chaque étape est validée dans sa propre transaction et
+    historisée dans schema_version ; la première erreur arrête la suite.
+    En simulation, toutes les étapes sont chronométrées dans une transaction
+    unique, annulée à la fin : la base n'est pas modifiée.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    rapport = []
+    if version >= VERSION_SCHEMA:
+        return rapport
+    
+    if simulation:
+        conn.execute("BEGIN")
+    else:
+        conn.execute(SQL_SCHEMA_VERSION)
+        conn.commit()
+    
+    try:
+        for numero, description, instructions in MIGRATIONS:
+            if numero <= version:
+                continue
+            etape = {'version': numero, 'description': description, 'duree_ms': 0.0, 'ok': True, 'erreur': None}
+            rapport.append(etape)
+            debut = time.perf_counter()
+            try:
+                if simulation:
+                    _executer_etape(conn, instructions)
+                else:
+                    conn.execute("BEGIN")
+                    _executer_etape(conn, instructions)
+                    _enregistrer_migration(conn, numero, description)
+                    conn.commit()
+                    _fts_disponible_cache.pop(DB_PATH, None)
+                    _invalider()
+                    print(f"Migration {numero} appliquée: {description}")
+            except Exception as e:
+                etape['ok'], etape['erreur'] = False, str(e)
+                if not simulation:
+                    conn.rollback()
+                    print(f"Erreur migration {numero} ({description}): {e}")
+                break
+            finally:
+                etape['duree_ms'] = (time.perf_counter() - debut) * 1000
+    finally:
+        if simulation:
+            conn.rollback()
+    
+    return rapport
+
+def appliquer_migrations(conn) -> int:
+    """Applique les migrations en attente et retourne la version finale du schéma"""
+    executer_migrations(conn)
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def simuler_migrations() -> List[Dict]:
+    """
+    Rapport de durée des migrations en attente sur la base courante, sans la
+    modifier (voir executer_migrations).
+    """
+    conn = get_db_connection()
+    try:
+        return executer_migrations(conn, simulation=True)
+    finally:
+        conn.close()
+
+@invalide_cache()
+def migrer_contraintes_definitives(corriger: bool = False) -> bool:
+    """
+    Reconstruit à la main clients_physiques et factures avec leurs
+    contraintes CHECK définitives (même traitement que la migration 9).
+    
+    Sans corriger, les lignes invalides sont seulement signalées et la
+    migration échoue ; corriger=True remplace les sexes hors M/F par 'M' et
+    les statuts inconnus par 'En attente'. Si la migration 9 était bloquée
+    par ces lignes, elle est enregistrée comme appliquée : les migrations
+    suivantes passeront au prochain démarrage.
+    """
+    conn = get_db_connection()
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        conn.execute("BEGIN IMMEDIATE")
+        _migration_contraintes_definitives(conn, corriger)
+        numero, description, _ = next(m for m in MIGRATIONS if m[2] is _migration_contraintes_definitives)
+        if version == numero - 1:
+            _enregistrer_migration(conn, numero, description)
+        conn.commit()
+        print("Migration des contraintes terminée")
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"Erreur lors de la migration des contraintes: {e}")
+        return False
+    finally:
+        conn.close()
 
 def init_db():
     """Initialise la structure de la base de données"""
@@ -103,6 +1224,7 @@ def init_db():
             numero_facture TEXT UNIQUE NOT NULL,
             contrat_id INTEGER,
             client_id INTEGER NOT NULL,
+            client_type TEXT CHECK(client_type IN ('physique', 'moral')),
             type_facture TEXT DEFAULT 'Domiciliation',
             date_facture TEXT NOT NULL,
             date_echeance TEXT,
@@ -132,7 +1254,8 @@ def init_db():
         ])
         
         conn.commit()
-        update_db_structure()
+        appliquer_migrations(conn)
+        verifier_pragmas()
 
         
     except Exception as e:
@@ -141,10 +1264,56 @@ def init_db():
     finally:
         conn.close()
 
+# Bases déjà initialisées par ce processus (clé : chemin du fichier)
+_bases_initialisees = set()
+_verrou_initialisation = threading.Lock()
+
+def initialiser_base() -> int:
+    """
+    Initialise la base une seule fois par processus.
+    
+    Streamlit ré-exécute app.py à chaque interaction : après le premier appel,
+    cette fonction se limite à un test d'appartenance. Le premier appel lit
+    PRAGMA user_version et ne lance init_db() (création des tables et
+    migrations) que si le schéma n'est pas à VERSION_SCHEMA.
+    Retourne la version du schéma.
+    """
+    if DB_PATH in _bases_initialisees:
+        return VERSION_SCHEMA
+    
+    with _verrou_initialisation:
+        if DB_PATH in _bases_initialisees:
+            return VERSION_SCHEMA
+        
+        conn = get_db_connection()
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            conn.close()
+        
+        if version < VERSION_SCHEMA:
+            init_db()
+            conn = get_db_connection()
+            try:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+            finally:
+                conn.close()
+        else:
+            verifier_pragmas()
+        
+        # En cas d'échec d'une migration, on retentera au prochain appel
+        if version >= VERSION_SCHEMA:
+            _bases_initialisees.add(DB_PATH)
+        return version
+
 # CORRECTION 1: Fonction pour réorganiser les IDs après suppression
 
 
+# Nombre de contrats d'un client (index (client_id, client_type))
+SQL_CONTRATS_PAR_CLIENT = "SELECT COUNT(*) as count FROM contrats WHERE client_id = ? AND client_type = ?"
+
 # CORRECTION 2: Fonction de suppression complètement corrigée
+@invalide_cache('clients_physiques', 'clients_moraux', 'contrats', 'factures')
 def supprimer_client_definitif(client_id: int) -> bool:
     """Supprime définitivement un client après vérifications approfondies"""
     conn = get_db_connection()
@@ -170,10 +1339,7 @@ def supprimer_client_definitif(client_id: int) -> bool:
         print(f"Vérification des contrats pour client {client_id} de type {client_type}")
         
         # Compter tous les contrats (actifs, inactifs, etc.)
-        contrats_count = conn.execute(
-            "SELECT COUNT(*) as count FROM contrats WHERE client_id = ? AND client_type = ?",
-            (client_id, client_type)
-        ).fetchone()
+        contrats_count = conn.execute(SQL_CONTRATS_PAR_CLIENT, (client_id, client_type)).fetchone()
         
         print(f"Nombre total de contrats trouvés: {contrats_count['count']}")
         
@@ -237,6 +1403,7 @@ def supprimer_client_definitif(client_id: int) -> bool:
 
 
 # CORRECTION 3: Fonction de modification complètement reécrite
+@invalide_cache(*TABLES_CLIENTS)
 def modifier_client_complet(client_id: int, modifications: Dict, client_type: str) -> bool:
     """
     Modifie un client avec validation complète et gestion d'erreurs AMÉLIORÉE
@@ -438,6 +1605,7 @@ def modifier_client_complet(client_id: int, modifications: Dict, client_type: st
             print(" Connexion fermée")
 
 
+@invalide_cache(*TABLES_CLIENTS)
 def modifier_client_avec_historique(client_id: int, modifications: Dict, client_type: str, utilisateur: str = "Système") -> bool:
     """
     Version avancée de modification avec historique des changements
@@ -672,97 +1840,449 @@ def modifier_client(client_id: int, client_data: Dict, client_type: str) -> bool
 def modifier_client_fixed(client_id: int, client_data: dict, client_type: str) -> bool:
     """Version de compatibilité - utilise la nouvelle fonction"""
     return modifier_client_complet(client_id, client_data, client_type)
-def get_next_client_id():
-    """Générer un ID unique pour tous les clients (physiques et moraux)"""
-    try:
-        conn = get_db_connection()
-        
-        # Récupérer l'ID max des clients physiques
-        max_physique = conn.execute(
-            "SELECT MAX(id) as max_id FROM clients_physiques"
-        ).fetchone()
-        max_id_physique = max_physique['max_id'] if max_physique['max_id'] else 0
-        
-        # Récupérer l'ID max des clients moraux
-        max_moral = conn.execute(
-            "SELECT MAX(id) as max_id FROM clients_moraux"
-        ).fetchone()
-        max_id_moral = max_moral['max_id'] if max_moral['max_id'] else 0
-        
-        # Retourner le maximum + 1
-        next_id = max(max_id_physique, max_id_moral) + 1
-        conn.close()
-        return next_id
-        
-    except Exception as e:
-        print(f"Erreur génération ID: {e}")
-        return None
+def reserver_ids_clients(conn, nombre: int = 1) -> range:
+    """
+    Réserve nombre identifiants clients consécutifs dans la séquence partagée.
+    
+    À appeler dans la transaction d'écriture de l'insertion (ouverte par
+    BEGIN IMMEDIATE) : le verrou d'écriture sérialise les allocations et un
+    rollback rend les ids réservés. Retourne le range des ids attribués.
+    """
+    if nombre < 1:
+        raise ValueError(f"Nombre d'identifiants invalide: {nombre}")
+    lignes = conn.execute(
+        "UPDATE sequences SET valeur = valeur + ? WHERE nom = ? RETURNING valeur",
+        (nombre, SEQUENCE_CLIENTS)
+    ).fetchall()
+    if not lignes:
+        raise sqlite3.OperationalError(f"Séquence '{SEQUENCE_CLIENTS}' absente (migration 10 non appliquée)")
+    dernier = lignes[0][0]
+    return range(dernier - nombre + 1, dernier + 1)
 
 # Fonctions CRUD Clients (inchangées mais améliorées)
+@invalide_cache(*TABLES_CLIENTS)
 def ajouter_client(client_data, type_client):
     """Ajouter un client avec ID unique"""
     try:
-        conn = get_db_connection()
-        
-        # Générer un ID unique
-        new_id = get_next_client_id()
-        if not new_id:
-            return False
+        with db_connection() as conn:
             
-        if type_client == "physique":
-            query = """
-                INSERT INTO clients_physiques 
-                (id, nom, prenom, cin, telephone, sexe, email, date_naissance, adresse, date_creation)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            values = (
-                new_id,
-                client_data.get('nom'),
-                client_data.get('prenom'),
-                client_data.get('cin'),
-                client_data.get('telephone'),
-                client_data.get('sexe', ''),
-                client_data.get('email', ''),
-                client_data.get('date_naissance', ''),
-                client_data.get('adresse', ''),
-                datetime.now().isoformat()
-            )
-        else:  # moral
-            query = """
-                INSERT INTO clients_moraux 
-                (id, raison_sociale, ice, rc, forme_juridique, telephone, email, adresse,
-                 rep_nom, rep_prenom, rep_cin, rep_qualite, date_creation)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            values = (
-                new_id,
-                client_data.get('raison_sociale'),
-                client_data.get('ice'),
-                client_data.get('rc', ''),
-                client_data.get('forme_juridique', ''),
-                client_data.get('telephone'),
-                client_data.get('email', ''),
-                client_data.get('adresse', ''),
-                client_data.get('rep_nom', ''),
-                client_data.get('rep_prenom', ''),
-                client_data.get('rep_cin', ''),
-                client_data.get('rep_qualite', ''),
-                datetime.now().isoformat()
-            )
-        
-        conn.execute(query, values)
-        conn.commit()
-        conn.close()
-        return True
+            # ID attribué dans la même transaction que l'insertion
+            conn.execute("BEGIN IMMEDIATE")
+            new_id = reserver_ids_clients(conn)[0]
+            
+            if type_client == "physique":
+                query = """
+                    INSERT INTO clients_physiques 
+                    (id, nom, prenom, cin, telephone, sexe, email, date_naissance, adresse, date_creation)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """
+                values = (
+                    new_id,
+                    client_data.get('nom'),
+                    client_data.get('prenom'),
+                    client_data.get('cin'),
+                    client_data.get('telephone'),
+                    client_data.get('sexe') or None,
+                    client_data.get('email', ''),
+                    client_data.get('date_naissance', ''),
+                    client_data.get('adresse', ''),
+                    datetime.now().isoformat()
+                )
+            else:  # moral
+                query = """
+                    INSERT INTO clients_moraux 
+                    (id, raison_sociale, ice, rc, forme_juridique, telephone, email, adresse,
+                     rep_nom, rep_prenom, rep_cin, rep_qualite, date_creation)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """
+                values = (
+                    new_id,
+                    client_data.get('raison_sociale'),
+                    client_data.get('ice'),
+                    client_data.get('rc', ''),
+                    client_data.get('forme_juridique', ''),
+                    client_data.get('telephone'),
+                    client_data.get('email', ''),
+                    client_data.get('adresse', ''),
+                    client_data.get('rep_nom', ''),
+                    client_data.get('rep_prenom', ''),
+                    client_data.get('rep_cin', ''),
+                    client_data.get('rep_qualite', ''),
+                    datetime.now().isoformat()
+                )
+        
+            conn.execute(query, values)
+            conn.commit()
+            return True
         
     except Exception as e:
         print(f"Erreur ajout client: {e}")
         return False
 
+# Import en masse des clients (CSV ou Excel).
+# Le fichier est lu ligne à ligne ; les lignes sont normalisées et validées
+# avec les mêmes règles que les formulaires, puis insérées par lots de
+# TAILLE_LOT_IMPORT dans une transaction par lot, avec un bloc d'ids réservé
+# dans la séquence partagée. Les lignes refusées sont rapportées sans
+# interrompre l'import.
+TAILLE_LOT_IMPORT = 5000
+
+COLONNES_IMPORT_CLIENTS = {
+    'physique': ('nom', 'prenom', 'cin', 'telephone', 'sexe', 'email', 'date_naissance', 'adresse'),
+    'moral': ('raison_sociale', 'ice', 'rc', 'forme_juridique', 'telephone', 'email', 'adresse',
+              'rep_nom', 'rep_prenom', 'rep_cin', 'rep_qualite'),
+}
+COLONNES_OBLIGATOIRES_IMPORT = {
+    'physique': ('nom', 'prenom', 'cin', 'telephone'),
+    'moral': ('raison_sociale', 'ice', 'telephone'),
+}
+# En-têtes usuels ramenés au nom de colonne (après suppression des accents)
+ALIAS_COLONNES_IMPORT = {
+    'tel': 'telephone', 'telephone_portable': 'telephone', 'gsm': 'telephone',
+    'mail': 'email', 'e_mail': 'email', 'courriel': 'email',
+    'date_de_naissance': 'date_naissance', 'raison': 'raison_sociale', 'societe': 'raison_sociale',
+    'forme': 'forme_juridique', 'representant_nom': 'rep_nom', 'representant_prenom': 'rep_prenom',
+    'representant_cin': 'rep_cin', 'representant_qualite': 'rep_qualite', 'qualite': 'rep_qualite',
+    'numero': 'numero_contrat', 'n_contrat': 'numero_contrat', 'contrat': 'numero_contrat',
+    'client': 'identifiant_client', 'cin_ice': 'identifiant_client', 'cin_ou_ice': 'identifiant_client',
+    'service': 'type_service', 'debut': 'date_debut', 'fin': 'date_fin', 'duree': 'duree_mois',
+    'montant': 'montant_mensuel', 'loyer_mensuel': 'montant_mensuel', 'frais': 'frais_ouverture',
+    'depot': 'depot_garantie', 'services': 'services_inclus',
+}
+SEXES_IMPORT = {'M': 'M', 'H': 'M', 'HOMME': 'M', 'MASCULIN': 'M', 'F': 'F', 'FEMME': 'F', 'FEMININ': 'F'}
+# Dates acceptées : AAAA-MM-JJ, JJ/MM/AAAA ou JJ-MM-AAAA
+FORMAT_DATE_IMPORT = r'^(?:(\d{4})-(\d{1,2})-(\d{1,2})|(\d{1,2})[/-](\d{1,2})[/-](\d{4}))'
+
+def _cle_import(texte) -> str:
+    """Nom de colonne ou valeur énumérée sans accents, en minuscules, séparée par des _"""
+    import re
+    import unicodedata
+    texte = unicodedata.normalize('NFKD', str(texte)).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', '_', texte.lower()).strip('_')
+
+def _valeur_import(valeur) -> str:
+    """Valeur de cellule (CSV ou Excel) convertie en texte"""
+    if valeur is None:
+        return ''
+    if isinstance(valeur, datetime):
+        return valeur.date().isoformat()
+    if isinstance(valeur, date):
+        return valeur.isoformat()
+    if isinstance(valeur, float) and valeur.is_integer():
+        return str(int(valeur))
+    return str(valeur).strip()
+
+def _date_import(texte: str) -> Optional[str]:
+    """Date importée au format AAAA-MM-JJ, ou None si elle est invalide"""
+    import re
+    morceaux = re.match(FORMAT_DATE_IMPORT, texte)
+    try:
+        annee, mois, jour = morceaux.group(1, 2, 3) if morceaux.group(1) else morceaux.group(6, 5, 4)
+        return date(int(annee), int(mois), int(jour)).isoformat()
+    except (AttributeError, ValueError):
+        return None
+
+def _montant_import(texte: str) -> Optional[float]:
+    """Montant importé ("1 500,50", "1500.5 DH"...) en float, ou None s'il est invalide"""
+    texte = texte.upper().replace('DH', '').replace('MAD', '')
+    texte = ''.join(texte.split())
+    if ',' in texte and '.' not in texte:
+        texte = texte.replace(',', '.')
+    else:
+        texte = texte.replace(',', '')
+    try:
+        return float(texte)
+    except ValueError:
+        return None
+
+def _lire_lignes_import(fichier, nom_fichier: str):
+    """
+    Générateur (numéro de ligne, {colonne: texte}) sur un fichier CSV ou Excel.
+    fichier est un chemin ou un fichier binaire (ex. st.file_uploader).
+    Le séparateur CSV (, ; ou tabulation) et l'encodage (UTF-8 ou Windows-1252)
+    sont détectés sur le début du fichier.
+    """
+    import csv
+    import io
+    
+    extension = os.path.splitext(nom_fichier or '')[1].lower()
+    flux = open(fichier, 'rb') if isinstance(fichier, (str, os.PathLike)) else fichier
+    try:
+        if extension in ('.xlsx', '.xlsm'):
+            try:
+                from openpyxl import load_workbook
+            except ImportError:
+                raise ValueError("L'import Excel nécessite le paquet openpyxl (pip install openpyxl)")
+            classeur = load_workbook(flux, read_only=True, data_only=True)
+            try:
+                lignes = classeur.active.iter_rows(values_only=True)
+                entetes = next(lignes, None) or ()
+                yield from _associer_colonnes(entetes, lignes)
+            finally:
+                classeur.close()
+        else:
+            echantillon = flux.read(64 * 1024)
+            flux.seek(0)
+            try:
+                echantillon.decode('utf-8')
+                encodage = 'utf-8-sig'
+            except UnicodeDecodeError as e:
+                # Un caractère coupé en fin d'échantillon n'est pas une erreur
+                encodage = 'utf-8-sig' if e.start >= len(echantillon) - 3 else 'cp1252'
+            try:
+                dialecte = csv.Sniffer().sniff(echantillon.decode(encodage, 'ignore'), delimiters=',;\t')
+            except csv.Error:
+                dialecte = csv.excel
+            texte = io.TextIOWrapper(flux, encoding=encodage, newline='')
+            try:
+                lignes = csv.reader(texte, dialecte)
+                entetes = next(lignes, None) or ()
+                yield from _associer_colonnes(entetes, lignes)
+            finally:
+                texte.detach()
+    finally:
+        if flux is not fichier:
+            flux.close()
+
+def _associer_colonnes(entetes, lignes):
+    colonnes = []
+    for entete in entetes:
+        cle = _cle_import(entete or '')
+        colonnes.append(ALIAS_COLONNES_IMPORT.get(cle, cle))
+    for numero, ligne in enumerate(lignes, start=2):
+        valeurs = {colonne: _valeur_import(valeur) for colonne, valeur in zip(colonnes, ligne) if colonne}
+        if any(valeurs.values()):
+            yield numero, valeurs
+
+def _normaliser_client_import(brut: Dict, type_client: str) -> tuple:
+    """
+    Normalise une ligne importée comme le font les formulaires et la valide
+    avec valider_donnees_client. Retourne (valeurs, erreurs).
+    """
+    from utils import valider_cin, valider_ice
+    
+    erreurs = []
+    if type_client == "physique":
+        valeurs = {
+            'nom': brut.get('nom', '').title(),
+            'prenom': brut.get('prenom', '').title(),
+            'cin': valider_cin(brut.get('cin', '')),
+            'telephone': brut.get('telephone', ''),
+            'email': brut.get('email', '').lower(),
+            'adresse': brut.get('adresse', ''),
+        }
+        sexe = brut.get('sexe', '')
+        valeurs['sexe'] = SEXES_IMPORT.get(_cle_import(sexe).upper()) if sexe else ''
+        if valeurs['sexe'] is None:
+            erreurs.append(f"Sexe invalide ({sexe}), M ou F attendu")
+        
+        date_naissance = brut.get('date_naissance', '')
+        valeurs['date_naissance'] = _date_import(date_naissance) if date_naissance else ''
+        if valeurs['date_naissance'] is None:
+            erreurs.append(f"Date de naissance invalide ({date_naissance})")
+    else:
+        valeurs = {
+            'raison_sociale': brut.get('raison_sociale', '').title(),
+            'ice': valider_ice(brut.get('ice', '')).replace(' ', ''),
+            'rc': brut.get('rc', ''),
+            'forme_juridique': brut.get('forme_juridique', ''),
+            'telephone': brut.get('telephone', ''),
+            'email': brut.get('email', '').lower(),
+            'adresse': brut.get('adresse', ''),
+            'rep_nom': brut.get('rep_nom', '').title(),
+            'rep_prenom': brut.get('rep_prenom', '').title(),
+            'rep_cin': valider_cin(brut.get('rep_cin', '')),
+            'rep_qualite': brut.get('rep_qualite', '').title(),
+        }
+    
+    # Un numéro saisi comme nombre dans Excel a perdu son 0 initial (6XXXXXXXX)
+    if len(valeurs['telephone']) == 9 and valeurs['telephone'].isdigit():
+        valeurs['telephone'] = '0' + valeurs['telephone']
+    
+    _, erreurs_validation = valider_donnees_client(valeurs, type_client)
+    return valeurs, erreurs_validation + erreurs
+
+def _inserer_lot(conn, requete: str, lot: List[tuple], parametres, cle: str, rejets: List[Dict]) -> int:
+    """
+    Insère un lot [(numéro de ligne, valeurs)] avec executemany dans une
+    transaction. parametres(conn, lot) fournit les lignes SQL dans la
+    transaction (ex. ids réservés). Si le lot viole une contrainte (ligne
+    créée entre-temps par un autre utilisateur), il est rejoué ligne à ligne
+    pour isoler les lignes fautives. Retourne le nombre de lignes insérées.
+    """
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(requete, parametres(conn, lot))
+        conn.commit()
+        return len(lot)
+    except sqlite3.IntegrityError:
+        conn.rollback()
+    
+    inseres = 0
+    conn.execute("BEGIN IMMEDIATE")
+    for (numero, valeurs), ligne in zip(lot, parametres(conn, lot)):
+        try:
+            conn.execute(requete, ligne)
+            inseres += 1
+        except sqlite3.IntegrityError as e:
+            rejets.append({'ligne': numero, 'identifiant': valeurs.get(cle),
+                           'erreurs': f"Refusé par la base: {e}"})
+    conn.commit()
+    return inseres
+
+def _importer_fichier(fichier, nom_fichier: Optional[str], obligatoires, preparer,
+                      taille_lot: int, progression, libelle: str) -> Dict:
+    """
+    Boucle commune des imports en masse : lit le fichier, normalise chaque
+    ligne et insère les lignes valides par lots de taille_lot.
+    
+    preparer(conn) est appelé une fois en début d'import (chargement des
+    tables de correspondance) et retourne (normaliser, inserer_lot) :
+    normaliser(numero, brut) -> (valeurs, identifiant, erreurs) et
+    inserer_lot(conn, lot, rejets) -> nombre de lignes insérées.
+    obligatoires liste les colonnes requises ; un tuple désigne des
+    colonnes interchangeables (au moins une présente).
+    """
+    rapport = {'total': 0, 'importes': 0, 'rejets': [], 'duree_s': 0.0, 'lignes_par_s': 0.0, 'erreur': None}
+    debut = time.perf_counter()
+    
+    try:
+        with db_connection() as conn:
+            normaliser, inserer_lot = preparer(conn)
+            lot = []
+            
+            for numero, brut in _lire_lignes_import(fichier, nom_fichier or str(fichier)):
+                if rapport['total'] == 0:
+                    manquantes = [
+                        ' ou '.join(c) if isinstance(c, tuple) else c for c in obligatoires
+                        if not any(nom in brut for nom in (c if isinstance(c, tuple) else (c,)))
+                    ]
+                    if manquantes:
+                        raise ValueError(f"Colonnes obligatoires absentes: {', '.join(manquantes)}")
+                rapport['total'] += 1
+                
+                valeurs, identifiant, erreurs = normaliser(numero, brut)
+                if erreurs:
+                    rapport['rejets'].append({'ligne': numero, 'identifiant': identifiant or None,
+                                              'erreurs': '; '.join(erreurs)})
+                    continue
+                lot.append((numero, valeurs))
+                
+                if len(lot) >= taille_lot:
+                    rapport['importes'] += inserer_lot(conn, lot, rapport['rejets'])
+                    lot = []
+                    if progression:
+                        progression(rapport['total'], rapport['importes'])
+            
+            if lot:
+                rapport['importes'] += inserer_lot(conn, lot, rapport['rejets'])
+            if progression:
+                progression(rapport['total'], rapport['importes'])
+    
+    except Exception as e:
+        rapport['erreur'] = str(e)
+        print(f"Erreur import {libelle}: {e}")
+    
+    rapport['rejets'].sort(key=lambda rejet: rejet['ligne'])
+    rapport['duree_s'] = time.perf_counter() - debut
+    if rapport['duree_s'] > 0:
+        rapport['lignes_par_s'] = rapport['total'] / rapport['duree_s']
+    return rapport
+
+def modele_import_clients(type_client: str) -> str:
+    """En-tête CSV attendu par importer_clients (fichier modèle à télécharger)"""
+    return ';'.join(COLONNES_IMPORT_CLIENTS[type_client]) + '\n'
+
+@invalide_cache(*TABLES_CLIENTS)
+def importer_clients(fichier, type_client: str, nom_fichier: Optional[str] = None,
+                     taille_lot: int = TAILLE_LOT_IMPORT, progression=None) -> Dict:
+    """
+    Importe en masse des clients physiques ou moraux depuis un fichier CSV ou Excel.
+    
+    Args:
+        fichier: chemin ou fichier binaire ouvert
+        type_client: 'physique' ou 'moral'
+        nom_fichier: nom d'origine (détermine le format), par défaut le chemin
+        taille_lot: nombre de lignes par transaction
+        progression: fonction appelée après chaque lot avec (lignes lues, clients importés)
+    
+    Returns:
+        Dict: total, importes, rejets [{'ligne', 'identifiant', 'erreurs'}],
+        duree_s, lignes_par_s et erreur (fichier illisible, colonnes manquantes)
+    """
+    cle_unique = 'cin' if type_client == "physique" else 'ice'
+    table = 'clients_physiques' if type_client == "physique" else 'clients_moraux'
+    colonnes = COLONNES_IMPORT_CLIENTS[type_client]
+    requete = f"""
+        INSERT INTO {table} (id, {', '.join(colonnes)}, date_creation)
+        VALUES ({', '.join('?' * (len(colonnes) + 2))})
+    """
+    
+    def preparer(conn):
+        # Identifiants existants chargés une fois (comparés sans espaces)
+        existants = {
+            str(ligne[0]).replace(' ', '').upper()
+            for ligne in conn.execute(f"SELECT {cle_unique} FROM {table}")
+        }
+        vus = {}
+        
+        def normaliser(numero, brut):
+            valeurs, erreurs = _normaliser_client_import(brut, type_client)
+            cle = valeurs[cle_unique].upper()
+            if cle in existants:
+                erreurs.append(f"{cle_unique.upper()} déjà enregistré(e)")
+            elif cle in vus:
+                erreurs.append(f"{cle_unique.upper()} en double dans le fichier (ligne {vus[cle]})")
+            elif cle and not erreurs:
+                vus[cle] = numero
+            return valeurs, valeurs[cle_unique], erreurs
+        
+        def parametres(conn, lot):
+            maintenant = datetime.now().isoformat()
+            for client_id, (_, valeurs) in zip(reserver_ids_clients(conn, len(lot)), lot):
+                yield (client_id, *[valeurs.get(c) or None for c in colonnes], maintenant)
+        
+        def inserer_lot(conn, lot, rejets):
+            return _inserer_lot(conn, requete, lot, parametres, cle_unique, rejets)
+        
+        return normaliser, inserer_lot
+    
+    rapport = _importer_fichier(fichier, nom_fichier, COLONNES_OBLIGATOIRES_IMPORT[type_client],
+                                preparer, taille_lot, progression, "clients")
+    rapport['type_client'] = type_client
+    return rapport
+
+@cache_lecture(*TABLES_CLIENTS)
 def rechercher_clients(search_term: str = "", client_type: Optional[str] = None) -> List[Dict]:
-    """Recherche des clients"""
+    """
+    Recherche des clients (nom, prénom, CIN / raison sociale, ICE, téléphone).
+    Passe par l'index FTS5 trigram, trié par pertinence, dès que le terme
+    fait au moins FTS_TAILLE_MIN caractères ; sinon recherche LIKE.
+    """
     conn = get_db_connection()
     try:
+        match = requete_fts(search_term)
+        if match is not None:
+            resultats = []
+            for type_c, table in (("physique", "clients_physiques"), ("moral", "clients_moraux")):
+                if client_type not in (None, type_c):
+                    continue
+                colonne_type = "" if client_type else f", '{type_c}' as type_client"
+                cursor = conn.execute(f"""
+                SELECT t.*{colonne_type}, clients_fts.rank as pertinence
+                FROM clients_fts
+                JOIN {table} t ON t.id = clients_fts.client_id
+                WHERE clients_fts MATCH ? AND clients_fts.client_type = ?
+                ORDER BY clients_fts.rank
+                """, (match, type_c))
+                resultats.extend(dict(row) for row in cursor.fetchall())
+            
+            if client_type is None:
+                resultats.sort(key=lambda x: x['pertinence'])
+            for resultat in resultats:
+                resultat.pop('pertinence', None)
+            return resultats
+        
         if client_type == "physique":
             query = """
             SELECT *
@@ -813,6 +2333,7 @@ def rechercher_clients(search_term: str = "", client_type: Optional[str] = None)
     finally:
         conn.close()
 
+@cache_lecture(*TABLES_CLIENTS)
 def get_all_clients(client_type: str) -> List[Dict]:
     """Récupère tous les clients d'un type donné"""
     conn = get_db_connection()
@@ -842,7 +2363,155 @@ def get_all_clients(client_type: str) -> List[Dict]:
     finally:
         conn.close()
 
+# Taille de page par défaut des listes paginées (contrats, factures, clients)
+TAILLE_PAGE = 25
+
+def _resultat_page(lignes: List[Dict], limite: int, cle_curseur, total: Optional[int]) -> Dict:
+    """
+    Met en forme une page keyset : la requête lit limite + 1 lignes pour savoir
+    s'il existe une page suivante sans requête supplémentaire.
+    """
+    suivante = len(lignes) > limite
+    lignes = lignes[:limite]
+    return {
+        'lignes': lignes,
+        'total': total,
+        'limite': limite,
+        'curseur_suivant': cle_curseur(lignes[-1]) if suivante and lignes else None
+    }
+
+# Colonnes filtrables par entité (alias des requêtes de liste : c = contrats, f = factures)
+_COLONNES_FILTRES = {
+    'contrats': {
+        'statut': 'c.statut',
+        'type': 'c.type_service',
+        'date': 'c.date_creation',
+        'numero': 'c.numero_contrat',
+        'client_type': 'c.client_type',
+    },
+    'factures': {
+        'statut': 'f.statut',
+        'type': 'f.type_facture',
+        'date': 'f.date_facture',
+        'numero': 'f.numero_facture',
+        'client_type': 'f.client_type',
+        'echeance': 'f.date_echeance',
+    },
+}
+
+def construire_filtres(entite: str, statut: Optional[str] = None, type_: Optional[str] = None,
+                       date_min: Optional[str] = None, date_max: Optional[str] = None,
+                       recherche: Optional[str] = None, client_type: Optional[str] = None,
+                       echeance_min: Optional[str] = None, echeance_max: Optional[str] = None) -> tuple[List[str], List]:
+    """
+    Construit les conditions SQL paramétrées d'une liste de contrats ou de factures.
+    
+    - statut, type_, client_type : égalité (ignorés si vides ou "Tous")
+    - date_min (inclus) / date_max (exclu) : bornes ISO sur la date de la pièce
+    - echeance_min / echeance_max (inclus) : bornes ISO sur l'échéance (factures)
+    - recherche : numéro ou nom du client (requiert les jointures cp / cm)
+    
+    Le statut 'En retard' des factures est celui enregistré en base par
+    marquer_factures_en_retard.
+    
+    Retourne (conditions, params) à combiner avec " AND ".
+    """
+    colonnes = _COLONNES_FILTRES[entite]
+    conditions, params = [], []
+    
+    def actif(valeur):
+        return valeur not in (None, "", "Tous")
+    
+    if actif(statut):
+        conditions.append(f"{colonnes['statut']} = ?")
+        params.append(statut)
+    
+    if actif(type_):
+        conditions.append(f"{colonnes['type']} = ?")
+        params.append(type_)
+    
+    if actif(client_type):
+        conditions.append(f"{colonnes['client_type']} = ?")
+        params.append(client_type)
+    
+    if date_min:
+        conditions.append(f"{colonnes['date']} >= ?")
+        params.append(date_min)
+    
+    if date_max:
+        conditions.append(f"{colonnes['date']} < ?")
+        params.append(date_max)
+    
+    if echeance_min:
+        conditions.append(f"{colonnes['echeance']} >= ?")
+        params.append(echeance_min)
+    
+    if echeance_max:
+        conditions.append(f"{colonnes['echeance']} <= ?")
+        params.append(echeance_max)
+    
+    if recherche and recherche.strip():
+        match = requete_fts(recherche)
+        alias = colonnes['numero'].split('.')[0]
+        if match is not None:
+            # Client retrouvé par l'index plein texte ; numéro de contrat aussi, la
+            # facture n'ayant pas d'index plein texte son numéro reste en LIKE
+            if entite == 'contrats':
+                condition_numero = "c.id IN (SELECT rowid FROM contrats_fts WHERE contrats_fts MATCH ?)"
+                params.append(match)
+            else:
+                condition_numero = f"{colonnes['numero']} LIKE ?"
+                params.append(f"%{recherche.strip()}%")
+            conditions.append(f"({condition_numero} OR ({alias}.client_id, {colonnes['client_type']}) IN "
+                              f"(SELECT client_id, client_type FROM clients_fts WHERE clients_fts MATCH ?))")
+            params.append(match)
+        else:
+            motif = f"%{recherche.strip()}%"
+            conditions.append(f"({colonnes['numero']} LIKE ? OR cp.nom || ' ' || cp.prenom LIKE ? "
+                              f"OR cm.raison_sociale LIKE ?)")
+            params.extend([motif, motif, motif])
+    
+    return conditions, params
+
+def bornes_mois(annee: int, mois: int) -> tuple[str, str]:
+    """Bornes ISO [premier jour du mois, premier jour du mois suivant)"""
+    debut = date(annee, mois, 1)
+    suivant = date(annee + 1, 1, 1) if mois == 12 else date(annee, mois + 1, 1)
+    return debut.isoformat(), suivant.isoformat()
+
+@cache_lecture(*TABLES_CLIENTS)
+def get_clients_page(client_type: str, apres_id: Optional[int] = None,
+                     limite: int = TAILLE_PAGE, avec_total: bool = True) -> Dict:
+    """
+    Page de clients triés par ID croissant (pagination keyset sur id).
+    Retourne {'lignes': [...], 'total': int|None, 'curseur_suivant': id|None}
+    """
+    table = "clients_physiques" if client_type == "physique" else "clients_moraux"
+    colonnes = ("id, nom, prenom, cin, telephone, email, sexe, date_naissance, adresse, date_creation"
+                if client_type == "physique" else
+                "id, raison_sociale, ice, rc, forme_juridique, telephone, email, adresse, date_creation, "
+                "rep_nom, rep_prenom, rep_cin, rep_qualite")
+    conn = get_db_connection()
+    try:
+        if apres_id is None:
+            cursor = conn.execute(f"SELECT {colonnes} FROM {table} ORDER BY id LIMIT ?", (limite + 1,))
+        else:
+            cursor = conn.execute(
+                f"SELECT {colonnes} FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+                (apres_id, limite + 1)
+            )
+        lignes = [dict(row) for row in cursor.fetchall()]
+        total = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] if avec_total else None
+        return _resultat_page(lignes, limite, lambda ligne: ligne['id'], total)
+        
+    except Exception as e:
+        print(f"Erreur pagination clients {client_type}: {e}")
+        return {'lignes': [], 'total': 0, 'curseur_suivant': None}
+    finally:
+        conn.close()
+
 # Fonctions Contrats (inchangées)
+@invalide_cache('contrats')
 def ajouter_contrat(contrat_data: Dict) -> bool:
     """Ajoute un nouveau contrat"""
     conn = get_db_connection()
@@ -893,32 +2562,184 @@ def ajouter_contrat(contrat_data: Dict) -> bool:
     finally:
         conn.close()
 
+# Import en masse des contrats (reprise d'un portefeuille existant).
+# Le client est désigné par sa CIN ou son ICE, résolu par une table de
+# correspondance chargée une fois par import.
+STATUTS_CONTRAT = ('Actif', 'En attente', 'Suspendu', 'Résilié')
+
+COLONNES_IMPORT_CONTRATS = ('numero_contrat', 'identifiant_client', 'type_service', 'date_debut', 'date_fin',
+                            'duree_mois', 'montant_mensuel', 'frais_ouverture', 'depot_garantie',
+                            'services_inclus', 'conditions', 'statut')
+COLONNES_OBLIGATOIRES_CONTRATS = (('identifiant_client', 'cin', 'ice'), 'type_service', 'date_debut', 'montant_mensuel')
+
+def modele_import_contrats() -> str:
+    """En-tête CSV attendu par importer_contrats (fichier modèle à télécharger)"""
+    return ';'.join(COLONNES_IMPORT_CONTRATS) + '\n'
+
+@invalide_cache('contrats')
+def importer_contrats(fichier, nom_fichier: Optional[str] = None,
+                      taille_lot: int = TAILLE_LOT_IMPORT, progression=None) -> Dict:
+    """
+    Importe en masse des contrats depuis un fichier CSV ou Excel.
+    
+    Le client est identifié par la colonne identifiant_client (CIN ou ICE),
+    cin ou ice. date_fin est calculée depuis duree_mois si elle est absente
+    (et inversement) ; numero_contrat est généré s'il est vide.
+    
+    Returns:
+        Dict: mêmes clés que importer_clients (total, importes, rejets,
+        duree_s, lignes_par_s, erreur)
+    """
+    import uuid
+    from utils import calculer_duree_contrat
+    
+    requete = """
+        INSERT INTO contrats (
+            numero_contrat, client_id, client_type, type_service,
+            date_debut, date_fin, duree_mois, montant_mensuel,
+            frais_ouverture, depot_garantie, services_inclus,
+            conditions, statut, date_creation
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    colonnes = ('numero_contrat', 'client_id', 'client_type', 'type_service', 'date_debut', 'date_fin',
+                'duree_mois', 'montant_mensuel', 'frais_ouverture', 'depot_garantie',
+                'services_inclus', 'conditions', 'statut', 'date_creation')
+    statuts = {_cle_import(statut): statut for statut in STATUTS_CONTRAT}
+    
+    def preparer(conn):
+        # Correspondances CIN -> id et ICE -> id (comparées sans espaces)
+        par_cin = {str(cin).replace(' ', '').upper(): client_id
+                   for client_id, cin in conn.execute("SELECT id, cin FROM clients_physiques")}
+        par_ice = {str(ice).replace(' ', '').upper(): client_id
+                   for client_id, ice in conn.execute("SELECT id, ice FROM clients_moraux")}
+        existants = {numero for (numero,) in conn.execute("SELECT numero_contrat FROM contrats")}
+        vus = {}
+        aujourd_hui = datetime.now().strftime('%Y-%m-%d')
+        
+        def normaliser(numero, brut):
+            erreurs = []
+            numero_contrat = brut.get('numero_contrat') or \
+                f"DOM-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
+            valeurs = {
+                'numero_contrat': numero_contrat,
+                'type_service': brut.get('type_service', ''),
+                'services_inclus': brut.get('services_inclus', ''),
+                'conditions': brut.get('conditions', ''),
+                'date_creation': aujourd_hui,
+            }
+            
+            if numero_contrat in existants:
+                erreurs.append("Numéro de contrat déjà enregistré")
+            elif numero_contrat in vus:
+                erreurs.append(f"Numéro de contrat en double dans le fichier (ligne {vus[numero_contrat]})")
+            
+            # Résolution du client
+            if brut.get('cin'):
+                cle, recherches = brut['cin'], (('physique', par_cin),)
+            elif brut.get('ice'):
+                cle, recherches = brut['ice'], (('moral', par_ice),)
+            else:
+                cle, recherches = brut.get('identifiant_client', ''), (('physique', par_cin), ('moral', par_ice))
+            cle = cle.replace(' ', '').upper()
+            for type_client, correspondance in recherches:
+                if cle in correspondance:
+                    valeurs['client_id'], valeurs['client_type'] = correspondance[cle], type_client
+                    break
+            else:
+                erreurs.append(f"Client introuvable ({cle})" if cle else "Client (CIN ou ICE) manquant")
+            
+            if not valeurs['type_service']:
+                erreurs.append("Le type de service est obligatoire")
+            
+            statut = brut.get('statut', '')
+            valeurs['statut'] = statuts.get(_cle_import(statut)) if statut else 'Actif'
+            if valeurs['statut'] is None:
+                erreurs.append(f"Statut invalide ({statut})")
+            
+            # Montants
+            for colonne, obligatoire in (('montant_mensuel', True), ('frais_ouverture', False), ('depot_garantie', False)):
+                texte = brut.get(colonne, '')
+                if not texte:
+                    valeurs[colonne] = 0.0
+                    if obligatoire:
+                        erreurs.append("Le montant mensuel est obligatoire")
+                    continue
+                valeurs[colonne] = _montant_import(texte)
+                if valeurs[colonne] is None or valeurs[colonne] < 0:
+                    erreurs.append(f"Montant invalide pour {colonne} ({texte})")
+                elif obligatoire and valeurs[colonne] == 0:
+                    erreurs.append("Le montant mensuel doit être supérieur à 0")
+            
+            # Dates et durée (date de fin = début + 30 jours par mois, comme le formulaire)
+            date_debut = _date_import(brut.get('date_debut', ''))
+            date_fin = _date_import(brut['date_fin']) if brut.get('date_fin') else ''
+            duree = brut.get('duree_mois', '')
+            try:
+                duree_mois = int(float(duree.replace(',', '.'))) if duree else None
+            except ValueError:
+                duree_mois = 0
+            
+            if date_debut is None:
+                erreurs.append(f"Date de début invalide ({brut.get('date_debut', '')})")
+            if date_fin is None:
+                erreurs.append(f"Date de fin invalide ({brut['date_fin']})")
+            if duree_mois is not None and duree_mois < 1:
+                erreurs.append(f"Durée invalide ({duree})")
+            
+            if date_debut and date_fin is not None and (duree_mois is None or duree_mois >= 1):
+                if not date_fin:
+                    duree_mois = duree_mois or 12
+                    date_fin = (date.fromisoformat(date_debut) + timedelta(days=duree_mois * 30)).isoformat()
+                elif date_fin <= date_debut:
+                    erreurs.append("La date de fin doit être postérieure à la date de début")
+                elif duree_mois is None:
+                    duree_mois = calculer_duree_contrat(date_debut, date_fin)
+            valeurs.update(date_debut=date_debut, date_fin=date_fin, duree_mois=duree_mois)
+            
+            if not erreurs:
+                vus[numero_contrat] = numero
+            return valeurs, numero_contrat, erreurs
+        
+        def parametres(conn, lot):
+            for _, valeurs in lot:
+                yield tuple(valeurs.get(c) if valeurs.get(c) != '' else None for c in colonnes)
+        
+        def inserer_lot(conn, lot, rejets):
+            return _inserer_lot(conn, requete, lot, parametres, 'numero_contrat', rejets)
+        
+        return normaliser, inserer_lot
+    
+    return _importer_fichier(fichier, nom_fichier, COLONNES_OBLIGATOIRES_CONTRATS,
+                             preparer, taille_lot, progression, "contrats")
+
+# Liste complète des contrats, du plus récent au plus ancien
+SQL_CONTRATS_LISTE = """
+SELECT 
+    c.*,
+    CASE 
+        WHEN c.client_type = 'physique' THEN cp.nom || ' ' || cp.prenom
+        ELSE cm.raison_sociale
+    END as client_nom,
+    CASE 
+        WHEN c.client_type = 'physique' THEN cp.cin
+        ELSE cm.ice
+    END as client_identifiant,
+    CASE 
+        WHEN c.client_type = 'physique' THEN cp.telephone
+        ELSE cm.telephone
+    END as client_telephone
+FROM contrats c
+LEFT JOIN clients_physiques cp ON c.client_id = cp.id AND c.client_type = 'physique'
+LEFT JOIN clients_moraux cm ON c.client_id = cm.id AND c.client_type = 'moral'
+ORDER BY c.date_creation DESC
+"""
+
+@cache_lecture('contrats', *TABLES_CLIENTS)
 def get_all_contrats() -> List[Dict]:
     """Récupère tous les contrats avec les informations des clients"""
     conn = get_db_connection()
     try:
-        query = """
-        SELECT 
-            c.*,
-            CASE 
-                WHEN c.client_type = 'physique' THEN cp.nom || ' ' || cp.prenom
-                ELSE cm.raison_sociale
-            END as client_nom,
-            CASE 
-                WHEN c.client_type = 'physique' THEN cp.cin
-                ELSE cm.ice
-            END as client_identifiant,
-            CASE 
-                WHEN c.client_type = 'physique' THEN cp.telephone
-                ELSE cm.telephone
-            END as client_telephone
-        FROM contrats c
-        LEFT JOIN clients_physiques cp ON c.client_id = cp.id AND c.client_type = 'physique'
-        LEFT JOIN clients_moraux cm ON c.client_id = cm.id AND c.client_type = 'moral'
-        ORDER BY c.date_creation DESC
-        """
-        
-        cursor = conn.execute(query)
+        cursor = conn.execute(SQL_CONTRATS_LISTE)
         return [dict(row) for row in cursor.fetchall()]
         
     except Exception as e:
@@ -927,6 +2748,77 @@ def get_all_contrats() -> List[Dict]:
     finally:
         conn.close()
 
+# Page de contrats (get_contrats_page) : {jointures} et {where} selon les filtres
+JOINTURES_CLIENTS_CONTRATS = """
+LEFT JOIN clients_physiques cp ON c.client_id = cp.id AND c.client_type = 'physique'
+LEFT JOIN clients_moraux cm ON c.client_id = cm.id AND c.client_type = 'moral'
+"""
+SQL_CONTRATS_PAGE = """
+SELECT 
+    c.*,
+    CASE 
+        WHEN c.client_type = 'physique' THEN cp.nom || ' ' || cp.prenom
+        ELSE cm.raison_sociale
+    END as client_nom,
+    CASE 
+        WHEN c.client_type = 'physique' THEN cp.cin
+        ELSE cm.ice
+    END as client_identifiant,
+    CASE 
+        WHEN c.client_type = 'physique' THEN cp.telephone
+        ELSE cm.telephone
+    END as client_telephone
+FROM contrats c
+{jointures}
+{where}
+ORDER BY COALESCE(c.date_creation, '') DESC, c.id DESC
+LIMIT ?
+"""
+# La borne simple sur la date permet la recherche dans l'index d'expression
+CURSEUR_CONTRATS_PAGE = "COALESCE(c.date_creation, '') <= ? AND (COALESCE(c.date_creation, ''), c.id) < (?, ?)"
+
+@cache_lecture('contrats', *TABLES_CLIENTS)
+def get_contrats_page(curseur: Optional[tuple] = None, limite: int = TAILLE_PAGE,
+                      avec_total: bool = True, filtres: Optional[Dict] = None) -> Dict:
+    """
+    Page de contrats, du plus récent au plus ancien.
+    Pagination keyset sur (date_creation, id) : le curseur est la clé de la
+    dernière ligne de la page précédente, la requête reste un parcours
+    d'index borné quelle que soit la profondeur de la page. Une date NULL
+    est triée comme '' (en dernier) : comparée telle quelle, elle ferait
+    disparaître la ligne et arrêterait la pagination.
+    filtres : arguments de construire_filtres (statut, type_, recherche...).
+    """
+    conn = get_db_connection()
+    try:
+        conditions, params = construire_filtres('contrats', **(filtres or {}))
+        jointures = JOINTURES_CLIENTS_CONTRATS
+        conditions_page, params_page = list(conditions), list(params)
+        if curseur is not None:
+            conditions_page.append(CURSEUR_CONTRATS_PAGE)
+            params_page.extend([curseur[0], curseur[0], curseur[1]])
+        where = ("WHERE " + " AND ".join(conditions_page)) if conditions_page else ""
+        
+        cursor = conn.execute(SQL_CONTRATS_PAGE.format(jointures=jointures, where=where), params_page + [limite + 1])
+        lignes = [dict(row) for row in cursor.fetchall()]
+        
+        total = None
+        if avec_total:
+            # Les jointures clients ne sont utiles au comptage que pour la recherche texte
+            where_total = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+            total = conn.execute(
+                f"SELECT COUNT(*) FROM contrats c {jointures if (filtres or {}).get('recherche') else ''} {where_total}",
+                params
+            ).fetchone()[0]
+        return _resultat_page(lignes, limite, lambda ligne: (ligne['date_creation'] or '', ligne['id']), total)
+        
+    except Exception as e:
+        print(f"Erreur pagination contrats: {e}")
+        return {'lignes': [], 'total': 0, 'curseur_suivant': None}
+    finally:
+        conn.close()
+
+@cache_lecture('contrats', *TABLES_CLIENTS)
 def get_contrat_by_id(contrat_id: int) -> Optional[Dict]:
     """Récupère un contrat par son ID avec les informations du client"""
     conn = get_db_connection()
@@ -970,6 +2862,7 @@ def get_contrat_by_id(contrat_id: int) -> Optional[Dict]:
     finally:
         conn.close()
 
+@invalide_cache('contrats')
 def modifier_contrat(contrat_id: int, modifications: dict) -> bool:
     """
     Modifie un contrat existant avec validation complète et gestion d'erreurs améliorée
@@ -1173,15 +3066,16 @@ def diagnostiquer_modification_contrat(contrat_id: int):
             conn.close()
 
 
+# Nombre de paiements d'un contrat (index contrat_id)
+SQL_PAIEMENTS_PAR_CONTRAT = "SELECT COUNT(*) as count FROM paiements WHERE contrat_id = ?"
+
+@invalide_cache('contrats', 'factures')
 def supprimer_contrat(contrat_id: int) -> bool:
     """Supprime un contrat"""
     conn = get_db_connection()
     try:
         # Vérifier s'il y a des paiements associés
-        paiements = conn.execute(
-            "SELECT COUNT(*) as count FROM paiements WHERE contrat_id = ?",
-            (contrat_id,)
-        ).fetchone()
+        paiements = conn.execute(SQL_PAIEMENTS_PAR_CONTRAT, (contrat_id,)).fetchone()
         
         if paiements and paiements['count'] > 0:
             # Si il y a des paiements, on ne supprime pas mais on marque comme résilié
@@ -1202,10 +3096,30 @@ def supprimer_contrat(contrat_id: int) -> bool:
     finally:
         conn.close()
 
+@cache_lecture('contrats', *TABLES_CLIENTS)
 def rechercher_contrats(search_term: str = "") -> List[Dict]:
-    """Recherche des contrats par terme"""
+    """Recherche des contrats par terme (numéro, type de service ou client)"""
     conn = get_db_connection()
     try:
+        match = requete_fts(search_term)
+        if match is not None:
+            cursor = conn.execute("""
+            SELECT 
+                c.*,
+                CASE 
+                    WHEN c.client_type = 'physique' THEN cp.nom || ' ' || cp.prenom
+                    ELSE cm.raison_sociale
+                END as client_nom
+            FROM contrats c
+            LEFT JOIN clients_physiques cp ON c.client_id = cp.id AND c.client_type = 'physique'
+            LEFT JOIN clients_moraux cm ON c.client_id = cm.id AND c.client_type = 'moral'
+            WHERE c.id IN (SELECT rowid FROM contrats_fts WHERE contrats_fts MATCH ?)
+               OR (c.client_id, c.client_type) IN (
+                    SELECT client_id, client_type FROM clients_fts WHERE clients_fts MATCH ?)
+            ORDER BY c.date_creation DESC
+            """, (match, match))
+            return [dict(row) for row in cursor.fetchall()]
+        
         query = """
         SELECT 
             c.*,
@@ -1235,6 +3149,7 @@ def rechercher_contrats(search_term: str = "") -> List[Dict]:
     finally:
         conn.close()
 
+@cache_lecture('contrats', *TABLES_CLIENTS)
 def get_contrats_par_statut(statut: str) -> List[Dict]:
     """Récupère les contrats par statut"""
     conn = get_db_connection()
@@ -1262,27 +3177,38 @@ def get_contrats_par_statut(statut: str) -> List[Dict]:
     finally:
         conn.close()
 
+def bornes_expiration(jours: int = 30, reference: Optional[date] = None) -> tuple[str, str]:
+    """
+    Bornes ISO (exclue, incluse) de la fenêtre d'expiration : date_fin > debut AND date_fin <= fin.
+    Comparer la colonne brute à ces bornes permet d'utiliser l'index (statut, date_fin).
+    """
+    aujourd_hui = reference or date.today()
+    return aujourd_hui.isoformat(), (aujourd_hui + timedelta(days=jours)).isoformat()
+
+# Contrats actifs dont la fin tombe entre deux dates (bornes_expiration)
+SQL_CONTRATS_EXPIRANTS = """
+SELECT 
+    c.*,
+    CASE 
+        WHEN c.client_type = 'physique' THEN cp.nom || ' ' || cp.prenom
+        ELSE cm.raison_sociale
+    END as client_nom,
+    julianday(c.date_fin) - julianday('now') as jours_restants
+FROM contrats c
+LEFT JOIN clients_physiques cp ON c.client_id = cp.id AND c.client_type = 'physique'
+LEFT JOIN clients_moraux cm ON c.client_id = cm.id AND c.client_type = 'moral'
+WHERE c.statut = 'Actif' 
+  AND c.date_fin > ? AND c.date_fin <= ?
+ORDER BY c.date_fin ASC
+"""
+
+@cache_lecture('contrats', *TABLES_CLIENTS)
 def get_contrats_expirants(jours: int = 30) -> List[Dict]:
     """Récupère les contrats qui expirent dans X jours"""
     conn = get_db_connection()
     try:
-        query = """
-        SELECT 
-            c.*,
-            CASE 
-                WHEN c.client_type = 'physique' THEN cp.nom || ' ' || cp.prenom
-                ELSE cm.raison_sociale
-            END as client_nom,
-            julianday(c.date_fin) - julianday('now') as jours_restants
-        FROM contrats c
-        LEFT JOIN clients_physiques cp ON c.client_id = cp.id AND c.client_type = 'physique'
-        LEFT JOIN clients_moraux cm ON c.client_id = cm.id AND c.client_type = 'moral'
-        WHERE c.statut = 'Actif' 
-          AND julianday(c.date_fin) - julianday('now') BETWEEN 0 AND ?
-        ORDER BY c.date_fin ASC
-        """
-        
-        cursor = conn.execute(query, (jours,))
+        debut, fin = bornes_expiration(jours)
+        cursor = conn.execute(SQL_CONTRATS_EXPIRANTS, (debut, fin))
         return [dict(row) for row in cursor.fetchall()]
         
     except Exception as e:
@@ -1291,30 +3217,22 @@ def get_contrats_expirants(jours: int = 30) -> List[Dict]:
     finally:
         conn.close()
 
+@cache_lecture('contrats')
 def get_statistiques_contrats() -> Dict:
     """Récupère les statistiques des contrats"""
     conn = get_db_connection()
     try:
-        # Statistiques générales
-        stats_generales = conn.execute("""
-        SELECT 
-            COUNT(*) as total_contrats,
-            COUNT(CASE WHEN statut = 'Actif' THEN 1 END) as contrats_actifs,
-            COUNT(CASE WHEN statut = 'En attente' THEN 1 END) as contrats_attente,
-            COUNT(CASE WHEN statut = 'Suspendu' THEN 1 END) as contrats_suspendus,
-            COUNT(CASE WHEN statut = 'Résilié' THEN 1 END) as contrats_resilies,
-            COALESCE(SUM(CASE WHEN statut = 'Actif' THEN montant_mensuel END), 0) as ca_mensuel_actif,
-            COALESCE(SUM(montant_mensuel + COALESCE(frais_ouverture, 0)), 0) as ca_total_potentiel
-        FROM contrats
-        """).fetchone()
+        # Statistiques générales (ligne kpi_snapshot maintenue par triggers)
+        kpi = lire_kpi(conn)
         
         # Contrats expirants
+        debut, fin = bornes_expiration(30)
         contrats_expirants = conn.execute("""
         SELECT COUNT(*) as count
         FROM contrats 
         WHERE statut = 'Actif' 
-          AND julianday(date_fin) - julianday('now') BETWEEN 0 AND 30
-        """).fetchone()
+          AND date_fin > ? AND date_fin <= ?
+        """, (debut, fin)).fetchone()
         
         # Répartition par type de service
         repartition_services = conn.execute("""
@@ -1326,13 +3244,13 @@ def get_statistiques_contrats() -> Dict:
         """).fetchall()
         
         return {
-            'total_contrats': stats_generales['total_contrats'],
-            'contrats_actifs': stats_generales['contrats_actifs'],
-            'contrats_attente': stats_generales['contrats_attente'],
-            'contrats_suspendus': stats_generales['contrats_suspendus'],
-            'contrats_resilies': stats_generales['contrats_resilies'],
-            'ca_mensuel_actif': stats_generales['ca_mensuel_actif'],
-            'ca_total_potentiel': stats_generales['ca_total_potentiel'],
+            'total_contrats': kpi['nb_contrats'],
+            'contrats_actifs': kpi['nb_contrats_actifs'],
+            'contrats_attente': kpi['nb_contrats_attente'],
+            'contrats_suspendus': kpi['nb_contrats_suspendus'],
+            'contrats_resilies': kpi['nb_contrats_resilies'],
+            'ca_mensuel_actif': kpi['ca_mensuel_actif'],
+            'ca_total_potentiel': kpi['ca_total_potentiel'],
             'contrats_expirants': contrats_expirants['count'],
             'repartition_services': [dict(row) for row in repartition_services]
         }
@@ -1343,6 +3261,7 @@ def get_statistiques_contrats() -> Dict:
     finally:
         conn.close()
 
+@invalide_cache('paiements')
 def ajouter_paiement(paiement_data: Dict) -> bool:
     """Ajoute un paiement et met à jour le contrat"""
     conn = get_db_connection()
@@ -1367,52 +3286,42 @@ def ajouter_paiement(paiement_data: Dict) -> bool:
     finally:
         conn.close()
 
+@cache_lecture('contrats', 'paiements', *TABLES_CLIENTS)
 def get_statistiques() -> Dict:
     """Récupère les statistiques générales - VERSION CORRIGÉE"""
     conn = get_db_connection()
     try:
-        # Statistiques clients
-        clients_physiques = conn.execute("SELECT COUNT(*) as count FROM clients_physiques").fetchone()['count']
-        clients_moraux = conn.execute("SELECT COUNT(*) as count FROM clients_moraux").fetchone()['count']
-        
-        # Statistiques contrats - CORRIGÉE POUR NOUVELLE STRUCTURE
-        stats_contrats = conn.execute("""
-        SELECT 
-            COUNT(*) as total_contrats,
-            COUNT(CASE WHEN statut = 'Actif' THEN 1 END) as contrats_actifs,
-            COUNT(CASE WHEN statut = 'Résilié' THEN 1 END) as contrats_resilies,
-            COUNT(CASE WHEN date(date_fin) < date('now') AND statut = 'Actif' THEN 1 END) as contrats_expires,
-            COALESCE(SUM(CASE WHEN statut = 'Actif' THEN montant_mensuel * duree_mois END), 0) as ca_total_potentiel,
-            COALESCE(SUM(CASE WHEN statut = 'Actif' THEN montant_mensuel END), 0) as ca_mensuel_actif
-        FROM contrats
-        """).fetchone()
+        # Compteurs et montants : lecture de la ligne kpi_snapshot (clé primaire)
+        kpi = lire_kpi(conn)
         
-        # Calculer le montant encaissé depuis la table paiements
-        montant_encaisse = conn.execute("""
-        SELECT COALESCE(SUM(montant), 0) as total_encaisse
-        FROM paiements
-        """).fetchone()['total_encaisse']
+        # Contrats actifs déjà échus et contrats expirant dans les 30 prochains jours
+        # (plages sur date_fin brute -> parcours de l'index (statut, date_fin))
+        debut, fin = bornes_expiration(30)
+        contrats_expires = conn.execute("""
+        SELECT COUNT(*) as count
+        FROM contrats 
+        WHERE statut = 'Actif' AND date_fin < ?
+        """, (debut,)).fetchone()['count']
         
-        # Contrats expirant dans les 30 prochains jours
         contrats_bientot_expires = conn.execute("""
         SELECT COUNT(*) as count
         FROM contrats 
         WHERE statut = 'Actif' 
-          AND julianday(date_fin) - julianday('now') BETWEEN 0 AND 30
-        """).fetchone()['count']
+          AND date_fin > ? AND date_fin <= ?
+        """, (debut, fin)).fetchone()['count']
         
         return {
-            'clients_physiques': clients_physiques,
-            'clients_moraux': clients_moraux,
-            'total_clients': clients_physiques + clients_moraux,
-            'total_contrats': stats_contrats['total_contrats'],
-            'contrats_actifs': stats_contrats['contrats_actifs'],
-            'contrats_resilies': stats_contrats['contrats_resilies'],
-            'contrats_expires': stats_contrats['contrats_expires'],
+            'clients_physiques': kpi['nb_clients_physiques'],
+            'clients_moraux': kpi['nb_clients_moraux'],
+            'total_clients': kpi['nb_clients_physiques'] + kpi['nb_clients_moraux'],
+            'total_contrats': kpi['nb_contrats'],
+            'contrats_actifs': kpi['nb_contrats_actifs'],
+            'contrats_resilies': kpi['nb_contrats_resilies'],
+            'contrats_expires': contrats_expires,
             'contrats_bientot_expires': contrats_bientot_expires,
-            'ca_total': stats_contrats['ca_total_potentiel'],
-            'ca_mensuel_actif': stats_contrats['ca_mensuel_actif'],
-            'montant_encaisse': montant_encaisse
+            'ca_total': kpi['ca_total_actif'],
+            'ca_mensuel_actif': kpi['ca_mensuel_actif'],
+            'montant_encaisse': kpi['montant_encaisse']
         }
         
     except Exception as e:
@@ -1433,93 +3342,94 @@ def get_statistiques() -> Dict:
     finally:
         conn.close()
 
+@invalide_cache('factures')
 def ajouter_facture(facture_data):
     """Ajouter une nouvelle facture"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO factures (
-                numero_facture, contrat_id, client_id, type_facture,
-                date_facture, date_echeance, periode_debut, periode_fin,
-                montant_ht, taux_tva, montant_tva, montant_ttc,
-                description, mode_reglement, statut, date_creation
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            facture_data['numero_facture'],
-            facture_data['contrat_id'],
-            facture_data['client_id'],
-            facture_data['type_facture'],
-            facture_data['date_facture'],
-            facture_data['date_echeance'],
-            facture_data.get('periode_debut'),
-            facture_data.get('periode_fin'),
-            facture_data['montant_ht'],
-            facture_data['taux_tva'],
-            facture_data['montant_tva'],
-            facture_data['montant_ttc'],
-            facture_data.get('description'),
-            facture_data['mode_reglement'],
-            facture_data['statut'],
-            facture_data['date_creation']
-        ))
+        with db_connection() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute("""
+                INSERT INTO factures (
+                    numero_facture, contrat_id, client_id, type_facture,
+                    date_facture, date_echeance, periode_debut, periode_fin,
+                    montant_ht, taux_tva, montant_tva, montant_ttc,
+                    description, mode_reglement, statut, date_creation
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                facture_data['numero_facture'],
+                facture_data['contrat_id'],
+                facture_data['client_id'],
+                facture_data['type_facture'],
+                facture_data['date_facture'],
+                facture_data['date_echeance'],
+                facture_data.get('periode_debut'),
+                facture_data.get('periode_fin'),
+                facture_data['montant_ht'],
+                facture_data['taux_tva'],
+                facture_data['montant_tva'],
+                facture_data['montant_ttc'],
+                facture_data.get('description'),
+                facture_data['mode_reglement'],
+                facture_data['statut'],
+                facture_data['date_creation']
+            ))
         
-        conn.commit()
-        conn.close()
-        return True
+            conn.commit()
+            return True
     except Exception as e:
         print(f"Erreur lors de l'ajout de la facture: {e}")
         return False
 
+@cache_lecture('factures', *TABLES_CLIENTS)
 def get_all_factures():
     """Récupérer toutes les factures avec les noms des clients"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT f.*, 
-                   COALESCE(cp.nom || ' ' || cp.prenom, cm.raison_sociale) as client_nom
-            FROM factures f
-            LEFT JOIN clients_physiques cp ON f.client_id = cp.id
-            LEFT JOIN clients_moraux cm ON f.client_id = cm.id
-            ORDER BY f.date_facture DESC
-        """)
-        
-        factures = []
-        for row in cursor.fetchall():
-            factures.append(dict(row))
-        
-        conn.close()
-        return factures
+        with db_connection() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute("""
+                SELECT f.*, 
+                       COALESCE(cp.nom || ' ' || cp.prenom, cm.raison_sociale) as client_nom
+                FROM factures f
+                LEFT JOIN clients_physiques cp ON f.client_id = cp.id
+                LEFT JOIN clients_moraux cm ON f.client_id = cm.id
+                ORDER BY f.date_facture DESC
+            """)
+        
+            factures = []
+            for row in cursor.fetchall():
+                factures.append(dict(row))
+        
+            return factures
     except Exception as e:
         print(f"Erreur lors de la récupération des factures: {e}")
         return []
 
+@cache_lecture('factures', *TABLES_CLIENTS)
 def get_facture_by_id(facture_id):
     """Récupérer une facture par son ID"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with db_connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT f.*, 
-                   COALESCE(cp.nom || ' ' || cp.prenom, cm.raison_sociale) as client_nom
-            FROM factures f
-            LEFT JOIN clients_physiques cp ON f.client_id = cp.id
-            LEFT JOIN clients_moraux cm ON f.client_id = cm.id
-            WHERE f.id = ?
-        """, (facture_id,))
+            cursor.execute("""
+                SELECT f.*, 
+                       COALESCE(cp.nom || ' ' || cp.prenom, cm.raison_sociale) as client_nom
+                FROM factures f
+                LEFT JOIN clients_physiques cp ON f.client_id = cp.id
+                LEFT JOIN clients_moraux cm ON f.client_id = cm.id
+                WHERE f.id = ?
+            """, (facture_id,))
         
-        row = cursor.fetchone()
-        conn.close()
+            row = cursor.fetchone()
         
-        return dict(row) if row else None
+            return dict(row) if row else None
     except Exception as e:
         print(f"Erreur lors de la récupération de la facture: {e}")
         return None
 
+@invalide_cache('factures')
 def modifier_facture(facture_id: int, modifications: dict) -> bool:
     """
     Modifie une facture existante avec validation complète et gestion d'erreurs améliorée
@@ -1734,71 +3644,21 @@ def diagnostiquer_modification_facture(facture_id: int):
         if conn:
             conn.close()
 
+@invalide_cache('factures')
 def supprimer_facture(facture_id):
     """Supprimer une facture"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with db_connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("DELETE FROM factures WHERE id = ?", (facture_id,))
+            cursor.execute("DELETE FROM factures WHERE id = ?", (facture_id,))
         
-        conn.commit()
-        conn.close()
-        return True
+            conn.commit()
+            return True
     except Exception as e:
         print(f"Erreur lors de la suppression de la facture: {e}")
         return False
 
-def update_db_structure():
-    """Met à jour la structure de la base de données pour correspondre aux besoins"""
-    conn = get_db_connection()
-    
-    try:
-        # Ajouter les colonnes manquantes pour clients_physiques si elles n'existent pas
-        try:
-            conn.execute("ALTER TABLE clients_physiques ADD COLUMN sexe TEXT CHECK(sexe IN ('M', 'F', 'Autre'))")
-        except sqlite3.OperationalError:
-            pass  # Colonne existe déjà
-        
-        # Mettre à jour la table clients_moraux pour correspondre aux nouveaux champs
-        try:
-            conn.execute("ALTER TABLE clients_moraux ADD COLUMN rc TEXT")
-        except sqlite3.OperationalError:
-            pass
-        
-        try:
-            conn.execute("ALTER TABLE clients_moraux ADD COLUMN forme_juridique TEXT")
-        except sqlite3.OperationalError:
-            pass
-        
-        try:
-            conn.execute("ALTER TABLE clients_moraux ADD COLUMN rep_nom TEXT")
-        except sqlite3.OperationalError:
-            pass
-        
-        try:
-            conn.execute("ALTER TABLE clients_moraux ADD COLUMN rep_prenom TEXT")
-        except sqlite3.OperationalError:
-            pass
-        
-        try:
-            conn.execute("ALTER TABLE clients_moraux ADD COLUMN rep_cin TEXT")
-        except sqlite3.OperationalError:
-            pass
-        
-        try:
-            conn.execute("ALTER TABLE clients_moraux ADD COLUMN rep_qualite TEXT")
-        except sqlite3.OperationalError:
-            pass
-        
-        conn.commit()
-        
-    except Exception as e:
-        print(f"Erreur mise à jour structure DB: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
-
 # CORRECTION 5: Fonction utilitaire pour déboguer la base de données
 def debug_database():
     """Fonction de débogage pour vérifier l'état de la base de données"""
@@ -1842,6 +3702,7 @@ def debug_database():
         conn.close()
 
 # CORRECTION 6: Fonction de nettoyage des données orphelines
+@invalide_cache()
 def nettoyer_donnees_orphelines():
     """Nettoie les données orphelines dans la base de données"""
     conn = get_db_connection()
@@ -1896,149 +3757,9 @@ def nettoyer_donnees_orphelines():
     finally:
         conn.close()
 
-def migrate_existing_data():
-    """Migrer les données existantes pour ajouter client_type"""
-    try:
-        conn = get_db_connection()
-        
-        # Mettre à jour les contrats existants sans client_type
-        conn.execute("""
-            UPDATE contrats 
-            SET client_type = 'physique' 
-            WHERE client_type IS NULL 
-            AND client_id IN (SELECT id FROM clients_physiques)
-        """)
-        
-        conn.execute("""
-            UPDATE contrats 
-            SET client_type = 'moral' 
-            WHERE client_type IS NULL 
-            AND client_id IN (SELECT id FROM clients_moraux)
-        """)
-        
-        # Même chose pour les factures
-        conn.execute("""
-            UPDATE factures 
-            SET client_type = 'physique' 
-            WHERE client_type IS NULL 
-            AND client_id IN (SELECT id FROM clients_physiques)
-        """)
-        
-        conn.execute("""
-            UPDATE factures 
-            SET client_type = 'moral' 
-            WHERE client_type IS NULL 
-            AND client_id IN (SELECT id FROM clients_moraux)
-        """)
-        
-        conn.commit()
-        conn.close()
-        
-        print("Migration des données terminée avec succès")
-        return True
-        
-    except Exception as e:
-        print(f"Erreur migration: {e}")
-        return False
-def migrate_existing_data():
-    """Migrer les données existantes pour ajouter client_type"""
-    try:
-        conn = get_db_connection()
-        
-        # Mettre à jour les contrats existants sans client_type
-        conn.execute("""
-            UPDATE contrats 
-            SET client_type = 'physique' 
-            WHERE client_type IS NULL 
-            AND client_id IN (SELECT id FROM clients_physiques)
-        """)
-        
-        conn.execute("""
-            UPDATE contrats 
-            SET client_type = 'moral' 
-            WHERE client_type IS NULL 
-            AND client_id IN (SELECT id FROM clients_moraux)
-        """)
-        
-        # Même chose pour les factures
-        conn.execute("""
-            UPDATE factures 
-            SET client_type = 'physique' 
-            WHERE client_type IS NULL 
-            AND client_id IN (SELECT id FROM clients_physiques)
-        """)
-        
-        conn.execute("""
-            UPDATE factures 
-            SET client_type = 'moral' 
-            WHERE client_type IS NULL 
-            AND client_id IN (SELECT id FROM clients_moraux)
-        """)
-        
-        conn.commit()
-        conn.close()
-        
-        print("Migration des données terminée avec succès")
-        return True
-        
-    except Exception as e:
-        print(f"Erreur migration: {e}")
-        return False
-    
-# SOLUTION 1: Modifier la structure de la base de données pour éviter les conflits d'ID
-
-def update_db_structure_with_client_type():
-    """
-    Met à jour la structure de la base de données pour inclure client_type
-    dans toutes les tables de liaison
-    """
-    conn = get_db_connection()
-    
-    try:
-        # 1. Ajouter client_type à la table factures si elle n'existe pas
-        try:
-            conn.execute("ALTER TABLE factures ADD COLUMN client_type TEXT CHECK(client_type IN ('physique', 'moral'))")
-            print("Colonne client_type ajoutée à la table factures")
-        except sqlite3.OperationalError as e:
-            if "duplicate column name" not in str(e):
-                print(f"Erreur ajout colonne client_type à factures: {e}")
-        
-        # 2. Mettre à jour les factures existantes pour définir le client_type
-        # Identifier les factures liées aux clients physiques
-        conn.execute("""
-            UPDATE factures 
-            SET client_type = 'physique' 
-            WHERE client_type IS NULL 
-            AND client_id IN (SELECT id FROM clients_physiques)
-        """)
-        
-        # Identifier les factures liées aux clients moraux
-        conn.execute("""
-            UPDATE factures 
-            SET client_type = 'moral' 
-            WHERE client_type IS NULL 
-            AND client_id IN (SELECT id FROM clients_moraux)
-        """)
-        
-        # 3. Créer un index composite pour améliorer les performances
-        try:
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_factures_client_composite ON factures(client_id, client_type)")
-            print("Index composites créés")
-        except Exception as e:
-            print(f"Erreur création index: {e}")
-        
-        conn.commit()
-        print("Mise à jour de la structure terminée avec succès")
-        
-    except Exception as e:
-        print(f"Erreur mise à jour structure: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
-
-
 # SOLUTION 2: Fonction pour obtenir les informations d'un client de manière sécurisée
 
+@cache_lecture(*TABLES_CLIENTS)
 def get_client_info(client_id: int, client_type: str) -> dict:
     """
     Récupère les informations d'un client spécifique selon son type
@@ -2080,8 +3801,70 @@ def get_client_info(client_id: int, client_type: str) -> dict:
         conn.close()
 
 
+# Statuts de facture comptés dans le solde restant dû d'un client
+STATUTS_IMPAYES = ('En attente', 'En retard', 'Partiellement payée')
+
+@cache_lecture(*TABLES_CLIENTS, 'contrats', 'factures')
+def get_client_detail(client_id: int, client_type: str) -> Optional[Dict]:
+    """
+    Fiche d'un client en une seule requête par clé primaire : toutes ses
+    colonnes, plus nb_contrats, nb_factures, solde_du (factures impayées TTC)
+    et derniere_facture ({numero_facture, date_facture, montant_ttc, statut} ou None).
+    
+    Les factures sans client_type (anciennes données) sont rattachées au client.
+    Retourne None si le client n'existe pas.
+    """
+    table = {'physique': 'clients_physiques', 'moral': 'clients_moraux'}.get(client_type)
+    if table is None:
+        return None
+    
+    statuts = ", ".join(f":statut{i}" for i in range(len(STATUTS_IMPAYES)))
+    factures_client = "f.client_id = c.id AND COALESCE(f.client_type, :type) = :type"
+    conn = get_db_connection()
+    try:
+        row = conn.execute(f"""
+            SELECT c.*,
+                   (SELECT COUNT(*) FROM contrats ct
+                    WHERE ct.client_id = c.id AND ct.client_type = :type) as nb_contrats,
+                   (SELECT COUNT(*) FROM factures f WHERE {factures_client}) as nb_factures,
+                   (SELECT COALESCE(SUM(f.montant_ttc), 0) FROM factures f
+                    WHERE {factures_client} AND f.statut IN ({statuts})) as solde_du,
+                   df.numero_facture as derniere_facture_numero,
+                   df.date_facture as derniere_facture_date,
+                   df.montant_ttc as derniere_facture_montant,
+                   df.statut as derniere_facture_statut
+            FROM {table} c
+            LEFT JOIN factures df ON df.id = (
+                SELECT f.id FROM factures f WHERE {factures_client}
+                ORDER BY f.date_facture DESC, f.id DESC LIMIT 1
+            )
+            WHERE c.id = :id
+        """, {'id': client_id, 'type': client_type,
+              **{f"statut{i}": statut for i, statut in enumerate(STATUTS_IMPAYES)}}).fetchone()
+        
+        if row is None:
+            return None
+        
+        client = dict(row)
+        derniere = {
+            'numero_facture': client.pop('derniere_facture_numero'),
+            'date_facture': client.pop('derniere_facture_date'),
+            'montant_ttc': client.pop('derniere_facture_montant'),
+            'statut': client.pop('derniere_facture_statut'),
+        }
+        client['derniere_facture'] = derniere if derniere['numero_facture'] else None
+        return client
+        
+    except Exception as e:
+        print(f"Erreur récupération fiche client: {e}")
+        return None
+    finally:
+        conn.close()
+
+
 # SOLUTION 3: Fonction corrigée pour ajouter une facture avec validation
 
+@invalide_cache('factures')
 def ajouter_facture_corrigee(facture_data: Dict) -> bool:
     """
     Ajoute une nouvelle facture avec validation stricte du client
@@ -2163,213 +3946,671 @@ def ajouter_facture_corrigee(facture_data: Dict) -> bool:
         conn.close()
 
 
+# Facturation périodique : génère en un lot les factures mensuelles des
+# contrats actifs sur un mois. La sélection, la numérotation et l'insertion
+# se font dans une seule transaction BEGIN IMMEDIATE : deux lancements
+# simultanés sont sérialisés et un contrat dont le mois est déjà couvert
+# par une facture non annulée n'est jamais refacturé : facture dont la
+# période chevauche le mois, ou facture sans période datée dans le mois
+# (factures saisies à la main).
+SQL_FACTURATION_CONTRATS = """
+SELECT c.id, c.numero_contrat, c.client_id, c.client_type, c.type_service, c.montant_mensuel,
+       CASE WHEN c.client_type = 'physique' THEN cp.nom || ' ' || cp.prenom
+            ELSE cm.raison_sociale END as client_nom,
+       EXISTS (
+           SELECT 1 FROM factures f
+           WHERE f.contrat_id = c.id AND f.statut != 'Annulée'
+             AND CASE WHEN NULLIF(f.periode_debut, '') IS NULL OR NULLIF(f.periode_fin, '') IS NULL
+                      THEN substr(f.date_facture, 1, 10) BETWEEN :debut AND :fin
+                      ELSE f.periode_debut <= :fin AND f.periode_fin >= :debut END
+       ) as deja_facture
+FROM contrats c
+LEFT JOIN clients_physiques cp ON c.client_id = cp.id AND c.client_type = 'physique'
+LEFT JOIN clients_moraux cm ON c.client_id = cm.id AND c.client_type = 'moral'
+WHERE c.statut = 'Actif' AND c.date_fin >= :debut AND substr(c.date_debut, 1, 10) <= :fin
+ORDER BY c.id
+"""
+
+def _numeros_factures(conn, mois: str, nombre: int) -> List[str]:
+    """
+    Alloue nombre numéros FACT-AAAAMM-NNNNN consécutifs dans la séquence du
+    mois (table sequences, créée à la première facture du mois)
+    """
+    nom = f"factures_{mois}"
+    dernier = conn.execute("""
+        INSERT INTO sequences (nom, valeur) VALUES (?, ?)
+        ON CONFLICT(nom) DO UPDATE SET valeur = valeur + excluded.valeur
+        RETURNING valeur
+    """, (nom, nombre)).fetchall()[0][0]
+    prefixe = f"FACT-{mois.replace('-', '')}"
+    return [f"{prefixe}-{numero:05d}" for numero in range(dernier - nombre + 1, dernier + 1)]
+
+@invalide_cache('factures')
+def lancer_facturation(mois: str, date_facture: Optional[str] = None, delai_paiement: int = 30,
+                       taux_tva: float = 20.0, mode_reglement: str = "Virement bancaire",
+                       simulation: bool = False) -> Dict:
+    """
+    Facturation mensuelle de tous les contrats actifs sur le mois.
+    
+    Args:
+        mois: mois facturé (AAAA-MM)
+        date_facture: date des factures (premier jour du mois par défaut)
+        delai_paiement: jours entre la date de facture et l'échéance
+        taux_tva: taux appliqué par calculer_tva
+        simulation: True pour un aperçu, rien n'est écrit
+    
+    Returns:
+        Dict: factures (lignes générées ou prévues), nb_factures, deja_facturees
+        (contrats dont le mois est déjà facturé), total_ht / total_tva / total_ttc,
+        durees_ms par étape (selection, calcul, insertion, total) et erreur
+    """
+    from utils import calculer_tva, obtenir_mois_francais
+    
+    rapport = {'mois': mois, 'simulation': simulation, 'factures': [], 'nb_factures': 0,
+               'deja_facturees': 0, 'total_ht': 0.0, 'total_tva': 0.0, 'total_ttc': 0.0,
+               'durees_ms': {}, 'erreur': None}
+    debut_total = time.perf_counter()
+    
+    try:
+        annee, numero_mois = (int(partie) for partie in mois.split('-'))
+        periode_debut, mois_suivant = bornes_mois(annee, numero_mois)
+        periode_fin = (date.fromisoformat(mois_suivant) - timedelta(days=1)).isoformat()
+        date_facture = date_facture or periode_debut
+        date_echeance = (date.fromisoformat(date_facture) + timedelta(days=delai_paiement)).isoformat()
+        libelle_mois = f"{obtenir_mois_francais(numero_mois)} {annee}"
+        
+        with db_connection() as conn:
+            if not simulation:
+                conn.execute("BEGIN IMMEDIATE")
+            
+            debut = time.perf_counter()
+            contrats = conn.execute(SQL_FACTURATION_CONTRATS, {'debut': periode_debut, 'fin': periode_fin}).fetchall()
+            rapport['durees_ms']['selection'] = (time.perf_counter() - debut) * 1000
+            
+            debut = time.perf_counter()
+            a_facturer = [contrat for contrat in contrats if not contrat['deja_facture']]
+            rapport['deja_facturees'] = len(contrats) - len(a_facturer)
+            if simulation:
+                numeros = [None] * len(a_facturer)
+            else:
+                numeros = _numeros_factures(conn, mois, len(a_facturer)) if a_facturer else []
+            
+            aujourd_hui = str(datetime.now().date())
+            for contrat, numero_facture in zip(a_facturer, numeros):
+                montants = calculer_tva(contrat['montant_mensuel'] or 0, taux_tva)
+                rapport['factures'].append({
+                    'numero_facture': numero_facture,
+                    'contrat_id': contrat['id'],
+                    'numero_contrat': contrat['numero_contrat'],
+                    'client_id': contrat['client_id'],
+                    'client_type': contrat['client_type'],
+                    'client_nom': contrat['client_nom'],
+                    'type_facture': 'Mensuelle',
+                    'date_facture': date_facture,
+                    'date_echeance': date_echeance,
+                    'periode_debut': periode_debut,
+                    'periode_fin': periode_fin,
+                    'montant_ht': montants['montant_ht'],
+                    'taux_tva': montants['taux_tva'],
+                    'montant_tva': montants['montant_tva'],
+                    'montant_ttc': montants['montant_ttc'],
+                    'description': f"Domiciliation {libelle_mois} - {contrat['type_service']}",
+                    'mode_reglement': mode_reglement,
+                    'statut': 'En attente',
+                    'date_creation': aujourd_hui,
+                })
+            rapport['durees_ms']['calcul'] = (time.perf_counter() - debut) * 1000
+            
+            debut = time.perf_counter()
+            if not simulation and rapport['factures']:
+                colonnes = ('numero_facture', 'contrat_id', 'client_id', 'client_type', 'type_facture',
+                            'date_facture', 'date_echeance', 'periode_debut', 'periode_fin',
+                            'montant_ht', 'taux_tva', 'montant_tva', 'montant_ttc',
+                            'description', 'mode_reglement', 'statut', 'date_creation')
+                conn.executemany(f"""
+                    INSERT INTO factures ({', '.join(colonnes)})
+                    VALUES ({', '.join('?' * len(colonnes))})
+                """, [tuple(facture[c] for c in colonnes) for facture in rapport['factures']])
+            if not simulation:
+                conn.commit()
+            rapport['durees_ms']['insertion'] = (time.perf_counter() - debut) * 1000
+        
+        rapport['nb_factures'] = len(rapport['factures'])
+        for cle in ('montant_ht', 'montant_tva', 'montant_ttc'):
+            rapport[cle.replace('montant', 'total')] = round(sum((f[cle] for f in rapport['factures']), 0.0), 2)
+    
+    except Exception as e:
+        rapport['erreur'] = str(e)
+        rapport['factures'] = []
+        print(f"Erreur facturation {mois}: {e}")
+    
+    rapport['durees_ms']['total'] = (time.perf_counter() - debut_total) * 1000
+    return rapport
+
+
+# Passage des factures échues en 'En retard'. Le statut est enregistré en
+# base : listes, compteurs et rapports filtrent sur la colonne statut au lieu
+# de recomparer les échéances à chaque affichage. Le traitement tourne au
+# démarrage puis une fois par jour (executer_taches_quotidiennes) et à la
+# demande depuis la facturation.
+TACHE_FACTURES_EN_RETARD = 'factures_en_retard'
+SQL_FACTURES_EN_RETARD = "UPDATE factures SET statut = 'En retard' WHERE statut = 'En attente' AND date_echeance < ?"
+
+_taches_verifiees: Dict[str, str] = {}
+_verrou_taches = threading.Lock()
+
+@invalide_cache('factures')
+def marquer_factures_en_retard() -> Optional[int]:
+    """
+    Passe en 'En retard' les factures 'En attente' dont l'échéance est dépassée
+    (un UPDATE sur l'index (statut, date_echeance)) et enregistre l'exécution
+    dans la table taches. Retourne le nombre de factures modifiées, None en cas d'erreur.
+    """
+    debut = time.perf_counter()
+    try:
+        with db_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            nombre = conn.execute(SQL_FACTURES_EN_RETARD, (date.today().isoformat(),)).rowcount
+            conn.execute("""
+                INSERT INTO taches (nom, derniere_execution, duree_ms, lignes_modifiees)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(nom) DO UPDATE SET derniere_execution = excluded.derniere_execution,
+                    duree_ms = excluded.duree_ms, lignes_modifiees = excluded.lignes_modifiees
+            """, (TACHE_FACTURES_EN_RETARD, datetime.now().isoformat(timespec='seconds'),
+                  (time.perf_counter() - debut) * 1000, nombre))
+            conn.commit()
+            return nombre
+    except Exception as e:
+        print(f"Erreur passage des factures en retard: {e}")
+        return None
+
+def get_derniere_execution(nom: str) -> Optional[Dict]:
+    """Dernière exécution d'un traitement périodique : {derniere_execution, duree_ms, lignes_modifiees}"""
+    conn = get_db_connection()
+    try:
+        row = conn.execute(
+            "SELECT derniere_execution, duree_ms, lignes_modifiees FROM taches WHERE nom = ?", (nom,)
+        ).fetchone()
+        return dict(row) if row else None
+    except Exception as e:
+        print(f"Erreur lecture de la tâche {nom}: {e}")
+        return None
+    finally:
+        conn.close()
+
+def executer_taches_quotidiennes():
+    """
+    Lance les traitements quotidiens qui n'ont pas encore tourné aujourd'hui.
+    
+    Appelée à chaque exécution d'app.py : une fois la vérification faite pour
+    la journée, elle se limite à une comparaison de dates en mémoire.
+    """
+    aujourd_hui = date.today().isoformat()
+    if _taches_verifiees.get(DB_PATH) == aujourd_hui:
+        return
+    
+    with _verrou_taches:
+        if _taches_verifiees.get(DB_PATH) == aujourd_hui:
+            return
+        
+        derniere = get_derniere_execution(TACHE_FACTURES_EN_RETARD)
+        if derniere and derniere['derniere_execution'][:10] >= aujourd_hui:
+            _taches_verifiees[DB_PATH] = aujourd_hui
+            return
+        
+        nombre = marquer_factures_en_retard()
+        if nombre is not None:
+            _taches_verifiees[DB_PATH] = aujourd_hui
+            if nombre:
+                print(f"{nombre} facture(s) passée(s) en retard")
+
 # SOLUTION 4: Fonction corrigée pour récupérer toutes les factures
 
+@cache_lecture('factures', *TABLES_CLIENTS)
 def get_all_factures_corrigee():
     """
     Récupère toutes les factures avec les noms corrects selon le type de client
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+        
+            # Requête avec jointure conditionnelle basée sur client_type
+            cursor.execute("""
+                SELECT f.*, 
+                       CASE 
+                           WHEN f.client_type = 'physique' THEN cp.nom || ' ' || cp.prenom
+                           WHEN f.client_type = 'moral' THEN cm.raison_sociale
+                           ELSE 'Client inconnu'
+                       END as client_nom,
+                       CASE 
+                           WHEN f.client_type = 'physique' THEN cp.cin
+                           WHEN f.client_type = 'moral' THEN cm.ice
+                           ELSE NULL
+                       END as client_identifiant,
+                       CASE 
+                           WHEN f.client_type = 'physique' THEN cp.telephone
+                           WHEN f.client_type = 'moral' THEN cm.telephone
+                           ELSE NULL
+                       END as client_telephone
+                FROM factures f
+                LEFT JOIN clients_physiques cp ON f.client_id = cp.id AND f.client_type = 'physique'
+                LEFT JOIN clients_moraux cm ON f.client_id = cm.id AND f.client_type = 'moral'
+                ORDER BY f.date_facture DESC
+            """)
+        
+            factures = []
+            for row in cursor.fetchall():
+                facture_dict = dict(row)
+                # Ajouter une vérification de cohérence
+                if not facture_dict['client_nom'] or facture_dict['client_nom'] == 'Client inconnu':
+                    print(f"ATTENTION: Facture {facture_dict['numero_facture']} - Client introuvable (ID: {facture_dict['client_id']}, Type: {facture_dict['client_type']})")
+                factures.append(facture_dict)
+        
+            return factures
+    except Exception as e:
+        print(f"Erreur lors de la récupération des factures: {e}")
+        return []
+
+# Page de factures (get_factures_page), même principe que SQL_CONTRATS_PAGE
+JOINTURES_CLIENTS_FACTURES = """
+LEFT JOIN clients_physiques cp ON f.client_id = cp.id AND f.client_type = 'physique'
+LEFT JOIN clients_moraux cm ON f.client_id = cm.id AND f.client_type = 'moral'
+"""
+SQL_FACTURES_PAGE = """
+SELECT f.*, 
+       CASE 
+           WHEN f.client_type = 'physique' THEN cp.nom || ' ' || cp.prenom
+           WHEN f.client_type = 'moral' THEN cm.raison_sociale
+           ELSE 'Client inconnu'
+       END as client_nom,
+       CASE 
+           WHEN f.client_type = 'physique' THEN cp.cin
+           WHEN f.client_type = 'moral' THEN cm.ice
+           ELSE NULL
+       END as client_identifiant,
+       CASE 
+           WHEN f.client_type = 'physique' THEN cp.telephone
+           WHEN f.client_type = 'moral' THEN cm.telephone
+           ELSE NULL
+       END as client_telephone
+FROM factures f
+{jointures}
+{where}
+ORDER BY COALESCE(f.date_facture, '') DESC, f.id DESC
+LIMIT ?
+"""
+CURSEUR_FACTURES_PAGE = "COALESCE(f.date_facture, '') <= ? AND (COALESCE(f.date_facture, ''), f.id) < (?, ?)"
+
+@cache_lecture('factures', *TABLES_CLIENTS)
+def get_factures_page(curseur: Optional[tuple] = None, limite: int = TAILLE_PAGE,
+                      avec_total: bool = True, filtres: Optional[Dict] = None) -> Dict:
+    """
+    Page de factures, de la plus récente à la plus ancienne.
+    Pagination keyset sur (date_facture, id), même format de retour que get_contrats_page.
+    filtres : arguments de construire_filtres (statut, type_, date_min, date_max, recherche...).
+    """
+    conn = get_db_connection()
+    try:
+        conditions, params = construire_filtres('factures', **(filtres or {}))
+        jointures = JOINTURES_CLIENTS_FACTURES
+        conditions_page, params_page = list(conditions), list(params)
+        if curseur is not None:
+            conditions_page.append(CURSEUR_FACTURES_PAGE)
+            params_page.extend([curseur[0], curseur[0], curseur[1]])
+        where = ("WHERE " + " AND ".join(conditions_page)) if conditions_page else ""
+        
+        cursor = conn.execute(SQL_FACTURES_PAGE.format(jointures=jointures, where=where), params_page + [limite + 1])
+        lignes = [dict(row) for row in cursor.fetchall()]
+        
+        total = None
+        if avec_total:
+            where_total = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+            total = conn.execute(
+                f"SELECT COUNT(*) FROM factures f {jointures if (filtres or {}).get('recherche') else ''} {where_total}",
+                params
+            ).fetchone()[0]
+        return _resultat_page(lignes, limite, lambda ligne: (ligne['date_facture'] or '', ligne['id']), total)
         
-        # Requête avec jointure conditionnelle basée sur client_type
-        cursor.execute("""
-            SELECT f.*, 
-                   CASE 
-                       WHEN f.client_type = 'physique' THEN cp.nom || ' ' || cp.prenom
-                       WHEN f.client_type = 'moral' THEN cm.raison_sociale
-                       ELSE 'Client inconnu'
-                   END as client_nom,
-                   CASE 
-                       WHEN f.client_type = 'physique' THEN cp.cin
-                       WHEN f.client_type = 'moral' THEN cm.ice
-                       ELSE NULL
-                   END as client_identifiant,
-                   CASE 
-                       WHEN f.client_type = 'physique' THEN cp.telephone
-                       WHEN f.client_type = 'moral' THEN cm.telephone
-                       ELSE NULL
-                   END as client_telephone
-            FROM factures f
+    except Exception as e:
+        print(f"Erreur pagination factures: {e}")
+        return {'lignes': [], 'total': 0, 'curseur_suivant': None}
+    finally:
+        conn.close()
+
+@cache_lecture('factures', *TABLES_CLIENTS)
+def get_compteurs_factures(filtres: Optional[Dict] = None) -> Dict:
+    """
+    Nombre de factures par état enregistré, restreint aux factures qui
+    satisfont les filtres éventuels.
+    """
+    conn = get_db_connection()
+    try:
+        conditions, params = construire_filtres('factures', **(filtres or {}))
+        jointures = ""
+        if (filtres or {}).get('recherche'):
+            jointures = """
             LEFT JOIN clients_physiques cp ON f.client_id = cp.id AND f.client_type = 'physique'
             LEFT JOIN clients_moraux cm ON f.client_id = cm.id AND f.client_type = 'moral'
-            ORDER BY f.date_facture DESC
-        """)
-        
-        factures = []
-        for row in cursor.fetchall():
-            facture_dict = dict(row)
-            # Ajouter une vérification de cohérence
-            if not facture_dict['client_nom'] or facture_dict['client_nom'] == 'Client inconnu':
-                print(f"ATTENTION: Facture {facture_dict['numero_facture']} - Client introuvable (ID: {facture_dict['client_id']}, Type: {facture_dict['client_type']})")
-            factures.append(facture_dict)
-        
+            """
+        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+        row = conn.execute(f"""
+        SELECT 
+            COUNT(*) as total,
+            COUNT(CASE WHEN f.statut = 'Payée' THEN 1 END) as payees,
+            COUNT(CASE WHEN f.statut = 'En attente' THEN 1 END) as en_attente,
+            COUNT(CASE WHEN f.statut = 'En retard' THEN 1 END) as en_retard
+        FROM factures f
+        {jointures}
+        {where}
+        """, params).fetchone()
+        return dict(row)
+    except Exception as e:
+        print(f"Erreur compteurs factures: {e}")
+        return {'total': 0, 'payees': 0, 'en_attente': 0, 'en_retard': 0}
+    finally:
         conn.close()
-        return factures
+
+@cache_lecture('factures')
+def get_revenu_mensuel(mois_debut: Optional[str] = None, mois_fin: Optional[str] = None,
+                       statuts: Optional[List[str]] = None, grouper_par: tuple = ('mois',)) -> List[Dict]:
+    """
+    Chiffre d'affaires lu dans monthly_revenue.
+    
+    mois_debut / mois_fin : bornes incluses au format 'YYYY-MM'
+    statuts : restreint aux statuts de facture donnés (ex. ['Payée'])
+    grouper_par : sous-ensemble de DIMENSIONS_REVENU ; () pour un total unique
+    
+    Retourne une ligne par groupe : dimensions + nb, montant_ht, montant_tva, montant_ttc.
+    """
+    dimensions = [d for d in grouper_par if d in DIMENSIONS_REVENU]
+    conditions, params = [], []
+    if mois_debut:
+        conditions.append("mois >= ?")
+        params.append(mois_debut)
+    if mois_fin:
+        conditions.append("mois <= ?")
+        params.append(mois_fin)
+    if statuts:
+        conditions.append(f"statut IN ({', '.join('?' * len(statuts))})")
+        params.extend(statuts)
+    
+    select = ", ".join(dimensions + [
+        "COALESCE(SUM(nb), 0) as nb",
+        "COALESCE(SUM(montant_ht), 0) as montant_ht",
+        "COALESCE(SUM(montant_tva), 0) as montant_tva",
+        "COALESCE(SUM(montant_ttc), 0) as montant_ttc",
+    ])
+    query = f"SELECT {select} FROM monthly_revenue"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if dimensions:
+        query += f" GROUP BY {', '.join(dimensions)} ORDER BY {', '.join(dimensions)}"
+    
+    conn = get_db_connection()
+    try:
+        return [dict(row) for row in conn.execute(query, params).fetchall()]
     except Exception as e:
-        print(f"Erreur lors de la récupération des factures: {e}")
+        print(f"Erreur lecture revenu mensuel: {e}")
         return []
+    finally:
+        conn.close()
 
-def migrer_contraintes_definitives():
+# Rapports par période : agrégats SQL bornés par dates (bornes passées en paramètres,
+# colonne brute comparée -> parcours des index de date). Les colonnes date_creation
+# pouvant contenir une heure, la borne haute est le lendemain de date_fin, exclu.
+def bornes_periode(date_debut: date, date_fin: date) -> tuple[str, str]:
+    """Bornes ISO [date_debut, date_fin + 1 jour) d'une période incluant date_fin"""
+    return date_debut.isoformat(), (date_fin + timedelta(days=1)).isoformat()
+
+@cache_lecture('factures')
+def get_synthese_factures(date_debut: date, date_fin: date) -> Dict:
     """
-    Migration complète pour modifier les contraintes CHECK
-    Cette fonction recrée les tables avec les nouvelles contraintes
+    Synthèse des factures émises sur la période : totaux, montants par statut
+    et chiffre d'affaires par mois.
     """
-    DB_PATH = os.path.join(os.path.dirname(__file__), "data", "domiciliation.db")
-    
+    debut, fin = bornes_periode(date_debut, date_fin)
+    conn = get_db_connection()
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        
-        print("Début de la migration des contraintes...")
-        
-        # ÉTAPE 1: Sauvegarder les données existantes des clients physiques
-        print("1. Sauvegarde des clients physiques...")
-        clients_physiques = conn.execute("SELECT * FROM clients_physiques").fetchall()
-        clients_physiques_data = [dict(row) for row in clients_physiques]
-        
-        # Nettoyer les données : remplacer 'Autre' par 'M'
-        for client in clients_physiques_data:
-            if client['sexe'] == 'Autre' or client['sexe'] is None:
-                client['sexe'] = 'M'
-        
-        print(f"   - {len(clients_physiques_data)} clients sauvegardés")
+        totaux = conn.execute("""
+        SELECT 
+            COUNT(*) as nb_factures,
+            COALESCE(SUM(montant_ttc), 0) as ca_ttc,
+            COALESCE(SUM(montant_ht), 0) as ca_ht,
+            COALESCE(SUM(montant_tva), 0) as tva,
+            COUNT(CASE WHEN statut = 'Payée' THEN 1 END) as nb_payees,
+            COALESCE(SUM(CASE WHEN statut = 'Payée' THEN montant_ttc END), 0) as ca_paye,
+            COALESCE(SUM(CASE WHEN statut IN ('En attente', 'En retard') THEN montant_ttc END), 0) as ca_attente
+        FROM factures
+        WHERE date_facture >= ? AND date_facture < ?
+        """, (debut, fin)).fetchone()
+        
+        par_statut = conn.execute("""
+        SELECT COALESCE(statut, 'Inconnu') as statut, COUNT(*) as nb,
+               COALESCE(SUM(montant_ttc), 0) as montant_ttc
+        FROM factures
+        WHERE date_facture >= ? AND date_facture < ?
+        GROUP BY statut
+        ORDER BY montant_ttc DESC
+        """, (debut, fin)).fetchall()
+        
+        par_mois = conn.execute("""
+        SELECT substr(date_facture, 1, 7) as mois,
+               COALESCE(SUM(montant_ttc), 0) as montant_ttc,
+               COALESCE(SUM(CASE WHEN statut = 'Payée' THEN montant_ttc END), 0) as montant_ttc_paye
+        FROM factures
+        WHERE date_facture >= ? AND date_facture < ?
+        GROUP BY mois
+        ORDER BY mois
+        """, (debut, fin)).fetchall()
+        
+        synthese = dict(totaux)
+        synthese['par_statut'] = [dict(row) for row in par_statut]
+        synthese['par_mois'] = [dict(row) for row in par_mois]
+        return synthese
         
-        # ÉTAPE 2: Sauvegarder les données des factures
-        print("2. Sauvegarde des factures...")
-        factures = conn.execute("SELECT * FROM factures").fetchall()
-        factures_data = [dict(row) for row in factures]
-        print(f"   - {len(factures_data)} factures sauvegardées")
+    except Exception as e:
+        print(f"Erreur synthèse factures: {e}")
+        return {'nb_factures': 0, 'ca_ttc': 0, 'ca_ht': 0, 'tva': 0, 'nb_payees': 0,
+                'ca_paye': 0, 'ca_attente': 0, 'par_statut': [], 'par_mois': []}
+    finally:
+        conn.close()
+
+@cache_lecture('contrats')
+def get_synthese_contrats(date_debut: date, date_fin: date) -> Dict:
+    """
+    Synthèse des contrats : compteurs globaux, répartitions par statut et par
+    type de service, nouveaux contrats de la période (total et par mois).
+    """
+    debut, fin = bornes_periode(date_debut, date_fin)
+    conn = get_db_connection()
+    try:
+        kpi = lire_kpi(conn)
         
-        # ÉTAPE 3: Supprimer les anciennes tables
-        print("3. Suppression des anciennes tables...")
-        conn.execute("DROP TABLE IF EXISTS clients_physiques_old")
-        conn.execute("DROP TABLE IF EXISTS factures_old")
+        par_statut = conn.execute("""
+        SELECT COALESCE(statut, 'Inconnu') as statut, COUNT(*) as nb
+        FROM contrats
+        GROUP BY statut
+        """).fetchall()
         
-        # Renommer les tables actuelles
-        conn.execute("ALTER TABLE clients_physiques RENAME TO clients_physiques_old")
-        conn.execute("ALTER TABLE factures RENAME TO factures_old")
+        par_type_service = conn.execute("""
+        SELECT COALESCE(type_service, 'Inconnu') as type_service, COUNT(*) as nb
+        FROM contrats
+        GROUP BY type_service
+        ORDER BY nb DESC
+        """).fetchall()
         
-        # ÉTAPE 4: Créer les nouvelles tables avec les bonnes contraintes
-        print("4. Création des nouvelles tables...")
+        nouveaux_par_mois = conn.execute("""
+        SELECT substr(date_creation, 1, 7) as mois, COUNT(*) as nb
+        FROM contrats
+        WHERE date_creation >= ? AND date_creation < ?
+        GROUP BY mois
+        ORDER BY mois
+        """, (debut, fin)).fetchall()
         
-        # Nouvelle table clients_physiques (sexe M/F seulement)
-        conn.execute("""
-        CREATE TABLE clients_physiques (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nom TEXT NOT NULL,
-            prenom TEXT NOT NULL,
-            sexe TEXT CHECK(sexe IN ('M', 'F')),
-            cin TEXT UNIQUE NOT NULL,
-            telephone TEXT NOT NULL,
-            email TEXT,
-            adresse TEXT,
-            date_naissance TEXT,
-            date_creation TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
+        return {
+            'total_contrats': kpi['nb_contrats'],
+            'contrats_actifs': kpi['nb_contrats_actifs'],
+            'ca_mensuel_actif': kpi['ca_mensuel_actif'],
+            'nouveaux': sum(row['nb'] for row in nouveaux_par_mois),
+            'par_statut': [dict(row) for row in par_statut],
+            'par_type_service': [dict(row) for row in par_type_service],
+            'nouveaux_par_mois': [dict(row) for row in nouveaux_par_mois]
+        }
         
-        # Nouvelle table factures avec plus d'options de statut
-        conn.execute("""
-        CREATE TABLE factures (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            numero_facture TEXT UNIQUE NOT NULL,
-            contrat_id INTEGER,
-            client_id INTEGER NOT NULL,
-            client_type TEXT DEFAULT 'physique',
-            type_facture TEXT DEFAULT 'Domiciliation',
-            date_facture TEXT NOT NULL,
-            date_echeance TEXT,
-            periode_debut TEXT,
-            periode_fin TEXT,
-            montant_ht REAL NOT NULL,
-            taux_tva REAL DEFAULT 20.0,
-            montant_tva REAL,
-            montant_ttc REAL NOT NULL,
-            description TEXT,
-            mode_reglement TEXT DEFAULT 'Virement',
-            statut TEXT DEFAULT 'En attente' CHECK(statut IN ('En attente', 'Payée', 'Annulée', 'En retard', 'Partiellement payée', 'Suspendue', 'Résiliée')),
-            date_creation TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (contrat_id) REFERENCES contrats(id),
-            FOREIGN KEY (client_id) REFERENCES clients_physiques(id)
+    except Exception as e:
+        print(f"Erreur synthèse contrats: {e}")
+        return {'total_contrats': 0, 'contrats_actifs': 0, 'ca_mensuel_actif': 0, 'nouveaux': 0,
+                'par_statut': [], 'par_type_service': [], 'nouveaux_par_mois': []}
+    finally:
+        conn.close()
+
+@cache_lecture(*TABLES_CLIENTS)
+def get_synthese_clients(date_debut: date, date_fin: date) -> Dict:
+    """Synthèse des clients : compteurs par type et nouveaux clients de la période par mois"""
+    debut, fin = bornes_periode(date_debut, date_fin)
+    conn = get_db_connection()
+    try:
+        kpi = lire_kpi(conn)
+        
+        nouveaux_par_mois = conn.execute("""
+        SELECT mois, COUNT(*) as nb
+        FROM (
+            SELECT substr(date_creation, 1, 7) as mois FROM clients_physiques
+            WHERE date_creation >= ? AND date_creation < ?
+            UNION ALL
+            SELECT substr(date_creation, 1, 7) as mois FROM clients_moraux
+            WHERE date_creation >= ? AND date_creation < ?
         )
-        """)
-        
-        # ÉTAPE 5: Réinsérer les données nettoyées
-        print("5. Réinsertion des données...")
-        
-        # Clients physiques
-        for client in clients_physiques_data:
-            conn.execute("""
-                INSERT INTO clients_physiques 
-                (id, nom, prenom, sexe, cin, telephone, email, adresse, date_naissance, date_creation)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                client['id'], client['nom'], client['prenom'], client['sexe'],
-                client['cin'], client['telephone'], client['email'], client['adresse'],
-                client['date_naissance'], client['date_creation']
-            ))
-        
-        # Factures (nettoyer les statuts invalides)
-        for facture in factures_data:
-            # Mapper les anciens statuts vers les nouveaux
-            statut_ancien = facture.get('statut', 'En attente')
-            if statut_ancien not in ['En attente', 'Payée', 'Annulée', 'En retard', 'Partiellement payée', 'Suspendue', 'Résiliée']:
-                statut_nouveau = 'En attente'  # Valeur par défaut pour les statuts invalides
-            else:
-                statut_nouveau = statut_ancien
-            
-            conn.execute("""
-                INSERT INTO factures 
-                (id, numero_facture, contrat_id, client_id, client_type, type_facture,
-                 date_facture, date_echeance, periode_debut, periode_fin,
-                 montant_ht, taux_tva, montant_tva, montant_ttc,
-                 description, mode_reglement, statut, date_creation)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                facture['id'], facture['numero_facture'], facture['contrat_id'],
-                facture['client_id'], facture.get('client_type', 'physique'), facture['type_facture'],
-                facture['date_facture'], facture['date_echeance'], facture['periode_debut'], facture['periode_fin'],
-                facture['montant_ht'], facture['taux_tva'], facture['montant_tva'], facture['montant_ttc'],
-                facture['description'], facture['mode_reglement'], statut_nouveau, facture['date_creation']
-            ))
-        
-        # ÉTAPE 6: Nettoyer les anciennes tables
-        print("6. Suppression des tables de sauvegarde...")
-        conn.execute("DROP TABLE clients_physiques_old")
-        conn.execute("DROP TABLE factures_old")
-        
-        conn.commit()
-        
-        print("Migration terminée avec succès!")
-        print(f"- Clients physiques: {len(clients_physiques_data)} migrés")
-        print(f"- Factures: {len(factures_data)} migrées")
-        print("- Contrainte sexe: M/F seulement")
-        print("- Nouveaux statuts factures: En attente, Payée, Annulée, En retard, Partiellement payée, Suspendue, Résiliée")
+        GROUP BY mois
+        ORDER BY mois
+        """, (debut, fin, debut, fin)).fetchall()
         
-        return True
+        return {
+            'clients_physiques': kpi['nb_clients_physiques'],
+            'clients_moraux': kpi['nb_clients_moraux'],
+            'total_clients': kpi['nb_clients_physiques'] + kpi['nb_clients_moraux'],
+            'nouveaux': sum(row['nb'] for row in nouveaux_par_mois),
+            'nouveaux_par_mois': [dict(row) for row in nouveaux_par_mois]
+        }
         
     except Exception as e:
-        print(f"Erreur pendant la migration: {e}")
-        try:
-            conn.rollback()
-            # Restaurer les tables si possible
-            conn.execute("ALTER TABLE clients_physiques_old RENAME TO clients_physiques")
-            conn.execute("ALTER TABLE factures_old RENAME TO factures")
-            conn.commit()
-            print("Tables restaurées après erreur")
-        except:
-            print("Impossible de restaurer les tables automatiquement")
-        return False
-        
+        print(f"Erreur synthèse clients: {e}")
+        return {'clients_physiques': 0, 'clients_moraux': 0, 'total_clients': 0,
+                'nouveaux': 0, 'nouveaux_par_mois': []}
     finally:
         conn.close()
 
-def verifier_migration():
-    """Vérifie que la migration s'est bien passée"""
-    DB_PATH = os.path.join(os.path.dirname(__file__), "data", "domiciliation.db")
+def _lire_dataframe(requete: str, params: tuple = (), colonnes_dates: tuple = ()):
+    """
+    Exécute une requête et retourne un DataFrame pandas, les colonnes de
+    colonnes_dates étant converties en datetime64 (valeurs invalides -> NaT).
+    """
+    import pandas as pd
+    
+    # pandas attend une sqlite3.Connection native, pas le proxy du pool
+    with get_pool().connexion() as conn:
+        return pd.read_sql(
+            requete, conn, params=params,
+            parse_dates={colonne: {'format': '%Y-%m-%d', 'errors': 'coerce'} for colonne in colonnes_dates}
+        )
+
+@cache_lecture('factures', *TABLES_CLIENTS)
+def get_factures_df(date_debut: Optional[date] = None, date_fin: Optional[date] = None):
+    """
+    Factures (avec le nom du client) sous forme de DataFrame, restreintes à la
+    période [date_debut, date_fin] si elle est fournie. date_facture et
+    date_echeance sont des datetime64.
+    """
+    conditions, params = [], []
+    if date_debut and date_fin:
+        debut, fin = bornes_periode(date_debut, date_fin)
+        conditions.append("f.date_facture >= ? AND f.date_facture < ?")
+        params.extend([debut, fin])
     
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    try:
+        return _lire_dataframe(f"""
+        SELECT f.id, f.numero_facture,
+               COALESCE(cp.nom || ' ' || cp.prenom, cm.raison_sociale) as client_nom,
+               substr(f.date_facture, 1, 10) as date_facture,
+               substr(COALESCE(f.date_echeance, f.date_facture), 1, 10) as date_echeance,
+               COALESCE(f.montant_ht, 0) as montant_ht,
+               COALESCE(f.montant_tva, 0) as montant_tva,
+               COALESCE(f.montant_ttc, 0) as montant_ttc,
+               f.statut, f.mode_reglement
+        FROM factures f
+        LEFT JOIN clients_physiques cp ON f.client_id = cp.id AND f.client_type = 'physique'
+        LEFT JOIN clients_moraux cm ON f.client_id = cm.id AND f.client_type = 'moral'
+        {where}
+        ORDER BY f.date_facture DESC, f.id DESC
+        """, tuple(params), ('date_facture', 'date_echeance'))
+    except Exception as e:
+        print(f"Erreur lors du chargement des factures: {e}")
+        import pandas as pd
+        return pd.DataFrame()
+
+@cache_lecture('contrats', *TABLES_CLIENTS)
+def get_contrats_df(statut: Optional[str] = None):
+    """
+    Contrats (avec le nom du client) sous forme de DataFrame, éventuellement
+    restreints à un statut. date_debut, date_fin et date_creation sont des datetime64.
+    """
+    where, params = "", ()
+    if statut:
+        where, params = "WHERE c.statut = ?", (statut,)
+    try:
+        return _lire_dataframe(f"""
+        SELECT c.id, c.numero_contrat,
+               CASE 
+                   WHEN c.client_type = 'physique' THEN cp.nom || ' ' || cp.prenom
+                   ELSE cm.raison_sociale
+               END as client_nom,
+               substr(c.date_debut, 1, 10) as date_debut,
+               substr(c.date_fin, 1, 10) as date_fin,
+               substr(c.date_creation, 1, 10) as date_creation,
+               COALESCE(c.montant_mensuel, 0) as montant_mensuel,
+               c.type_service, c.statut
+        FROM contrats c
+        LEFT JOIN clients_physiques cp ON c.client_id = cp.id AND c.client_type = 'physique'
+        LEFT JOIN clients_moraux cm ON c.client_id = cm.id AND c.client_type = 'moral'
+        {where}
+        ORDER BY c.date_creation DESC, c.id DESC
+        """, params, ('date_debut', 'date_fin', 'date_creation'))
+    except Exception as e:
+        print(f"Erreur lors du chargement des contrats: {e}")
+        import pandas as pd
+        return pd.DataFrame()
+
+@cache_lecture(*TABLES_CLIENTS)
+def get_clients_df():
+    """
+    Clients physiques et moraux réunis dans un DataFrame aux colonnes communes
+    (type, nom_complet, identifiant, ...). date_creation est un datetime64 au jour près.
+    """
+    try:
+        return _lire_dataframe("""
+        SELECT 'physique' as type, id,
+               COALESCE(nom, '') || ' ' || COALESCE(prenom, '') as nom_complet,
+               COALESCE(cin, '') as identifiant,
+               telephone, email, adresse,
+               substr(date_creation, 1, 10) as date_creation
+        FROM clients_physiques
+        UNION ALL
+        SELECT 'moral' as type, id,
+               COALESCE(raison_sociale, '') as nom_complet,
+               COALESCE(ice, '') as identifiant,
+               telephone, email, adresse,
+               substr(date_creation, 1, 10) as date_creation
+        FROM clients_moraux
+        """, colonnes_dates=('date_creation',))
+    except Exception as e:
+        print(f"Erreur lors du chargement des clients: {e}")
+        import pandas as pd
+        return pd.DataFrame()
+
+def verifier_migration():
+    """Vérifie que la migration des contraintes (migration 9) s'est bien passée"""
     try:
         conn = sqlite3.connect(DB_PATH)
         conn.row_factory = sqlite3.Row
@@ -2409,7 +4650,64 @@ def verifier_migration():
     except Exception as e:
         print(f"Erreur lors de la vérification: {e}")
         return False
+# Requêtes critiques et index attendu dans leur plan d'exécution. Ce sont
+# les constantes SQL exécutées par les fonctions (get_all_contrats,
+# get_contrats_page, get_contrats_expirants, marquer_factures_en_retard...),
+# avec des paramètres représentatifs : le plan contrôlé est celui de l'application.
+# Test de non-régression : bench_plans_requetes.py (sur une copie de la base).
+REQUETES_CRITIQUES = {
+    'contrats_liste': (SQL_CONTRATS_LISTE, (), 'idx_contrats_date_creation'),
+    'contrats_page': (
+        SQL_CONTRATS_PAGE.format(jointures=JOINTURES_CLIENTS_CONTRATS, where=f"WHERE {CURSEUR_CONTRATS_PAGE}"),
+        ('2000-01-01', '2000-01-01', 1, TAILLE_PAGE + 1), 'idx_contrats_tri_creation'
+    ),
+    'contrats_expirants': (SQL_CONTRATS_EXPIRANTS, ('2000-01-01', '2000-01-31'), 'idx_contrats_statut_date_fin'),
+    'contrats_par_client': (SQL_CONTRATS_PAR_CLIENT, (1, 'physique'), 'idx_contrats_client_composite'),
+    'facturation_contrats': (
+        SQL_FACTURATION_CONTRATS, {'debut': '2000-01-01', 'fin': '2000-01-31'}, 'idx_contrats_statut_date_fin'
+    ),
+    'factures_page': (
+        SQL_FACTURES_PAGE.format(jointures=JOINTURES_CLIENTS_FACTURES, where=f"WHERE {CURSEUR_FACTURES_PAGE}"),
+        ('2000-01-01', '2000-01-01', 1, TAILLE_PAGE + 1), 'idx_factures_tri_date'
+    ),
+    'factures_en_retard': (SQL_FACTURES_EN_RETARD, ('2000-01-01',), 'idx_factures_statut_echeance'),
+    'paiements_par_contrat': (SQL_PAIEMENTS_PAR_CONTRAT, (1,), 'idx_paiements_contrat'),
+}
+
+def verifier_plans_requetes() -> List[Dict]:
+    """
+    Contrôle (EXPLAIN QUERY PLAN) que chaque requête critique utilise son
+    index et ne parcourt aucune table en entier (SCAN sans index).
+    Retourne une ligne par requête : nom, index attendu, plan, ok.
+    """
+    resultats = []
+    conn = get_db_connection()
+    try:
+        for nom, (sql, params, index_attendu) in REQUETES_CRITIQUES.items():
+            plan = [row['detail'] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+            scans = [detail for detail in plan if detail.startswith('SCAN ') and ' USING ' not in detail]
+            ok = any(index_attendu in detail for detail in plan) and not scans
+            resultats.append({
+                'requete': nom,
+                'index_attendu': index_attendu,
+                'plan': " | ".join(plan),
+                'ok': ok
+            })
+            if not ok:
+                print(f"ATTENTION: {nom} n'utilise pas {index_attendu} ou parcourt une table -> {' | '.join(plan)}")
+    except Exception as e:
+        print(f"Erreur vérification des plans: {e}")
+        resultats.append({'requete': None, 'index_attendu': None, 'plan': str(e), 'ok': False})
+    finally:
+        conn.close()
+    return resultats
+
 if __name__ == "__main__":
+    # Durée prévisible des migrations en attente, sans modifier la base
+    for etape in simuler_migrations():
+        etat = "OK " if etape['ok'] else "KO "
+        print(f"{etat} migration {etape['version']} ({etape['duree_ms']:.1f} ms): {etape['description']}"
+              + (f" - {etape['erreur']}" if etape['erreur'] else ""))
     init_db()
     print("Base de données initialisée avec succès!")
     debug_database()
@@ -2418,4 +4716,4 @@ if __name__ == "__main__":
         # Vérifier le résultat
         verifier_migration()
     else:
-        print("La migration a échoué")
\ No newline at end of file
+        print("La migration a échoué")
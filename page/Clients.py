@@ -1,16 +1,13 @@
 import streamlit as st
 from db import (ajouter_client, rechercher_clients, supprimer_client_definitif, 
-                modifier_client_complet, get_all_clients)
-from utils import valider_cin, valider_ice, valider_email
-import pandas as pd
+                modifier_client_complet, get_all_clients, get_clients_page, get_client_detail,
+                importer_clients, modele_import_clients, COLONNES_OBLIGATOIRES_IMPORT)
+from utils import (valider_cin, valider_ice, valider_email, paginer, afficher_pagination,
+                   afficher_rapport_import)
 from datetime import datetime, date, timedelta
 import time
 import hashlib
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
+# pandas et reportlab sont importés dans les fonctions qui les utilisent (tableaux, exports PDF)
 import io
 
 # Configuration de la page avec style personnalisé
@@ -153,13 +150,9 @@ def safe_get_clients(type_client):
         return []
 
 def get_client_by_id_safe(client_id, client_type):
-    """Récupérer un client par ID de manière sécurisée"""
+    """Récupérer un client par ID (avec ses compteurs de contrats / factures) de manière sécurisée"""
     try:
-        clients = safe_get_clients(client_type)
-        for client in clients:
-            if isinstance(client, dict) and client.get('id') == client_id:
-                return client
-        return None
+        return get_client_detail(client_id, client_type)
     except Exception as e:
         st.error(f"Erreur lors de la récupération du client: {str(e)}")
         return None
@@ -691,33 +684,26 @@ def show_client_details_enhanced(client_data, type_client):
     st.markdown("####  Éléments Associés")
     
     try:
-        from db import get_db_connection
-        conn = get_db_connection()
-        
-        # Compter les contrats
-        contrats = conn.execute(
-            "SELECT COUNT(*) as count FROM contrats WHERE client_id = ? AND client_type = ?",
-            (client_data['id'], type_client)
-        ).fetchone()
-        
-        # Compter les factures  
-        factures = conn.execute(
-            "SELECT COUNT(*) as count FROM factures WHERE client_id = ?",
-            (client_data['id'],)
-        ).fetchone()
-        
-        conn.close()
-        
-        col1, col2 = st.columns(2)
+        # Compteurs, solde et dernière facture fournis avec la fiche (get_client_detail)
+        col1, col2, col3 = st.columns(3)
         
         with col1:
-            nb_contrats = contrats['count'] if contrats else 0
+            nb_contrats = client_data.get('nb_contrats', 0)
             st.metric("🗎 Contrats", nb_contrats)
         
         with col2:
-            nb_factures = factures['count'] if factures else 0
+            nb_factures = client_data.get('nb_factures', 0)
             st.metric("🧾 Factures", nb_factures)
         
+        with col3:
+            st.metric("Solde dû", f"{client_data.get('solde_du', 0):,.2f} DH")
+        
+        derniere_facture = client_data.get('derniere_facture')
+        if derniere_facture:
+            st.info(f"**Dernière facture:** {derniere_facture['numero_facture']} du "
+                    f"{derniere_facture['date_facture']} - {derniere_facture['montant_ttc']:,.2f} DH "
+                    f"({derniere_facture['statut']})")
+        
         total_elements = nb_contrats + nb_factures
         if total_elements > 0:
             st.warning(f"⚠️ Ce client a {total_elements} élément(s) associé(s)")
@@ -763,24 +749,9 @@ def show_delete_confirmation_enhanced(client_data, type_client):
     st.warning("⚠️ **ATTENTION: Cette action est irréversible !**")
     
     try:
-        from db import get_db_connection
-        conn = get_db_connection()
-        
-        # Vérifier les éléments associés
-        contrats = conn.execute(
-            "SELECT COUNT(*) as count FROM contrats WHERE client_id = ? AND client_type = ?",
-            (client_data['id'], type_client)
-        ).fetchone()
-        
-        factures = conn.execute(
-            "SELECT COUNT(*) as count FROM factures WHERE client_id = ?",
-            (client_data['id'],)
-        ).fetchone()
-        
-        conn.close()
-        
-        nb_contrats = contrats['count'] if contrats else 0
-        nb_factures = factures['count'] if factures else 0
+        # Vérifier les éléments associés (compteurs fournis avec la fiche)
+        nb_contrats = client_data.get('nb_contrats', 0)
+        nb_factures = client_data.get('nb_factures', 0)
         
         if nb_contrats > 0 or nb_factures > 0:
             st.error(f"""
@@ -848,6 +819,8 @@ def show_delete_confirmation_enhanced(client_data, type_client):
 
 def gestion_clients_physiques():
     """Gestion des clients physiques avec interface améliorée"""
+    import pandas as pd
+    
     st.markdown("###  Gestion des Clients Physiques")
     
     # Vérifier s'il y a une modification en cours
@@ -917,6 +890,7 @@ def gestion_clients_physiques():
         refresh_btn = st.button("⟲ Actualiser", use_container_width=True, key="refresh_physique")
     
     # Récupérer et afficher les clients
+    page = None
     try:
         if search_term and search_term.strip():
             if search_term.strip().isdigit():
@@ -928,7 +902,8 @@ def gestion_clients_physiques():
                 # Recherche textuelle
                 clients = rechercher_clients(search_term.strip(), "physique")
         else:
-            clients = safe_get_clients("physique")
+            page = paginer("clients_physiques", lambda curseur: get_clients_page("physique", curseur))
+            clients = page['lignes']
         
         if not clients:
             st.info("ℹ️ Aucun client trouvé")
@@ -958,6 +933,9 @@ def gestion_clients_physiques():
                 }
             )
             
+            if page is not None:
+                afficher_pagination("clients_physiques", page)
+            
             # Actions sur les clients
             show_client_actions_enhanced(clients, "physique")
         
@@ -966,6 +944,8 @@ def gestion_clients_physiques():
 
 def gestion_clients_moraux():
     """Gestion des clients moraux avec interface améliorée"""
+    import pandas as pd
+    
     st.markdown("###  Gestion des Clients Moraux")
     
     # Vérifier s'il y a une modification en cours
@@ -1040,6 +1020,7 @@ def gestion_clients_moraux():
         refresh_btn = st.button("⟲ Actualiser", use_container_width=True, key="refresh_moral")
     
     # Récupérer et afficher les clients
+    page = None
     try:
         if search_term and search_term.strip():
             if search_term.strip().isdigit():
@@ -1051,7 +1032,8 @@ def gestion_clients_moraux():
                 # Recherche textuelle
                 clients = rechercher_clients(search_term.strip(), "moral")
         else:
-            clients = safe_get_clients("moral")
+            page = paginer("clients_moraux", lambda curseur: get_clients_page("moral", curseur))
+            clients = page['lignes']
         
         if not clients:
             st.info("ℹ️ Aucune entreprise trouvée")
@@ -1081,6 +1063,9 @@ def gestion_clients_moraux():
                 }
             )
             
+            if page is not None:
+                afficher_pagination("clients_moraux", page)
+            
             # Actions sur les clients
             show_client_actions_enhanced(clients, "moral")
         
@@ -1279,6 +1264,11 @@ def handle_client_moral_submission(raison_sociale, ice, rc, forme_juridique, tel
 
 def generate_pdf_report(clients, type_client, title="Liste des Clients"):
     """Générer un rapport PDF des clients"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    
     try:
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
@@ -1415,6 +1405,11 @@ def export_clients_pdf():
                 clients_moraux = safe_get_clients("moral")
                 
                 if clients_physiques or clients_moraux:
+                    from reportlab.lib import colors
+                    from reportlab.lib.pagesizes import A4
+                    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+                    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+                    
                     # Créer un rapport combiné AVEC LES TABLEAUX
                     buffer = io.BytesIO()
                     doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
@@ -1540,6 +1535,45 @@ def export_clients_pdf():
             except Exception as e:
                 st.error(f"✗ Erreur lors de l'export du rapport: {str(e)}")
 
+def import_clients_masse():
+    """Import en masse de clients depuis un fichier CSV ou Excel"""
+    st.markdown("### 📥 Import en masse")
+    
+    type_label = st.radio("Type de clients", ["Personnes Physiques", "Personnes Morales"],
+                          horizontal=True, key="import_type_client")
+    type_client = "physique" if type_label == "Personnes Physiques" else "moral"
+    
+    st.caption(
+        "Colonnes obligatoires : " + ", ".join(COLONNES_OBLIGATOIRES_IMPORT[type_client])
+        + ". Séparateur CSV détecté automatiquement (, ; ou tabulation)."
+    )
+    st.download_button(
+        label="⭳ Télécharger le modèle CSV",
+        data=modele_import_clients(type_client),
+        file_name=f"modele_clients_{type_client}.csv",
+        mime="text/csv"
+    )
+    
+    fichier = st.file_uploader("Fichier à importer", type=["csv", "xlsx"], key=f"import_fichier_{type_client}")
+    if fichier is None:
+        return
+    
+    if st.button("📥 Lancer l'import", type="primary", use_container_width=True):
+        suivi = st.empty()
+        
+        def progression(lues, importes):
+            suivi.info(f"⏳ {lues} lignes lues, {importes} clients importés...")
+        
+        rapport = importer_clients(fichier, type_client, nom_fichier=fichier.name, progression=progression)
+        suivi.empty()
+        st.session_state[f"import_rapport_{type_client}"] = rapport
+    
+    rapport = st.session_state.get(f"import_rapport_{type_client}")
+    if not rapport:
+        return
+    
+    afficher_rapport_import(rapport, f"import_{type_client}", "clients importés")
+
 def show():
     """Fonction principale d'affichage - VERSION FINALE CORRIGÉE"""
     apply_custom_css()
@@ -1554,7 +1588,7 @@ def show():
     # Menu de navigation
     menu_option = st.selectbox(
         "🗎 Choisir une section",
-        [ "⚲⚲ Gestion Clients","🗎 Export PDF"],
+        [ "⚲⚲ Gestion Clients", "📥 Import en masse", "🗎 Export PDF"],
         index=0,
         help="Sélectionnez la section que vous souhaitez utiliser"
     )
@@ -1562,6 +1596,8 @@ def show():
     # Affichage selon la sélection
     if menu_option =="🗎 Export PDF":
         export_clients_pdf()
+    elif menu_option == "📥 Import en masse":
+        import_clients_masse()
     elif menu_option ==  "⚲⚲ Gestion Clients":
         show_stats()
         
@@ -1,8 +1,9 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta, date
 from db import (get_all_clients, ajouter_contrat, get_all_contrats, 
-                supprimer_contrat, modifier_contrat, get_contrat_by_id)
+                supprimer_contrat, modifier_contrat, get_contrat_by_id,
+                get_contrats_page, importer_contrats, modele_import_contrats)
+from utils import paginer, afficher_pagination, afficher_sections, afficher_rapport_import
 import uuid
 def apply_dashboard_css():
     """Appliquer uniquement les styles pour le titre et le bouton de déconnexion"""
@@ -94,17 +95,13 @@ def show():
         <h1 class="dashboard-title"> Gestion des Contrats</h1>
     </div>
     """, unsafe_allow_html=True)
-    # Tabs pour différentes actions
-    tab1, tab2, tab3 = st.tabs([" Nouveau Contrat", " Liste des Contrats", " Statistiques"])
-    
-    with tab1:
-        nouveau_contrat()
-    
-    with tab2:
-        liste_contrats()
-    
-    with tab3:
-        statistiques_contrats()
+    # Sections pour différentes actions (seule la section active est exécutée)
+    afficher_sections("contrats", {
+        " Nouveau Contrat": nouveau_contrat,
+        " Liste des Contrats": liste_contrats,
+        " Import en masse": import_contrats_masse,
+        " Statistiques": statistiques_contrats
+    })
 
 def nouveau_contrat():
     """Formulaire de création d'un nouveau contrat"""
@@ -576,6 +573,8 @@ def modifier_contrat_interface(contrat_id):
 
 def liste_contrats():
     """Liste et gestion des contrats existants - VERSION MODIFIÉE"""
+    import pandas as pd
+    
     st.subheader("Liste des Contrats")
     
     # Vérifier s'il y a un contrat en cours de modification
@@ -605,25 +604,20 @@ def liste_contrats():
             placeholder="Numéro, client..."
         )
     
-    # Récupérer les contrats (garder le code existant pour les filtres)
-    contrats = get_all_contrats()
+    # Filtres appliqués en SQL, seule la page affichée est lue en base
+    filtres = {
+        'statut': filtre_statut,
+        'type_': filtre_type,
+        'recherche': search_term
+    }
+    page = paginer("contrats", lambda curseur: get_contrats_page(curseur, filtres=filtres),
+                   signature=tuple(filtres.values()))
+    contrats = page['lignes']
     
-    if not contrats:
+    if not contrats and filtre_statut == filtre_type == "Tous" and not search_term:
         st.info("Aucun contrat enregistré")
         return
     
-    # Appliquer les filtres (garder le code existant)
-    if filtre_statut != "Tous":
-        contrats = [c for c in contrats if c.get('statut') == filtre_statut]
-    
-    if filtre_type != "Tous":
-        contrats = [c for c in contrats if c.get('type_service') == filtre_type]
-    
-    if search_term:
-        contrats = [c for c in contrats if 
-                   search_term.lower() in c.get('numero_contrat', '').lower() or
-                   search_term.lower() in str(c.get('client_nom', '')).lower()]
-    
     if contrats:
         # Affichage du tableau (garder le code existant)
         df_data = []
@@ -651,6 +645,8 @@ def liste_contrats():
         df = pd.DataFrame(df_data)
         st.dataframe(df, use_container_width=True, hide_index=True)
         
+        afficher_pagination("contrats", page)
+        
         # Actions sur les contrats - VERSION MODIFIÉE
         st.markdown("---")
         st.markdown("### Actions")
@@ -686,6 +682,40 @@ def liste_contrats():
     else:
         st.info("Aucun contrat ne correspond aux critères de recherche")
 
+def import_contrats_masse():
+    """Reprise d'un portefeuille de contrats depuis un fichier CSV ou Excel"""
+    st.subheader("Import en masse de contrats")
+    
+    st.caption(
+        "Le client est désigné par sa CIN ou son ICE (colonne identifiant_client, cin ou ice). "
+        "Obligatoires : type_service, date_debut, montant_mensuel. "
+        "date_fin est calculée depuis duree_mois si elle est absente ; le numéro est généré s'il est vide."
+    )
+    st.download_button(
+        label="⭳ Télécharger le modèle CSV",
+        data=modele_import_contrats(),
+        file_name="modele_contrats.csv",
+        mime="text/csv"
+    )
+    
+    fichier = st.file_uploader("Fichier à importer", type=["csv", "xlsx"], key="import_fichier_contrats")
+    if fichier is None:
+        return
+    
+    if st.button("📥 Lancer l'import", type="primary", use_container_width=True):
+        suivi = st.empty()
+        
+        def progression(lues, importes):
+            suivi.info(f"⏳ {lues} lignes lues, {importes} contrats importés...")
+        
+        rapport = importer_contrats(fichier, nom_fichier=fichier.name, progression=progression)
+        suivi.empty()
+        st.session_state["import_rapport_contrats"] = rapport
+    
+    rapport = st.session_state.get("import_rapport_contrats")
+    if rapport:
+        afficher_rapport_import(rapport, "import_contrats", "contrats importés")
+
 def statistiques_contrats():
     """Affichage des statistiques des contrats"""
     st.subheader("Statistiques des Contrats")
@@ -1,10 +1,13 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta, date
 from db import (get_all_contrats,
-                modifier_facture, supprimer_facture, get_facture_by_id,update_db_structure_with_client_type,
-                get_all_factures_corrigee,ajouter_facture_corrigee
+                modifier_facture, supprimer_facture, get_facture_by_id,
+                ajouter_facture_corrigee,
+                get_factures_page, get_compteurs_factures, bornes_mois,
+                get_revenu_mensuel, lancer_facturation, marquer_factures_en_retard,
+                get_derniere_execution, TACHE_FACTURES_EN_RETARD
                 )
+from utils import paginer, afficher_pagination, derniers_mois, afficher_sections
 import uuid
 
 def apply_dashboard_css():
@@ -106,13 +109,6 @@ def apply_dashboard_css():
     """, unsafe_allow_html=True)
 def show():
     apply_dashboard_css()
-    if 'db_structure_updated' not in st.session_state:
-        with st.spinner("Vérification de la base de données..."):
-            try:
-                update_db_structure_with_client_type()
-                st.session_state.db_structure_updated = True
-            except Exception as e:
-                st.error(f"Erreur lors de la mise à jour de la base de données: {e}")    
     # Titre avec HTML personnalisé
     st.markdown("""
     <div class="title-container">
@@ -120,16 +116,14 @@ def show():
     </div>
     """, unsafe_allow_html=True)
     # Tabs pour différentes actions
-    tab1, tab2, tab4 = st.tabs([" Nouvelle Facture", " Liste des Factures", " Tableau de Bord"])
-    
-    with tab1:
-        nouvelle_facture()
-    
-    with tab2:
-        liste_factures()
-    
-    with tab4:
-        tableau_bord_facturation()
+    afficher_sections("facturation", {
+        " Nouvelle Facture": nouvelle_facture,
+        " Liste des Factures": liste_factures,
+        " Facturation Périodique": facturation_periodique,
+        " Tableau de Bord": tableau_bord_facturation
+    }, prechargements={
+        " Tableau de Bord": lambda: get_revenu_mensuel(grouper_par=('statut',))
+    })
 
 def nouvelle_facture():
     """Formulaire de création d'une nouvelle facture"""
@@ -320,6 +314,76 @@ def nouvelle_facture():
                 else:
                     st.error("❌ Erreur lors de la création de la facture")
 
+def facturation_periodique():
+    """Génère en un lot les factures mensuelles des contrats actifs"""
+    st.subheader("Facturation Périodique")
+    
+    mois_options = derniers_mois(12)[::-1]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        mois = st.selectbox("Mois à facturer *", mois_options, key="facturation_mois")
+    with col2:
+        delai_paiement = st.number_input("Délai de paiement (jours)", min_value=0, max_value=120,
+                                         value=30, key="facturation_delai")
+    with col3:
+        taux_tva = st.number_input("Taux TVA (%)", value=20.0, min_value=0.0, max_value=100.0,
+                                   step=0.1, format="%.1f", key="facturation_tva")
+    
+    st.caption("Les contrats dont le mois est déjà couvert par une facture périodique non annulée "
+               "sont ignorés : relancer la facturation d'un mois ne crée pas de doublon.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        apercu = st.button("🔍 Aperçu", use_container_width=True)
+    with col2:
+        generer = st.button("💾 Générer les factures", type="primary", use_container_width=True)
+    
+    if apercu or generer:
+        with st.spinner("Facturation en cours..." if generer else "Calcul de l'aperçu..."):
+            st.session_state["facturation_rapport"] = lancer_facturation(
+                mois, delai_paiement=int(delai_paiement), taux_tva=taux_tva, simulation=not generer
+            )
+    
+    rapport = st.session_state.get("facturation_rapport")
+    if not rapport or rapport['mois'] != mois:
+        return
+    
+    if rapport['erreur']:
+        st.error(f"❌ Erreur lors de la facturation : {rapport['erreur']}")
+        return
+    
+    if rapport['simulation']:
+        st.info(f"ℹ️ Aperçu : {rapport['nb_factures']} facture(s) seraient créées "
+                f"({rapport['deja_facturees']} contrat(s) déjà facturé(s) pour ce mois)")
+    elif rapport['nb_factures']:
+        st.success(f"✅ {rapport['nb_factures']} facture(s) créée(s) en {rapport['durees_ms']['total']:.0f} ms "
+                   f"({rapport['deja_facturees']} contrat(s) déjà facturé(s))")
+    else:
+        st.info(f"ℹ️ Aucune facture à créer : {rapport['deja_facturees']} contrat(s) déjà facturé(s) pour ce mois")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Factures", rapport['nb_factures'])
+    col2.metric("Total HT", f"{rapport['total_ht']:,.2f} DH")
+    col3.metric("TVA", f"{rapport['total_tva']:,.2f} DH")
+    col4.metric("Total TTC", f"{rapport['total_ttc']:,.2f} DH")
+    
+    st.caption("Durées : " + ", ".join(
+        f"{etape} {duree:.0f} ms" for etape, duree in rapport['durees_ms'].items()
+    ))
+    
+    if rapport['factures']:
+        import pandas as pd
+        
+        df = pd.DataFrame(rapport['factures'])[
+            ['numero_facture', 'numero_contrat', 'client_nom', 'date_echeance', 'montant_ht', 'montant_ttc']
+        ].rename(columns={
+            'numero_facture': 'N° Facture', 'numero_contrat': 'Contrat', 'client_nom': 'Client',
+            'date_echeance': 'Échéance', 'montant_ht': 'Montant HT', 'montant_ttc': 'Montant TTC'
+        })
+        if rapport['simulation']:
+            df = df.drop(columns=['N° Facture'])
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
 def modifier_facture_interface(facture_id):
     """Interface complète de modification d'une facture avec tous les champs modifiables"""
     facture = get_facture_by_id(facture_id)
@@ -589,6 +653,8 @@ def modifier_facture_interface(facture_id):
 
 def liste_factures():
     """Liste et gestion des factures existantes - VERSION MODIFIÉE"""
+    import pandas as pd
+    
     st.subheader("Liste des Factures")
     
     # Vérifier s'il y a une facture en cours de modification
@@ -623,38 +689,27 @@ def liste_factures():
             placeholder="Numéro, client..."
         )
     
-    # Récupérer les factures
-    factures = get_all_factures_corrigee()
-    
-    if not factures:
+    # Filtres appliqués en SQL (le mois devient une plage de dates indexée)
+    date_min = date_max = None
+    if filtre_mois != "Tous":
+        mois, annee = filtre_mois.split('/')
+        date_min, date_max = bornes_mois(int(annee), int(mois))
+    
+    filtres = {
+        'statut': filtre_statut,
+        'type_': filtre_type,
+        'date_min': date_min,
+        'date_max': date_max,
+        'recherche': search_term
+    }
+    page = paginer("factures", lambda curseur: get_factures_page(curseur, filtres=filtres),
+                   signature=tuple(filtres.values()))
+    factures = page['lignes']
+    
+    if not factures and filtre_statut == filtre_type == filtre_mois == "Tous" and not search_term:
         st.info("Aucune facture enregistrée")
         return
     
-    # Mettre à jour le statut des factures (en retard)
-    for facture in factures:
-        try:
-            date_echeance = datetime.strptime(facture['date_echeance'], '%Y-%m-%d').date()
-            if facture['statut'] == 'En attente' and date_echeance < datetime.now().date():
-                facture['statut'] = 'En retard'
-        except:
-            pass
-    
-    # Appliquer les filtres
-    if filtre_statut != "Tous":
-        factures = [f for f in factures if f.get('statut') == filtre_statut]
-    
-    if filtre_type != "Tous":
-        factures = [f for f in factures if f.get('type_facture') == filtre_type]
-    
-    if filtre_mois != "Tous":
-        mois_filtre = filtre_mois.split('/')[0]
-        factures = [f for f in factures if f.get('date_facture', '')[:7].endswith(f'-{mois_filtre}')]
-    
-    if search_term:
-        factures = [f for f in factures if 
-                   search_term.lower() in f.get('numero_facture', '').lower() or
-                   search_term.lower() in str(f.get('client_nom', '')).lower()]
-    
     if factures:
         # Préparer les données pour l'affichage
         df_data = []
@@ -683,23 +738,24 @@ def liste_factures():
         df = pd.DataFrame(df_data)
         st.dataframe(df, use_container_width=True, hide_index=True)
         
+        afficher_pagination("factures", page)
+        # Compteurs calculés en base sur toutes les factures filtrées, pas seulement la page
+        compteurs = get_compteurs_factures(filtres)
+        
         # Statistiques rapides
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            total_factures = len(factures)
-            st.metric("Total Factures", total_factures)
+            st.metric("Total Factures", compteurs['total'])
         
         with col2:
-            factures_payees = len([f for f in factures if f['statut'] == 'Payée'])
-            st.metric("Payées", factures_payees)
+            st.metric("Payées", compteurs['payees'])
         
         with col3:
-            factures_attente = len([f for f in factures if f['statut'] == 'En attente'])
-            st.metric("En attente", factures_attente)
+            st.metric("En attente", compteurs['en_attente'])
         
         with col4:
-            factures_retard = len([f for f in factures if f['statut'] == 'En retard'])
+            factures_retard = compteurs['en_retard']
             st.metric("En retard", factures_retard, delta=-factures_retard if factures_retard > 0 else None)
         
         # Actions sur les factures - VERSION MODIFIÉE
@@ -742,41 +798,40 @@ def liste_factures():
         
 def tableau_bord_facturation():
     """Tableau de bord de la facturation"""
+    import plotly.express as px
+    
     st.subheader("Tableau de Bord Facturation")
     
-    # Récupérer toutes les factures
-    factures = get_all_factures_corrigee()
+    # Agrégats mensuels (table monthly_revenue) : quelques lignes, quel que soit l'historique
+    repartition_statuts = get_revenu_mensuel(grouper_par=('statut',))
     
-    if not factures:
+    if not repartition_statuts:
         st.info("Aucune donnée de facturation disponible")
         return
     
     # Calculs pour le tableau de bord
     aujourd_hui = datetime.now().date()
-    debut_mois = aujourd_hui.replace(day=1)
+    mois_courant = aujourd_hui.strftime('%Y-%m')
     
     # Métriques du mois en cours
-    factures_mois = [f for f in factures 
-                    if datetime.strptime(f.get('date_facture', '1900-01-01'), '%Y-%m-%d').date() >= debut_mois]
+    mois_par_statut = get_revenu_mensuel(mois_courant, mois_courant, grouper_par=('statut',))
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        ca_mois = sum(f['montant_ttc'] for f in factures_mois)
+        ca_mois = sum(r['montant_ttc'] for r in mois_par_statut)
         st.metric("CA du Mois", f"{ca_mois:,.0f} DH")
     
     with col2:
-        factures_payees_mois = [f for f in factures_mois if f.get('statut') == 'Payée']
-        ca_encaisse = sum(f['montant_ttc'] for f in factures_payees_mois)
+        ca_encaisse = sum(r['montant_ttc'] for r in mois_par_statut if r['statut'] == 'Payée')
         st.metric("Encaissé", f"{ca_encaisse:,.0f} DH")
     
     with col3:
-        factures_impayees = [f for f in factures if f.get('statut') in ['En attente', 'En retard']]
-        ca_impaye = sum(f['montant_ttc'] for f in factures_impayees)
+        ca_impaye = sum(r['montant_ttc'] for r in repartition_statuts if r['statut'] in ['En attente', 'En retard'])
         st.metric("Impayés", f"{ca_impaye:,.0f} DH", delta=-ca_impaye if ca_impaye > 0 else None)
     
     with col4:
-        nb_factures_mois = len(factures_mois)
+        nb_factures_mois = sum(r['nb'] for r in mois_par_statut)
         st.metric("Factures du Mois", nb_factures_mois)
     
     # Graphiques
@@ -786,21 +841,15 @@ def tableau_bord_facturation():
         # Évolution du CA sur les 6 derniers mois
         st.markdown("###  Évolution CA (6 derniers mois)")
         
-        ca_evolution = []
-        for i in range(6):
-            mois_date = (aujourd_hui.replace(day=1) - timedelta(days=i*30))
-            mois_str = mois_date.strftime('%Y-%m')
-            
-            ca_mois = sum(f['montant_ttc'] for f in factures 
-                         if f.get('date_facture', '1900-01-01').startswith(mois_str))
-            
-            ca_evolution.insert(0, {
-                'Mois': mois_date.strftime('%m/%Y'),
-                'CA': ca_mois
-            })
+        mois_affiches = derniers_mois(6, aujourd_hui)
+        ca_par_mois = {r['mois']: r['montant_ttc']
+                       for r in get_revenu_mensuel(mois_affiches[0], mois_affiches[-1])}
+        ca_evolution = [
+            {'Mois': f"{mois[5:]}/{mois[:4]}", 'CA': ca_par_mois.get(mois, 0)}
+            for mois in mois_affiches
+        ]
         
         if ca_evolution:
-            import plotly.express as px
             fig = px.line(ca_evolution, x='Mois', y='CA', title="Évolution du CA")
             fig.update_layout(showlegend=False)
             st.plotly_chart(fig, use_container_width=True)
@@ -809,10 +858,7 @@ def tableau_bord_facturation():
         # Répartition des statuts de paiement
         st.markdown("###  Statuts de Paiement")
         
-        statuts = {}
-        for facture in factures:
-            statut = facture.get('statut', 'Inconnu')
-            statuts[statut] = statuts.get(statut, 0) + 1
+        statuts = {r['statut'] or 'Inconnu': r['nb'] for r in repartition_statuts}
         
         if statuts:
             fig = px.pie(values=list(statuts.values()), names=list(statuts.keys()), 
@@ -823,15 +869,32 @@ def tableau_bord_facturation():
     st.markdown("---")
     st.markdown("### 🚨 Alertes")
     
+    # Passage des factures échues en retard : quotidien, relançable à la demande
+    col_tache, col_bouton = st.columns([3, 1])
+    with col_bouton:
+        if st.button("🔄 Mettre à jour les retards", use_container_width=True):
+            nombre = marquer_factures_en_retard()
+            if nombre is None:
+                st.error("❌ Erreur lors de la mise à jour des retards")
+            else:
+                st.success(f"✅ {nombre} facture(s) passée(s) en retard")
+    with col_tache:
+        derniere = get_derniere_execution(TACHE_FACTURES_EN_RETARD)
+        if derniere:
+            st.caption(f"Retards mis à jour le {derniere['derniere_execution'].replace('T', ' à ')} "
+                       f"({derniere['lignes_modifiees']} facture(s) passée(s) en retard)")
+        else:
+            st.caption("Retards jamais mis à jour")
+    
     col1, col2 = st.columns(2)
     
     with col1:
-        # Factures en retard
-        factures_retard = [f for f in factures if f.get('statut') == 'En retard']
-        if factures_retard:
-            st.error(f"⚠️ {len(factures_retard)} facture(s) en retard de paiement")
+        # Factures en retard (les 3 plus récentes, le total est compté en base)
+        page_retard = get_factures_page(limite=3, filtres={'statut': 'En retard'})
+        if page_retard['lignes']:
+            st.error(f"⚠️ {page_retard['total']} facture(s) en retard de paiement")
             
-            for facture in factures_retard[:3]:  # Afficher les 3 premières
+            for facture in page_retard['lignes']:
                 try:
                     date_echeance = datetime.strptime(facture['date_echeance'], '%Y-%m-%d').date()
                     jours_retard = (aujourd_hui - date_echeance).days
@@ -843,21 +906,16 @@ def tableau_bord_facturation():
     
     with col2:
         # Échéances à venir (7 prochains jours)
-        echeances_proches = []
-        for facture in factures:
-            if facture.get('statut') == 'En attente':
-                try:
-                    date_echeance = datetime.strptime(facture['date_echeance'], '%Y-%m-%d').date()
-                    jours_restants = (date_echeance - aujourd_hui).days
-                    if 0 <= jours_restants <= 7:
-                        echeances_proches.append(facture)
-                except:
-                    continue
-        
-        if echeances_proches:
-            st.warning(f"🗋	 {len(echeances_proches)} échéance(s) dans les 7 prochains jours")
+        echeances_proches = get_factures_page(limite=50, filtres={
+            'statut': 'En attente',
+            'echeance_min': aujourd_hui.isoformat(),
+            'echeance_max': (aujourd_hui + timedelta(days=7)).isoformat()
+        })
+        
+        if echeances_proches['lignes']:
+            st.warning(f"🗋	 {echeances_proches['total']} échéance(s) dans les 7 prochains jours")
             
-            for facture in echeances_proches:
+            for facture in echeances_proches['lignes']:
                 st.write(f"• {facture['numero_facture']} - {facture['date_echeance']}")
         else:
             st.info("🗋 Aucune échéance proche")  
@@ -1,22 +1,18 @@
 import streamlit as st
-import pandas as pd
-from datetime import datetime, timedelta, date
+from datetime import datetime, date
 from db import (
-    get_all_clients, get_all_contrats, get_all_factures, 
-    get_statistiques, get_contrat_by_id, get_facture_by_id
+    get_all_contrats, get_all_factures, 
+    get_statistiques, get_contrat_by_id, get_facture_by_id,
+    get_revenu_mensuel, get_synthese_factures, get_synthese_contrats, get_synthese_clients,
+    get_factures_df, get_contrats_df, get_clients_df
 )
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image as ReportLabImage
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.lib import colors
-from reportlab.pdfgen import canvas
+# pandas, plotly et reportlab sont importés dans les fonctions qui les utilisent :
+# leur chargement (plusieurs centaines de ms) n'a lieu qu'au premier graphique / PDF
 import io
 import base64
 import os
+from functools import cached_property
+from utils import afficher_sections
 
 def apply_dashboard_css():
     """Appliquer uniquement les styles pour le titre et le bouton de déconnexion"""
@@ -80,6 +76,78 @@ def apply_dashboard_css():
     }
     </style>
     """, unsafe_allow_html=True)
+class ReportingContexte:
+    """
+    Données du Reporting pour une période, chargées à la première utilisation
+    et partagées par tous les onglets : chaque jeu de données est lu au plus
+    une fois par exécution de la page.
+    """
+    
+    def __init__(self, date_debut, date_fin):
+        self.date_debut = date_debut
+        self.date_fin = date_fin
+    
+    @property
+    def cle(self):
+        return (self.date_debut, self.date_fin)
+    
+    @cached_property
+    def statistiques(self):
+        return get_statistiques()
+    
+    @cached_property
+    def synthese_factures(self):
+        return get_synthese_factures(self.date_debut, self.date_fin)
+    
+    @cached_property
+    def synthese_contrats(self):
+        return get_synthese_contrats(self.date_debut, self.date_fin)
+    
+    @cached_property
+    def synthese_clients(self):
+        return get_synthese_clients(self.date_debut, self.date_fin)
+    
+    @cached_property
+    def nb_factures_total(self):
+        total = get_revenu_mensuel(grouper_par=())
+        return total[0]['nb'] if total else 0
+    
+    @cached_property
+    def revenu_par_mois_statut(self):
+        """CA des mois couverts par la période, par mois et statut de facture"""
+        return get_revenu_mensuel(
+            self.date_debut.strftime('%Y-%m'), self.date_fin.strftime('%Y-%m'),
+            grouper_par=('mois', 'statut')
+        )
+    
+    def ca_mensuel(self, statuts=None):
+        """CA TTC par mois ('YYYY-MM' -> montant), éventuellement restreint à des statuts"""
+        ca = {}
+        for ligne in self.revenu_par_mois_statut:
+            if statuts is None or ligne['statut'] in statuts:
+                ca[ligne['mois']] = ca.get(ligne['mois'], 0) + ligne['montant_ttc']
+        return dict(sorted(ca.items()))
+    
+    @cached_property
+    def factures_periode(self):
+        return get_factures_df(self.date_debut, self.date_fin)
+    
+    @cached_property
+    def contrats_actifs(self):
+        return get_contrats_df("Actif")
+    
+    @cached_property
+    def clients(self):
+        return get_clients_df()
+    
+    @cached_property
+    def factures(self):
+        return get_all_factures()
+    
+    @cached_property
+    def contrats(self):
+        return get_all_contrats()
+
 def show():
     apply_dashboard_css()
     
@@ -94,42 +162,36 @@ def show():
        
   
     date_fin = datetime.now().date()
-        
-    
-    # Tabs pour différents types de rapports
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        " Vue d'ensemble", 
-        " Clients", 
-        " Contrats", 
-        " Financier",
-        " Exports PDF"
-    ])
-    
-    with tab1:
-        vue_ensemble(date_debut, date_fin)
-    
-    with tab2:
-        rapport_clients(date_debut, date_fin)
-    
-    with tab3:
-        rapport_contrats(date_debut, date_fin)
     
-    with tab4:
-        rapport_financier(date_debut, date_fin)
-    
-    with tab5:
-        exports_pdf()
+    # Données partagées par les onglets, chargées à la demande
+    contexte = ReportingContexte(date_debut, date_fin)
+    
+    # Sections pour différents types de rapports (seule la section active est calculée)
+    afficher_sections("reporting", {
+        " Vue d'ensemble": lambda: vue_ensemble(contexte),
+        " Clients": lambda: rapport_clients(contexte),
+        " Contrats": lambda: rapport_contrats(contexte),
+        " Financier": lambda: rapport_financier(contexte),
+        " Exports PDF": lambda: exports_pdf(contexte)
+    }, prechargements={
+        " Vue d'ensemble": lambda: (contexte.statistiques, contexte.synthese_factures),
+        " Clients": lambda: contexte.synthese_clients,
+        " Contrats": lambda: contexte.synthese_contrats,
+        " Financier": lambda: (contexte.synthese_factures, contexte.revenu_par_mois_statut)
+    })
 
-def vue_ensemble(date_debut, date_fin):
+def vue_ensemble(contexte):
     """Vue d'ensemble générale corrigée"""
+    import pandas as pd
+    import plotly.express as px
+    
     st.subheader("Vue d'Ensemble")
     
     # Récupérer les statistiques depuis la DB
-    stats = get_statistiques()
+    stats = contexte.statistiques
     
-    # Récupérer les données pour calculs spécifiques à la période
-    contrats = get_all_contrats()
-    factures = get_all_factures()
+    # Agrégats des factures de la période (calculés en SQL)
+    synthese = contexte.synthese_factures
     
     # KPIs principaux
     col1, col2, col3, col4 = st.columns(4)
@@ -144,15 +206,7 @@ def vue_ensemble(date_debut, date_fin):
     
     with col3:
         # CA de la période sélectionnée
-        ca_periode = 0
-        if factures:
-            for facture in factures:
-                try:
-                    date_facture = datetime.strptime(facture.get('date_facture', '1900-01-01'), '%Y-%m-%d').date()
-                    if date_debut <= date_facture <= date_fin and facture.get('statut') == 'Payée':
-                        ca_periode += facture.get('montant_ttc', 0)
-                except:
-                    continue
+        ca_periode = synthese['ca_paye']
         
         st.metric("CA Période", f"{ca_periode:,.0f} DH")
         st.caption(f"CA Total: {stats.get('montant_encaisse', 0):,.0f} DH")
@@ -160,19 +214,8 @@ def vue_ensemble(date_debut, date_fin):
     with col4:
         # Taux de paiement sur la période
         taux_paiement = 0
-        if factures:
-            factures_periode = []
-            for f in factures:
-                try:
-                    date_facture = datetime.strptime(f.get('date_facture', '1900-01-01'), '%Y-%m-%d').date()
-                    if date_debut <= date_facture <= date_fin:
-                        factures_periode.append(f)
-                except:
-                    continue
-            
-            if factures_periode:
-                payees = len([f for f in factures_periode if f.get('statut') == 'Payée'])
-                taux_paiement = (payees / len(factures_periode)) * 100
+        if synthese['nb_factures']:
+            taux_paiement = (synthese['nb_payees'] / synthese['nb_factures']) * 100
         
         st.metric("Taux de Paiement", f"{taux_paiement:.1f}%")
     
@@ -202,18 +245,9 @@ def vue_ensemble(date_debut, date_fin):
     col1, col2 = st.columns(2)
     
     with col1:
-        # Évolution du CA mensuel
-        if factures:
-            ca_mensuel = {}
-            for facture in factures:
-                if facture.get('statut') == 'Payée':
-                    try:
-                        date_facture = datetime.strptime(facture.get('date_facture', '1900-01-01'), '%Y-%m-%d')
-                        mois = date_facture.strftime('%Y-%m')
-                        if date_debut <= date_facture.date() <= date_fin:
-                            ca_mensuel[mois] = ca_mensuel.get(mois, 0) + facture.get('montant_ttc', 0)
-                    except:
-                        continue
+        # Évolution du CA mensuel (agrégats mensuels des factures payées)
+        if contexte.nb_factures_total:
+            ca_mensuel = contexte.ca_mensuel(['Payée'])
             
             if ca_mensuel:
                 df_ca = pd.DataFrame(list(ca_mensuel.items()), columns=['Mois', 'CA'])
@@ -240,84 +274,50 @@ def vue_ensemble(date_debut, date_fin):
         else:
             st.info("Aucun client enregistré")
 
-def rapport_clients(date_debut, date_fin):
+def rapport_clients(contexte):
     """Rapport détaillé sur les clients - CORRIGÉ"""
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
     st.subheader("Rapport Clients")
+    date_debut, date_fin = contexte.cle
+    
+    # Clients physiques et moraux réunis dans un seul DataFrame
+    df_tous_clients = contexte.clients
     
-    # Récupérer les clients physiques et moraux séparément
-    clients_physiques = get_all_clients("physique")
-    clients_moraux = get_all_clients("moral")
-    
-    # Combiner tous les clients avec leur type
-    tous_clients = []
-    
-    # Ajouter les clients physiques
-    if clients_physiques:
-        for client in clients_physiques:
-            client_data = dict(client)
-            client_data['type'] = 'physique'
-            client_data['nom_complet'] = f"{client.get('nom', '')} {client.get('prenom', '')}"
-            client_data['identifiant'] = client.get('cin', '')
-            tous_clients.append(client_data)
-    
-    # Ajouter les clients moraux
-    if clients_moraux:
-        for client in clients_moraux:
-            client_data = dict(client)
-            client_data['type'] = 'moral'
-            client_data['nom_complet'] = client.get('raison_sociale', '')
-            client_data['identifiant'] = client.get('ice', '')
-            tous_clients.append(client_data)
-    
-    if not tous_clients:
+    if df_tous_clients.empty:
         st.info("Aucun client enregistré")
         return
     
     # Filtrer par date de création
-    clients_periode = []
-    for client in tous_clients:
-        try:
-            date_creation_str = client.get('date_creation', '1900-01-01')
-            # Gérer différents formats de date
-            if ' ' in date_creation_str:
-                date_creation_str = date_creation_str.split(' ')[0]
-            date_creation = datetime.strptime(date_creation_str, '%Y-%m-%d').date()
-            if date_debut <= date_creation <= date_fin:
-                clients_periode.append(client)
-        except:
-            continue
+    df_clients_periode = df_tous_clients[
+        df_tous_clients['date_creation'].between(pd.Timestamp(date_debut), pd.Timestamp(date_fin))
+    ]
+    
+    # Compteurs et évolution mensuelle calculés en SQL
+    synthese = contexte.synthese_clients
     
     # Statistiques clients
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Clients", len(tous_clients))
+        st.metric("Total Clients", synthese['total_clients'])
     
     with col2:
-        clients_physiques_count = len([c for c in tous_clients if c.get('type') == 'physique'])
-        st.metric("Clients Physiques", clients_physiques_count)
+        st.metric("Clients Physiques", synthese['clients_physiques'])
     
     with col3:
-        clients_moraux_count = len([c for c in tous_clients if c.get('type') == 'moral'])
-        st.metric("Clients Moraux", clients_moraux_count)
+        st.metric("Clients Moraux", synthese['clients_moraux'])
     
     with col4:
-        st.metric("Nouveaux (Période)", len(clients_periode))
+        st.metric("Nouveaux (Période)", synthese['nouveaux'])
     
     # Graphique d'évolution
-    if clients_periode:
+    if synthese['nouveaux_par_mois']:
         # Évolution par mois
-        evolution_mois = {}
-        for client in clients_periode:
-            try:
-                date_creation_str = client.get('date_creation', '1900-01-01')
-                if ' ' in date_creation_str:
-                    date_creation_str = date_creation_str.split(' ')[0]
-                date_creation = datetime.strptime(date_creation_str, '%Y-%m-%d')
-                mois = date_creation.strftime('%Y-%m')
-                evolution_mois[mois] = evolution_mois.get(mois, 0) + 1
-            except:
-                continue
+        evolution_mois = {r['mois']: r['nb'] for r in synthese['nouveaux_par_mois']}
         
         if evolution_mois:
             df_evolution = pd.DataFrame(list(evolution_mois.items()), columns=['Mois', 'Nouveaux'])
@@ -345,22 +345,18 @@ def rapport_clients(date_debut, date_fin):
             st.plotly_chart(fig, use_container_width=True)
     
     # Tableau détaillé des nouveaux clients
-    if clients_periode:
+    if not df_clients_periode.empty:
         st.markdown("### Nouveaux Clients de la Période")
         
         # Préparer les données pour l'affichage
-        tableau_clients = []
-        for client in clients_periode:
-            tableau_clients.append({
-                'Type': 'Physique' if client['type'] == 'physique' else 'Moral',
-                'Nom': client['nom_complet'],
-                'Identifiant': client['identifiant'],
-                'Téléphone': client.get('telephone', ''),
-                'Email': client.get('email', ''),
-                'Date Création': client.get('date_creation', '').split(' ')[0] if client.get('date_creation') else ''
-            })
-        
-        df_clients = pd.DataFrame(tableau_clients)
+        df_clients = pd.DataFrame({
+            'Type': df_clients_periode['type'].map({'physique': 'Physique', 'moral': 'Moral'}),
+            'Nom': df_clients_periode['nom_complet'],
+            'Identifiant': df_clients_periode['identifiant'],
+            'Téléphone': df_clients_periode['telephone'].fillna(''),
+            'Email': df_clients_periode['email'].fillna(''),
+            'Date Création': df_clients_periode['date_creation'].dt.strftime('%Y-%m-%d')
+        })
         st.dataframe(df_clients, use_container_width=True, hide_index=True)
         
         # Export CSV
@@ -378,8 +374,8 @@ def rapport_clients(date_debut, date_fin):
     with col1:
         # Répartition par type
         types_count = {
-            'Personnes Physiques': len([c for c in tous_clients if c.get('type') == 'physique']),
-            'Personnes Morales': len([c for c in tous_clients if c.get('type') == 'moral'])
+            'Personnes Physiques': synthese['clients_physiques'],
+            'Personnes Morales': synthese['clients_moraux']
         }
         
         if sum(types_count.values()) > 0:
@@ -389,18 +385,13 @@ def rapport_clients(date_debut, date_fin):
     
     with col2:
         # Top 10 villes (si données d'adresse disponibles)
-        villes = {}
-        for client in tous_clients:
-            adresse = client.get('adresse', '')
-            if adresse:
-                # Extraction simple de la ville (dernière partie après virgule)
-                ville = adresse.split(',')[-1].strip() if ',' in adresse else adresse.strip()
-                if ville:
-                    villes[ville] = villes.get(ville, 0) + 1
-        
-        if villes:
+        # Extraction simple de la ville (dernière partie après virgule)
+        villes = df_tous_clients['adresse'].dropna().str.split(',').str[-1].str.strip()
+        villes = villes[villes != '']
+        
+        if not villes.empty:
             # Prendre les 10 premières villes
-            top_villes = dict(sorted(villes.items(), key=lambda x: x[1], reverse=True)[:10])
+            top_villes = villes.value_counts().head(10).to_dict()
             if top_villes:
                 fig = px.bar(x=list(top_villes.keys()), y=list(top_villes.values()), 
                            title="Top 10 Villes")
@@ -408,66 +399,43 @@ def rapport_clients(date_debut, date_fin):
         else:
             st.info("Données d'adresse insuffisantes pour l'analyse géographique")
 
-def rapport_contrats(date_debut, date_fin):
+def rapport_contrats(contexte):
     """Rapport détaillé sur les contrats - CORRIGÉ"""
+    import pandas as pd
+    import plotly.express as px
+    
     st.subheader("Rapport Contrats")
     
-    contrats = get_all_contrats()
+    # Compteurs, répartitions et nouveaux contrats calculés en SQL
+    synthese = contexte.synthese_contrats
     
-    if not contrats:
+    if not synthese['total_contrats']:
         st.info("Aucun contrat enregistré")
         return
     
-    # Calculer les statistiques
-    contrats_actifs = [c for c in contrats if c.get('statut') == 'Actif']
-    contrats_expires = [c for c in contrats if c.get('statut') == 'Résilié']
-    
-    # Contrats créés dans la période
-    contrats_periode = []
-    for contrat in contrats:
-        try:
-            date_creation_str = contrat.get('date_creation', '1900-01-01')
-            if ' ' in date_creation_str:
-                date_creation_str = date_creation_str.split(' ')[0]
-            date_creation = datetime.strptime(date_creation_str, '%Y-%m-%d').date()
-            if date_debut <= date_creation <= date_fin:
-                contrats_periode.append(contrat)
-        except:
-            continue
-    
     # Contrats expirant bientôt
-    contrats_expirants = []
-    date_limite = datetime.now().date() + timedelta(days=60)
-    
-    for contrat in contrats_actifs:
-        try:
-            date_fin_contrat = datetime.strptime(contrat['date_fin'], '%Y-%m-%d').date()
-            jours_restants = (date_fin_contrat - datetime.now().date()).days
-            if 0 <= jours_restants <= 60:
-                contrat_data = dict(contrat)
-                contrat_data['jours_restants'] = jours_restants
-                contrats_expirants.append(contrat_data)
-        except:
-            continue
+    df_actifs = contexte.contrats_actifs
+    jours_restants = (df_actifs['date_fin'] - pd.Timestamp(date.today())).dt.days
+    contrats_expirants = df_actifs.assign(jours_restants=jours_restants)[jours_restants.between(0, 60)]
     
     # Statistiques contrats
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Contrats", len(contrats))
+        st.metric("Total Contrats", synthese['total_contrats'])
     
     with col2:
-        st.metric("Contrats Actifs", len(contrats_actifs))
+        st.metric("Contrats Actifs", synthese['contrats_actifs'])
     
     with col3:
-        st.metric("Nouveaux (Période)", len(contrats_periode))
+        st.metric("Nouveaux (Période)", synthese['nouveaux'])
     
     with col4:
-        ca_mensuel = sum(float(c.get('montant_mensuel', 0)) for c in contrats_actifs)
+        ca_mensuel = synthese['ca_mensuel_actif']
         st.metric("CA Mensuel Récurrent", f"{ca_mensuel:,.0f} DH")
     
     # Alertes
-    if contrats_expirants:
+    if not contrats_expirants.empty:
         st.warning(f"⚠️ {len(contrats_expirants)} contrats expirent dans les 60 prochains jours")
     
     # Graphiques
@@ -475,10 +443,7 @@ def rapport_contrats(date_debut, date_fin):
     
     with col1:
         # Répartition par statut
-        statuts = {}
-        for contrat in contrats:
-            statut = contrat.get('statut', 'Inconnu')
-            statuts[statut] = statuts.get(statut, 0) + 1
+        statuts = {r['statut']: r['nb'] for r in synthese['par_statut']}
         
         if statuts:
             fig = px.pie(values=list(statuts.values()), names=list(statuts.keys()), 
@@ -487,10 +452,7 @@ def rapport_contrats(date_debut, date_fin):
     
     with col2:
         # Répartition par type de service
-        types_service = {}
-        for contrat in contrats:
-            type_serv = contrat.get('type_service', 'Inconnu')
-            types_service[type_serv] = types_service.get(type_serv, 0) + 1
+        types_service = {r['type_service']: r['nb'] for r in synthese['par_type_service']}
         
         if types_service:
             fig = px.bar(x=list(types_service.keys()), y=list(types_service.values()), 
@@ -499,21 +461,18 @@ def rapport_contrats(date_debut, date_fin):
             st.plotly_chart(fig, use_container_width=True)
     
     # Contrats expirant prochainement
-    if contrats_expirants:
+    if not contrats_expirants.empty:
         st.markdown("### ⚠️ Contrats Expirant Prochainement (60 jours)")
         
-        tableau_expirants = []
-        for contrat in sorted(contrats_expirants, key=lambda x: x['jours_restants']):
-            tableau_expirants.append({
-                'Numéro': contrat['numero_contrat'],
-                'Client': contrat.get('client_nom', 'N/A'),
-                'Date Fin': contrat['date_fin'],
-                'Jours Restants': contrat['jours_restants'],
-                'Montant Mensuel': f"{contrat['montant_mensuel']:,.0f} DH",
-                'Statut': contrat['statut']
-            })
-        
-        df_expirants = pd.DataFrame(tableau_expirants)
+        expirants = contrats_expirants.sort_values('jours_restants')
+        df_expirants = pd.DataFrame({
+            'Numéro': expirants['numero_contrat'],
+            'Client': expirants['client_nom'].fillna('N/A'),
+            'Date Fin': expirants['date_fin'].dt.strftime('%Y-%m-%d'),
+            'Jours Restants': expirants['jours_restants'],
+            'Montant Mensuel': expirants['montant_mensuel'].map('{:,.0f} DH'.format),
+            'Statut': expirants['statut']
+        })
         
         # Colorer selon l'urgence
         def color_urgence(val):
@@ -537,20 +496,10 @@ def rapport_contrats(date_debut, date_fin):
         st.success("✅ Aucun contrat n'expire dans les 60 prochains jours")
     
     # Évolution mensuelle des nouveaux contrats
-    if contrats_periode:
+    if synthese['nouveaux_par_mois']:
         st.markdown("### Évolution des Nouveaux Contrats")
         
-        evolution_contrats = {}
-        for contrat in contrats_periode:
-            try:
-                date_creation_str = contrat.get('date_creation', '1900-01-01')
-                if ' ' in date_creation_str:
-                    date_creation_str = date_creation_str.split(' ')[0]
-                date_creation = datetime.strptime(date_creation_str, '%Y-%m-%d')
-                mois = date_creation.strftime('%Y-%m')
-                evolution_contrats[mois] = evolution_contrats.get(mois, 0) + 1
-            except:
-                continue
+        evolution_contrats = {r['mois']: r['nb'] for r in synthese['nouveaux_par_mois']}
         
         if evolution_contrats:
             df_evolution = pd.DataFrame(list(evolution_contrats.items()), columns=['Mois', 'Nouveaux Contrats'])
@@ -560,32 +509,27 @@ def rapport_contrats(date_debut, date_fin):
                         title="Évolution Mensuelle des Nouveaux Contrats")
             st.plotly_chart(fig, use_container_width=True)
 
-def rapport_financier(date_debut, date_fin):
+def rapport_financier(contexte):
     """Rapport financier détaillé - CORRIGÉ"""
-    st.subheader("Rapport Financier")
+    import pandas as pd
+    import plotly.express as px
     
-    factures = get_all_factures()
+    st.subheader("Rapport Financier")
     
-    if not factures:
+    if not contexte.nb_factures_total:
         st.info("Aucune facture enregistrée")
         return
     
-    # Filtrer les factures par période
-    factures_periode = []
-    for facture in factures:
-        try:
-            date_facture = datetime.strptime(facture.get('date_facture', '1900-01-01'), '%Y-%m-%d').date()
-            if date_debut <= date_facture <= date_fin:
-                factures_periode.append(facture)
-        except:
-            continue
-    
-    # Calculs financiers
-    ca_total = sum(f.get('montant_ttc', 0) for f in factures_periode)
-    ca_paye = sum(f.get('montant_ttc', 0) for f in factures_periode if f.get('statut') == 'Payée')
-    ca_attente = sum(f.get('montant_ttc', 0) for f in factures_periode if f.get('statut') in ['En attente', 'En retard'])
-    ca_ht_total = sum(f.get('montant_ht', 0) for f in factures_periode)
-    tva_total = sum(f.get('montant_tva', 0) for f in factures_periode)
+    # Factures de la période, chargées une seule fois
+    factures_periode = contexte.factures_periode
+    
+    # Calculs financiers (agrégats SQL sur la période)
+    synthese = contexte.synthese_factures
+    ca_total = synthese['ca_ttc']
+    ca_paye = synthese['ca_paye']
+    ca_attente = synthese['ca_attente']
+    ca_ht_total = synthese['ca_ht']
+    tva_total = synthese['tva']
     
     # Métriques financières
     col1, col2, col3, col4 = st.columns(4)
@@ -604,7 +548,7 @@ def rapport_financier(date_debut, date_fin):
         st.caption(f"TVA totale: {tva_total:,.0f} DH")
     
     with col4:
-        nb_factures = len(factures_periode)
+        nb_factures = synthese['nb_factures']
         panier_moyen = ca_total / nb_factures if nb_factures > 0 else 0
         st.metric("Panier Moyen", f"{panier_moyen:,.0f} DH")
         st.caption(f"Nb factures: {nb_factures}")
@@ -613,16 +557,9 @@ def rapport_financier(date_debut, date_fin):
     col1, col2 = st.columns(2)
     
     with col1:
-        # Évolution mensuelle du CA
-        if factures_periode:
-            ca_mensuel = {}
-            for facture in factures_periode:
-                try:
-                    date_facture = datetime.strptime(facture.get('date_facture', '1900-01-01'), '%Y-%m-%d')
-                    mois = date_facture.strftime('%Y-%m')
-                    ca_mensuel[mois] = ca_mensuel.get(mois, 0) + facture.get('montant_ttc', 0)
-                except:
-                    continue
+        # Évolution mensuelle du CA (agrégats mensuels, mois couverts par la période)
+        if not factures_periode.empty:
+            ca_mensuel = contexte.ca_mensuel()
             
             if ca_mensuel:
                 df_ca = pd.DataFrame(list(ca_mensuel.items()), columns=['Mois', 'CA'])
@@ -633,11 +570,7 @@ def rapport_financier(date_debut, date_fin):
     
     with col2:
         # Répartition par statut de paiement
-        statuts_paiement = {}
-        for facture in factures_periode:
-            statut = facture.get('statut', 'Inconnu')
-            montant = facture.get('montant_ttc', 0)
-            statuts_paiement[statut] = statuts_paiement.get(statut, 0) + montant
+        statuts_paiement = {r['statut']: r['montant_ttc'] for r in synthese['par_statut']}
         
         if statuts_paiement:
             fig = px.pie(
@@ -647,88 +580,75 @@ def rapport_financier(date_debut, date_fin):
             )
             st.plotly_chart(fig, use_container_width=True)
     
-    # Analyse des retards de paiement
-    factures_retard = []
-    for facture in factures_periode:
-        if facture.get('statut') in ['En attente', 'En retard']:
-            try:
-                date_echeance = datetime.strptime(facture.get('date_echeance', facture.get('date_facture', '1900-01-01')), '%Y-%m-%d').date()
-                jours_retard = (datetime.now().date() - date_echeance).days
-                if jours_retard > 0:
-                    facture_data = dict(facture)
-                    facture_data['jours_retard'] = jours_retard
-                    factures_retard.append(facture_data)
-            except:
-                continue
-    
-    if factures_retard:
+    # Analyse des retards de paiement (statut 'En retard' enregistré en base) ;
+    # les échéances sont reconverties pour que .dt reste valable sur toute période
+    factures_retard = pd.DataFrame()
+    if not factures_periode.empty and 'date_echeance' in factures_periode:
+        factures_retard = factures_periode[factures_periode['statut'] == 'En retard'].copy()
+        factures_retard['date_echeance'] = pd.to_datetime(factures_retard['date_echeance'], errors='coerce')
+        factures_retard['date_facture'] = pd.to_datetime(factures_retard['date_facture'], errors='coerce')
+        factures_retard['jours_retard'] = (pd.Timestamp(date.today()) - factures_retard['date_echeance']).dt.days
+    
+    if not factures_retard.empty:
         st.markdown("###  Factures en Retard de Paiement")
         
-        tableau_retards = []
-        for facture in sorted(factures_retard, key=lambda x: x['jours_retard'], reverse=True):
-            tableau_retards.append({
-                'Numéro': facture['numero_facture'],
-                'Client': facture.get('client_nom', 'N/A'),
-                'Date Facture': facture['date_facture'],
-                'Date Échéance': facture.get('date_echeance', 'N/A'),
-                'Montant TTC': f"{facture['montant_ttc']:,.0f} DH",
-                'Jours de Retard': facture['jours_retard'],
-                'Statut': facture['statut']
-            })
-        
-        df_retards = pd.DataFrame(tableau_retards)
+        retards = factures_retard.sort_values('jours_retard', ascending=False)
+        df_retards = pd.DataFrame({
+            'Numéro': retards['numero_facture'],
+            'Client': retards['client_nom'].fillna('N/A'),
+            'Date Facture': retards['date_facture'].dt.strftime('%Y-%m-%d'),
+            'Date Échéance': retards['date_echeance'].dt.strftime('%Y-%m-%d'),
+            'Montant TTC': retards['montant_ttc'].map('{:,.0f} DH'.format),
+            'Jours de Retard': retards['jours_retard'],
+            'Statut': retards['statut']
+        })
         st.dataframe(df_retards, use_container_width=True, hide_index=True)
         
         # Total des impayés
-        total_impayes = sum(f['montant_ttc'] for f in factures_retard)
+        total_impayes = factures_retard['montant_ttc'].sum()
         st.error(f" Total des impayés en retard: {total_impayes:,.0f} DH")
     
     # Tableau détaillé des factures de la période
-    if factures_periode:
+    if not factures_periode.empty:
         st.markdown("###  Détail des Factures de la Période")
         
         # Options de filtrage
         col1, col2 = st.columns(2)
         with col1:
-            statuts_disponibles = ['Tous'] + list(set(f.get('statut', '') for f in factures_periode))
+            statuts_disponibles = ['Tous'] + list(factures_periode['statut'].dropna().unique())
             statut_filtre = st.selectbox("Filtrer par statut", statuts_disponibles)
         
         with col2:
             montant_min = st.number_input("Montant minimum (DH)", min_value=0, value=0)
         
         # Appliquer les filtres
-        factures_filtrees = factures_periode
+        masque = factures_periode['montant_ttc'] >= montant_min
         if statut_filtre != 'Tous':
-            factures_filtrees = [f for f in factures_filtrees if f.get('statut') == statut_filtre]
-        if montant_min > 0:
-            factures_filtrees = [f for f in factures_filtrees if f.get('montant_ttc', 0) >= montant_min]
+            masque &= factures_periode['statut'] == statut_filtre
+        factures_filtrees = factures_periode[masque]
         
         # Tableau des factures
-        if factures_filtrees:
-            tableau_factures = []
-            for facture in factures_filtrees:
-                tableau_factures.append({
-                    'Numéro': facture['numero_facture'],
-                    'Client': facture.get('client_nom', 'N/A'),
-                    'Date': facture['date_facture'],
-                    'Montant HT': f"{facture.get('montant_ht', 0):,.2f} DH",
-                    'TVA': f"{facture.get('montant_tva', 0):,.2f} DH",
-                    'Montant TTC': f"{facture.get('montant_ttc', 0):,.2f} DH",
-                    'Statut': facture['statut'],
-                    'Mode': facture.get('mode_reglement', 'N/A')
-                })
-            
-            df_factures = pd.DataFrame(tableau_factures)
+        if not factures_filtrees.empty:
+            df_factures = pd.DataFrame({
+                'Numéro': factures_filtrees['numero_facture'],
+                'Client': factures_filtrees['client_nom'].fillna('N/A'),
+                'Date': factures_filtrees['date_facture'].dt.strftime('%Y-%m-%d'),
+                'Montant HT': factures_filtrees['montant_ht'].map('{:,.2f} DH'.format),
+                'TVA': factures_filtrees['montant_tva'].map('{:,.2f} DH'.format),
+                'Montant TTC': factures_filtrees['montant_ttc'].map('{:,.2f} DH'.format),
+                'Statut': factures_filtrees['statut'],
+                'Mode': factures_filtrees['mode_reglement'].fillna('N/A')
+            })
             st.dataframe(df_factures, use_container_width=True, hide_index=True)
             
             # Résumé des factures filtrées
-            total_filtre = sum(f.get('montant_ttc', 0) for f in factures_filtrees)
+            total_filtre = factures_filtrees['montant_ttc'].sum()
             st.info(f" {len(factures_filtrees)} factures - Total: {total_filtre:,.0f} DH")
     
         else:
             st.info("Aucune facture ne correspond aux critères de filtrage")
 
-def exports_pdf():
+def exports_pdf(contexte):
     """Section pour les exports PDF"""
     st.subheader(" Exports PDF")
     
@@ -740,16 +660,16 @@ def exports_pdf():
     tab1, tab2 = st.tabs([" Factures PDF", " Contrats PDF"])
     
     with tab1:
-        export_factures_pdf()
+        export_factures_pdf(contexte)
     
     with tab2:
-        export_contrats_pdf()
+        export_contrats_pdf(contexte)
 
-def export_factures_pdf():
+def export_factures_pdf(contexte):
     """Export des factures en PDF"""
     st.markdown("###  Export Factures PDF")
     
-    factures = get_all_factures()
+    factures = contexte.factures
     
     if not factures:
         st.info("Aucune facture disponible")
@@ -788,11 +708,11 @@ def export_factures_pdf():
         else:
             st.error(" Erreur lors de la génération du PDF")
 
-def export_contrats_pdf():
+def export_contrats_pdf(contexte):
     """Export des contrats en PDF"""
     st.markdown("###  Export Contrats PDF")
     
-    contrats = get_all_contrats()
+    contrats = contexte.contrats
     
     if not contrats:
         st.info("Aucun contrat disponible")
@@ -840,6 +760,12 @@ def export_contrats_pdf():
 
 def generer_pdf_facture(facture):
     """Génère un PDF pour une facture"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image as ReportLabImage
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import cm
+    from reportlab.lib import colors
+    
     try:
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4, 
@@ -1037,6 +963,12 @@ def format_periode_multiline(debut, fin):
 # Puis utilisez-la dans details_data :
 def generer_pdf_contrat(contrat):
     """Génère un PDF pour un contrat"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image as ReportLabImage
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import cm
+    from reportlab.lib import colors
+    
     try:
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4,
@@ -341,6 +341,178 @@ def calculer_duree_contrat(date_debut: str, date_fin: str) -> int:
     except (ValueError, TypeError):
         return 12  # Valeur par défaut
 
+def derniers_mois(nombre: int, reference=None) -> list:
+    """
+    Liste des derniers mois calendaires, du plus ancien au plus récent
+    
+    Args:
+        nombre (int): Nombre de mois (le mois de référence inclus)
+        reference (date): Date de référence (aujourd'hui par défaut)
+        
+    Returns:
+        list: Mois au format YYYY-MM (ex: ["2025-04", ..., "2025-09"])
+    """
+    reference = reference or datetime.now().date()
+    annee, mois = reference.year, reference.month
+    resultat = []
+    for _ in range(nombre):
+        resultat.insert(0, f"{annee:04d}-{mois:02d}")
+        mois -= 1
+        if mois == 0:
+            annee, mois = annee - 1, 12
+    return resultat
+
+def paginer(cle: str, charger_page, signature: Any = None) -> Dict[str, Any]:
+    """
+    Charge la page courante d'une liste paginée (keyset) dans Streamlit
+    
+    Les curseurs des pages déjà visitées sont empilés dans st.session_state,
+    ce qui permet de revenir en arrière sans recompter les lignes précédentes.
+    
+    Args:
+        cle (str): Identifiant unique de la liste (clé de session)
+        charger_page (callable): Fonction curseur -> page (voir db.get_contrats_page)
+        signature: Valeur des filtres ; la pagination revient à la première page si elle change
+        
+    Returns:
+        Dict: La page chargée ('lignes', 'total', 'limite', 'curseur_suivant')
+    """
+    import streamlit as st
+    
+    etat_cle = f"pagination_{cle}"
+    etat = st.session_state.get(etat_cle)
+    if etat is None or etat['signature'] != signature:
+        etat = {'signature': signature, 'curseurs': [None]}
+        st.session_state[etat_cle] = etat
+    
+    page = charger_page(etat['curseurs'][-1])
+    
+    # Page devenue vide (suppressions) : revenir au début
+    if not page['lignes'] and len(etat['curseurs']) > 1:
+        etat['curseurs'] = [None]
+        page = charger_page(None)
+    
+    return page
+
+def afficher_pagination(cle: str, page: Dict[str, Any]):
+    """
+    Affiche les boutons Précédent / Suivant d'une liste chargée par paginer()
+    
+    Args:
+        cle (str): Identifiant de la liste (le même que pour paginer)
+        page (Dict): Page retournée par paginer()
+    """
+    import streamlit as st
+    
+    etat = st.session_state[f"pagination_{cle}"]
+    numero = len(etat['curseurs'])
+    total = page.get('total')
+    limite = page.get('limite') or 1
+    
+    def precedente():
+        if len(etat['curseurs']) > 1:
+            etat['curseurs'].pop()
+    
+    def suivante():
+        if page.get('curseur_suivant') is not None:
+            etat['curseurs'].append(page['curseur_suivant'])
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("◀ Précédent", key=f"{cle}_precedent", on_click=precedente,
+                  disabled=numero == 1, use_container_width=True)
+    with col2:
+        if total is not None:
+            nb_pages = max(1, -(-total // limite))
+            st.caption(f"Page {numero} / {nb_pages} — {total} élément(s)")
+        else:
+            st.caption(f"Page {numero}")
+    with col3:
+        st.button("Suivant ▶", key=f"{cle}_suivant", on_click=suivante,
+                  disabled=page.get('curseur_suivant') is None, use_container_width=True)
+
+def afficher_sections(cle: str, sections: Dict[str, Any], prechargements: Dict[str, Any] = None) -> str:
+    """
+    Remplace st.tabs par un sélecteur de section : seule la section active est
+    exécutée, alors que st.tabs exécute le contenu de tous les onglets à chaque rerun
+
+    Args:
+        cle (str): Identifiant unique du sélecteur (clé de session)
+        sections (Dict): Libellé -> fonction sans argument qui affiche la section
+        prechargements (Dict): Libellé -> fonction sans argument qui charge les
+            données d'une section sans rien afficher ; appelée pour les sections
+            inactives une fois la section active affichée, afin que le cache de
+            lecture soit déjà rempli quand l'utilisateur change de section.
+            Seulement au premier affichage de la page et à chaque changement de
+            section : les autres reruns ne calculent que la section visible
+
+    Returns:
+        str: Libellé de la section affichée
+    """
+    import streamlit as st
+
+    libelles = list(sections)
+    etat_cle = f"section_{cle}"
+    if st.session_state.get(etat_cle) not in libelles:
+        st.session_state[etat_cle] = libelles[0]
+
+    active = st.radio(cle, libelles, key=etat_cle, horizontal=True, label_visibility="collapsed")
+    sections[active]()
+
+    # Section active lors du dernier préchargement
+    etat_prechargement = f"prechargement_{cle}"
+    if not prechargements or st.session_state.get(etat_prechargement) == active:
+        return active
+    st.session_state[etat_prechargement] = active
+
+    for libelle, prechargement in prechargements.items():
+        if libelle != active:
+            try:
+                prechargement()
+            except Exception as e:
+                print(f"Erreur de préchargement de la section {libelle}: {e}")
+
+    return active
+
+def afficher_rapport_import(rapport: Dict[str, Any], cle: str, libelle: str = "lignes importées"):
+    """
+    Affiche le rapport d'un import en masse (db.importer_clients / importer_contrats) :
+    compteurs, débit et tableau des lignes rejetées téléchargeable en CSV
+
+    Args:
+        rapport (Dict): Rapport retourné par la fonction d'import
+        cle (str): Préfixe du fichier de rejets téléchargé
+        libelle (str): Libellé du compteur des lignes importées
+    """
+    import streamlit as st
+
+    if rapport['erreur']:
+        st.error(f"✗ Import interrompu : {rapport['erreur']}")
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Lignes lues", rapport['total'])
+    col2.metric(libelle.capitalize(), rapport['importes'])
+    col3.metric("Lignes rejetées", len(rapport['rejets']))
+    col4.metric("Débit", f"{rapport['lignes_par_s']:,.0f} lignes/s".replace(",", " "))
+
+    if rapport['rejets']:
+        import pandas as pd
+
+        st.warning(f"⚠️ {len(rapport['rejets'])} ligne(s) rejetée(s) : corrigez-les puis réimportez-les.")
+        df_rejets = pd.DataFrame(rapport['rejets']).rename(columns={
+            'ligne': 'Ligne', 'identifiant': 'Identifiant', 'erreurs': 'Erreurs'
+        })
+        st.dataframe(df_rejets, use_container_width=True, hide_index=True)
+        st.download_button(
+            label="⭳ Télécharger le rapport d'erreurs",
+            data=df_rejets.to_csv(index=False, sep=';'),
+            file_name=f"rejets_{cle}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            mime="text/csv",
+            key=f"rejets_{cle}"
+        )
+    elif not rapport['erreur']:
+        st.success(f"✅ {rapport['importes']} {libelle} en {rapport['duree_s']:.1f} s")
+
 # Constantes utiles
 TYPES_CLIENTS = {
     "physique": "Personne Physique",